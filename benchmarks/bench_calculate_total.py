@@ -0,0 +1,60 @@
+# coding=utf-8
+"""Compare the Decimal loop calculate_total used to run with hansei.aggregate.
+
+Run from the repository root::
+
+    PYTHONPATH=. python benchmarks/bench_calculate_total.py [number of line items]
+
+The line items are generated locally, no Koku server is needed.
+"""
+import decimal
+import random
+import sys
+import timeit
+
+from hansei.aggregate import aggregate
+
+
+def make_line_items(count):
+    """Return ``count`` cost line items with random totals."""
+    rand = random.Random(0)
+    return [
+        {
+            'date': '2018-07-{:02d}'.format(index % 30 + 1),
+            'units': 'USD',
+            'account': str(index % 50),
+            'service': 'service {}'.format(index % 20),
+            'total': round(rand.uniform(0, 500), 6),
+        }
+        for index in range(count)
+    ]
+
+
+def decimal_loop(line_items):
+    """The summation calculate_total did before hansei.aggregate."""
+    total_item = decimal.Decimal(0.0)
+    for item in line_items:
+        total_item = total_item + (
+            decimal.Decimal(item['total']) if item['total'] else 0)
+    return total_item
+
+
+def main(count):
+    line_items = make_line_items(count)
+    repeat = 5
+
+    loop_time = min(timeit.repeat(
+        lambda: decimal_loop(line_items), number=1, repeat=repeat))
+    aggregate_time = min(timeit.repeat(
+        lambda: aggregate(line_items), number=1, repeat=repeat))
+
+    print('line items       : {}'.format(count))
+    print('Decimal loop     : {:.4f}s  total={}'.format(
+        loop_time, decimal_loop(line_items)))
+    print('fixed-point sum  : {:.4f}s  total={}'.format(
+        aggregate_time, aggregate(line_items).total))
+    print('speedup          : {:.1f}x'.format(loop_time / aggregate_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,89 @@
+# coding=utf-8
+"""Exact aggregation of report line item totals.
+
+Summing line items by building a ``decimal.Decimal`` for each of them is slow
+on large reports, and summing floats accumulates rounding errors. Instead the
+totals are converted to integers scaled to a fixed number of decimal digits
+(micro-units by default), summed exactly with Python integers and converted to
+a ``Decimal`` once at the end.
+"""
+import decimal
+from collections import namedtuple
+
+
+DEFAULT_SCALE_DIGITS = 6
+"""Number of decimal digits kept for each line item total (micro-units)."""
+
+
+Aggregate = namedtuple('Aggregate', ['total', 'items', 'count', 'subtotals'])
+"""Result of :func:`aggregate`.
+
+``total`` is the ``Decimal`` sum of the line item totals, or None if there are
+no line items. ``items`` is the number of line items, ``count`` the sum of
+their ``count`` fields and ``subtotals`` a dictionary of units to the
+``Decimal`` sum of the totals reported in those units.
+"""
+
+
+def to_scaled(value, scale_digits=DEFAULT_SCALE_DIGITS):
+    """Return ``value`` as an integer number of ``10 ** -scale_digits`` units.
+
+    Integers, strings and ``Decimal`` values are converted exactly, floats are
+    rounded to the nearest unit. Null values count as 0.
+    """
+    if value is None:
+        return 0
+    if type(value) is float:
+        return round(value * 10 ** scale_digits)
+    if type(value) is int:
+        return value * 10 ** scale_digits
+    return int(decimal.Decimal(value).scaleb(scale_digits).to_integral_value(
+        decimal.ROUND_HALF_EVEN))
+
+
+def from_scaled(value, scale_digits=DEFAULT_SCALE_DIGITS):
+    """Return the ``Decimal`` value of an integer returned by :func:`to_scaled`."""
+    return decimal.Decimal(value).scaleb(-scale_digits)
+
+
+def aggregate(line_items, scale_digits=DEFAULT_SCALE_DIGITS):
+    """Sum the totals and counts of ``line_items`` in a single pass.
+
+    Arguments:
+        line_items - Iterable of line item dictionaries, see
+            ``hansei.koku_models.KokuBaseReport.iter_line_items``
+        scale_digits - Number of decimal digits kept for each total
+
+    Returns: :class:`Aggregate`
+    """
+    scale = 10 ** scale_digits
+    items = 0
+    count = 0
+    subtotals = {}
+
+    for item in line_items:
+        items += 1
+        value = item.get('total')
+        if type(value) is float:
+            scaled = round(value * scale)
+        elif value:
+            scaled = to_scaled(value, scale_digits)
+        else:
+            scaled = 0
+
+        units = item.get('units')
+        subtotals[units] = subtotals.get(units, 0) + scaled
+        count += item.get('count') or 0
+
+    if not items:
+        return Aggregate(None, 0, 0, {})
+
+    return Aggregate(
+        total=from_scaled(sum(subtotals.values()), scale_digits),
+        items=items,
+        count=count,
+        subtotals={
+            units: from_scaled(subtotal, scale_digits)
+            for units, subtotal in subtotals.items()
+        },
+    )
@@ -6,23 +6,219 @@ server, allowing the user to customize how return codes are handled depending
 on the context.
 
 """
-from json import JSONDecodeError
+import hashlib
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
 from pprint import pformat
-from urllib.parse import urljoin, urlunparse
+from urllib.parse import urljoin, urlparse, urlunparse
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 
 from hansei import config
+from hansei import decoder
 from hansei import exceptions
+from hansei import metrics
+from hansei.http_cache import SAFE_METHODS, HTTPCache
+from hansei.retry import CircuitBreaker, RetryPolicy
+from hansei.token_cache import TokenCache
 from hansei.constants import (
     KOKU_API_VERSION,
     KOKU_TOKEN_PATH,
     KOKU_DEFAULT_USER,
     KOKU_DEFAULT_PASSWORD,
+    KOKU_DEFAULT_POOL_CONNECTIONS,
+    KOKU_DEFAULT_POOL_MAXSIZE,
 )
 
 
+# `get_session` uses this as a cache, the same way `hansei.config.get_config`
+# caches the parsed config file. Every client in the process shares the same
+# connection pool unless it is given a session of its own.
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+# Shared by every client, since an endpoint that is down is down for all of
+# them. Built by `get_circuit_breaker` on first use.
+_CIRCUIT_BREAKER = None
+
+# The JSON decoder selected in the config file. Built by `get_decoder` on
+# first use.
+_DECODER = None
+
+# Built by `get_http_cache` on first use. Responses are keyed by identity, so
+# the cache is safely shared by clients logged in as different users.
+_NOT_BUILT = object()
+_HTTP_CACHE = _NOT_BUILT
+
+_UUID_RE = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+    r'[0-9a-fA-F]{12}')
+
+
+def build_session(cfg=None):
+    """Return a new ``requests.Session`` with a pooled, keep-alive adapter.
+
+    The pool is configured from the ``koku`` section of the hansei config
+    file::
+
+        koku:
+            pool-connections: 10  # number of per-host pools to keep around
+            pool-maxsize: 10      # connections kept alive for each host
+            pool-block: false     # block instead of opening extra connections
+                                  # once a host pool is exhausted
+            keep-alive: true      # set to false to close every connection
+                                  # after its response has been read
+
+    Cookies are never stored by the session. Koku authenticates with tokens
+    and the session is shared by clients logged in as different users.
+
+    :param cfg: The ``koku`` config section. Read from the config file if not
+        provided.
+    """
+    if cfg is None:
+        cfg = config.get_config().get('koku', {})
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=int(cfg.get(
+            'pool-connections', KOKU_DEFAULT_POOL_CONNECTIONS)),
+        pool_maxsize=int(cfg.get('pool-maxsize', KOKU_DEFAULT_POOL_MAXSIZE)),
+        pool_block=bool(cfg.get('pool-block', False)),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    if not cfg.get('keep-alive', True):
+        session.headers['Connection'] = 'close'
+
+    return session
+
+
+def build_url(cfg):
+    """Return the base url of the Koku API built from the ``koku`` config.
+
+    :param cfg: The ``koku`` section of the hansei config file.
+    :raises: ``hansei.exceptions.KokuBaseUrlNotFound`` if no hostname is
+        configured.
+    """
+    hostname = cfg.get('hostname')
+
+    if not hostname:
+        raise exceptions.KokuBaseUrlNotFound(
+            "\n'koku' section specified in hansei config file, but"
+            "no 'hostname' key found."
+        )
+
+    scheme = 'https' if cfg.get('https', False) else 'http'
+    port = str(cfg.get('port', ''))
+    netloc = hostname + ':{}'.format(port) if port else hostname
+    return urlunparse((scheme, netloc, KOKU_API_VERSION, '', '', ''))
+
+
+def get_session():
+    """Return the ``requests.Session`` shared by all clients in the process.
+
+    The session is built on first use. Call :func:`close_session` to release
+    its pooled connections.
+    """
+    global _SESSION  # pylint:disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = build_session()
+        return _SESSION
+
+
+def get_circuit_breaker():
+    """Return the ``hansei.retry.CircuitBreaker`` shared by all clients."""
+    global _CIRCUIT_BREAKER  # pylint:disable=global-statement
+    with _SESSION_LOCK:
+        if _CIRCUIT_BREAKER is None:
+            _CIRCUIT_BREAKER = CircuitBreaker.from_config(
+                config.get_config().get('koku', {}))
+        return _CIRCUIT_BREAKER
+
+
+def get_decoder():
+    """Return the JSON decoder selected by ``json-decoder`` in the config file.
+
+    See :func:`hansei.decoder.get_decoder`. It is used by the response
+    handlers and by every client.
+    """
+    global _DECODER  # pylint:disable=global-statement
+    with _SESSION_LOCK:
+        if _DECODER is None:
+            _DECODER = decoder.get_decoder(
+                config.get_config().get('koku', {}).get('json-decoder', 'auto'))
+        return _DECODER
+
+
+def get_http_cache():
+    """Return the ``hansei.http_cache.HTTPCache`` shared by all clients.
+
+    Returns None if the ``http-cache`` is not enabled in the config file.
+    """
+    global _HTTP_CACHE  # pylint:disable=global-statement
+    with _SESSION_LOCK:
+        if _HTTP_CACHE is _NOT_BUILT:
+            _HTTP_CACHE = HTTPCache.from_config(
+                config.get_config().get('koku', {}))
+        return _HTTP_CACHE
+
+
+def endpoint_template(url):
+    """Return the API endpoint of ``url`` with its uuids replaced by ``{uuid}``.
+
+    Example::
+        >>> endpoint_template('http://koku:8000/api/v1/customers/'
+        ...                   '0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1/')
+        'customers/{uuid}/'
+    """
+    path = urlparse(url).path
+    api_root = '/{}'.format(KOKU_API_VERSION)
+    if path.startswith(api_root):
+        path = path[len(api_root):]
+    return _UUID_RE.sub('{uuid}', path)
+
+
+def body_size(body):
+    """Return the size in bytes of a request body."""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    try:
+        return len(body)
+    except TypeError:
+        # Generators and file like objects are streamed
+        return 0
+
+
+def response_size(response):
+    """Return the size in bytes of a response body without consuming a stream."""
+    if response._content_consumed:  # pylint:disable=protected-access
+        return len(response.content or b'')
+    return int(response.headers.get('Content-Length', 0))
+
+
+def close_session():
+    """Close the shared session and all of its pooled connections.
+
+    A new session is built the next time a client needs one.
+    """
+    global _SESSION  # pylint:disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
+
+
 def raise_error_for_status(response):
     """Generate an error message and raise HTTPError for bad return codes.
 
@@ -41,8 +237,8 @@ def raise_error_for_status(response):
 
         try:
             response_message = 'json_error_message : {}'.format(
-                pformat(r.json()))
-        except JSONDecodeError:
+                pformat(decoder.decode_response(r, get_decoder())))
+        except ValueError:
             response_message = 'text_error_message : {}'.format(
                 pformat(r.text))
 
@@ -61,7 +257,59 @@ def raise_error_for_status(response):
         error_msgs += (
             '\n============================================================\n'
         )
-        raise HTTPError(error_msgs)
+        raise HTTPError(error_msgs, response=r)
+
+
+class BatchResult(namedtuple('BatchResult', ['result', 'error'])):
+    """Outcome of one item of a batch.
+
+    ``result`` holds the value returned for the item, or None if it raised.
+    ``error`` holds the exception raised for the item, or None.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """Returns True if the item did not raise an exception"""
+        return self.error is None
+
+
+def default_max_workers():
+    """Return the ``pool-maxsize`` of the ``koku`` config section.
+
+    Used as the default number of threads sending requests concurrently, so
+    that every thread can use a pooled connection.
+    """
+    return int(config.get_config().get('koku', {}).get(
+        'pool-maxsize', KOKU_DEFAULT_POOL_MAXSIZE))
+
+
+def map_concurrently(func, items, max_workers=None):
+    """Call ``func`` on each of ``items`` in a pool of threads.
+
+    An exception raised for one item is captured in its result and does not
+    stop the other items.
+
+    Arguments:
+        func - Callable taking a single item
+        items - Iterable of items
+        max_workers - Maximum number of threads. Defaults to the
+            ``pool-maxsize`` of the ``koku`` config section, so that every
+            thread can use a pooled connection
+
+    Returns: List of :class:`BatchResult` in the order of ``items``
+    """
+    if max_workers is None:
+        max_workers = default_max_workers()
+
+    def call(item):
+        try:
+            return BatchResult(func(item), None)
+        except Exception as error:  # pylint:disable=broad-except
+            return BatchResult(None, error)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, items))
 
 
 def echo_handler(response):
@@ -83,22 +331,27 @@ def json_handler(response):
     """Like ``code_handler``, but also return a JSON-decoded response body.
 
     Do what :func:`hansei.api.code_handler` does. In addition, decode the
-    response body as JSON and return the result.
+    response body as JSON with the decoder selected in the config file, see
+    :func:`get_decoder`, and return the result.
     """
     raise_error_for_status(response)
-    return response.json()
+    return decoder.decode_response(response, get_decoder())
 
 
 class Client(object):
     """A client for interacting with the koku API.
 
-    This class is a wrapper around the ``requests.api`` module provided by
-    `Requests`_. Each of the functions from that module are exposed as methods
-    here, and each of the arguments accepted by Requests' functions are also
+    This class is a wrapper around the ``requests.Session`` class provided by
+    `Requests`_. Each of the request functions are exposed as methods here,
+    and each of the arguments accepted by Requests' functions are also
     accepted by these methods. The difference between this class and the
     `Requests`_ functions lies in its configurable request and response
     handling mechanisms.
 
+    Requests are sent through a pooled, keep-alive session which is shared by
+    every client in the process (see :func:`get_session`), so the TCP and TLS
+    connections to the Koku server are reused across clients and models.
+
     All requests made via this client use the base URL of the Koku server
     provided in your ``$XDG_CONFIG_HOME/hansei/config.yaml``.
 
@@ -123,7 +376,8 @@ class Client(object):
 
     def __init__(
             self, response_handler=None, url=None,
-            authenticate=True, username=None, password=None):
+            authenticate=True, username=None, password=None, session=None,
+            lazy=False):
         """Initialize this object, collecting base URL from config file.
 
         If no response handler is specified, use the `code_handler` which will
@@ -149,33 +403,36 @@ class Client(object):
             authenticate - If True, login to the server during initialization
             username - Username used for server authentication
             password - Password used for server authentication
+            session - ``requests.Session`` used to send requests. Defaults to
+                the shared session returned by :func:`get_session`
+            lazy - If True, defer the login until the first request that needs
+                an authorization token
         """
         # Stores the response of the last request made.
         self._last_response = None
         self.url = url
         self.token = None
+        # Username the current token was issued for
+        self.username = None
+        # (username, password) used to log in again when the token is missing
+        # or has expired
+        self.credentials = None
+        # Whether the logins with self.credentials go through self.token_cache
+        self._use_token_cache = True
+        # Serializes the logins of threads sharing this client
+        self._login_lock = threading.RLock()
+        self.session = session if session is not None else get_session()
         cfg = config.get_config().get('koku', {})
         self.verify = cfg.get('ssl-verify', False)
+        self.token_cache = TokenCache.from_config(cfg)
+        self.retry_policy = RetryPolicy.from_config(cfg)
+        self.circuit_breaker = get_circuit_breaker()
+        self.metrics = metrics.get_registry()
+        self.decoder = get_decoder()
+        self.http_cache = get_http_cache()
 
         if not self.url:
-            hostname = cfg.get('hostname')
-
-            if not hostname:
-                raise exceptions.KokuBaseUrlNotFound(
-                    "\n'koku' section specified in hansei config file, but"
-                    "no 'hostname' key found."
-                )
-
-            scheme = 'https' if cfg.get('https', False) else 'http'
-            port = str(cfg.get('port', ''))
-            netloc = hostname + ':{}'.format(port) if port else hostname
-            self.url = urlunparse(
-                (scheme, netloc, KOKU_API_VERSION, '', '', ''))
-
-        if not self.url:
-            raise exceptions.KOKUBaseUrlNotFound(
-                'No base url was specified to the client either with the '
-                'url="host" option or with the hansei config file.')
+            self.url = build_url(cfg)
 
         if response_handler is None:
             self.response_handler = code_handler
@@ -183,30 +440,100 @@ class Client(object):
             self.response_handler = response_handler
 
         if authenticate:
-            self.login(username=username, password=password)
+            self.login(username=username, password=password, lazy=lazy)
+
+    @property
+    def identity(self):
+        """Return a hash identifying the user the client is authenticated as.
+
+        Data cached on behalf of a client is keyed by this value, so that it
+        is never served to a client logged in as another user. The identity
+        is the username the client is, or will lazily be, logged in as. The
+        token is used when the username is unknown. Returns None if the
+        client is not authenticated.
+        """
+        if self.token and self.username:
+            user = 'user {}'.format(self.username)
+        elif self.credentials:
+            user = 'user {}'.format(self.credentials[0])
+        elif self.token:
+            user = 'token {}'.format(self.token)
+        else:
+            return None
+        return hashlib.sha256(
+            '{} {}'.format(self.url, user).encode('utf-8')).hexdigest()
 
     @property
     def logged_in(self):
-        """Returns True if the client is currently logged in"""
-        return self.token is not None
+        """Returns True if the client is currently logged in
+
+        A client waiting to log in lazily on its next request is considered
+        logged in.
+        """
+        return self.token is not None or self.credentials is not None
 
-    def login(self, username, password):
+    def login(self, username, password, lazy=False, use_cache=True):
         """Login to the server to receive an authorization token.
 
+        If the token cache is enabled (see :mod:`hansei.token_cache`) a token
+        cached for ``username`` and ``password`` is reused instead of logging
+        in again, unless ``use_cache`` is False.
+
+        The credentials are kept by the client, unless the login request
+        fails. If a request is answered with a 401 because the token expired,
+        the client logs in again and resends the request once.
+
         Arguments:
             username - Username for initial server authentication
             password - Password for initial server authentication
+            lazy - If True, only store the credentials. The login request is
+                sent with the first request that needs an authorization token
+            use_cache - If False, neither read nor store the token in the
+                token cache, so that the server checks the credentials. Also
+                applies to the lazy login and the logins after a 401
+
+        Returns the response of the login request, or None if the token was
+        served from the token cache or the login was deferred.
         """
-        login_request = self.request(
-            'POST',
-            urljoin(self.url, KOKU_TOKEN_PATH),
-            json={
-                'username': username,
-                'password': password
-            }
-        )
-        self.token = login_request.json()['token']
-        return login_request
+        self.credentials = (username, password)
+        self._use_token_cache = use_cache
+        if lazy:
+            self.token = None
+            self.username = None
+            return None
+
+        login_requests = []
+
+        def request_token():
+            login_request = self.request(
+                'POST',
+                urljoin(self.url, KOKU_TOKEN_PATH),
+                json={
+                    'username': username,
+                    'password': password
+                }
+            )
+            login_requests.append(login_request)
+            return self.decode(login_request)['token']
+
+        with self._login_lock:
+            # Koku rejects a token-auth request carrying an invalid token, so
+            # the expired token must not be sent with the login request
+            self.token = None
+            self.username = None
+            try:
+                if self.token_cache and use_cache:
+                    self.token = self.token_cache.get_or_login(
+                        self.url, username, password, request_token)
+                else:
+                    self.token = request_token()
+            except Exception:
+                # Do not log in again with credentials the server rejected
+                self.credentials = None
+                raise
+            self.username = username
+
+        return login_requests[0] if login_requests else None
 
     def logout(self, **kwargs):
         """Start sending unauthorized requests.
@@ -215,6 +542,8 @@ class Client(object):
         current token invalid.
         """
         self.token = None
+        self.username = None
+        self.credentials = None
 
     def get_user(self, **kwargs):
         """Get the username of the user logged in.
@@ -232,6 +561,13 @@ class Client(object):
         url = urljoin(self.url, 'status/')
         return self.request('GET', url, **kwargs)
 
+    def decode(self, response):
+        """Return the JSON decoded body of ``response``.
+
+        The body is decoded with ``self.decoder``, see :mod:`hansei.decoder`.
+        """
+        return decoder.decode_response(response, self.decoder)
+
     def default_headers(self):
         """Build the headers for our request to the server."""
         if self.token:
@@ -273,6 +609,16 @@ class Client(object):
         url = urljoin(self.url, endpoint)
         return self.request('HEAD', url, **kwargs)
 
+    def patch(self, endpoint, payload, **kwargs):
+        """Send an HTTP PATCH request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+            payload - json data of the fields to update
+        """
+        url = urljoin(self.url, endpoint)
+        return self.request('PATCH', url, json=payload, **kwargs)
+
     def post(self, endpoint, payload, **kwargs):
         """Send an HTTP POST request.
         Arguments:
@@ -295,21 +641,161 @@ class Client(object):
     def request(self, method, url, **kwargs):
         """Send an HTTP request.
 
-        Arguments passed directly in to this method override (but do not
-        overwrite!) arguments specified in ``self.request_kwargs``.
+        Headers passed directly in to this method override (but do not
+        overwrite!) the headers returned by ``self.default_headers()``. The
+        request is sent through ``self.session`` so that its connection is
+        returned to the pool once the response has been read.
+
+        If the client holds credentials but no token yet (lazy login), it logs
+        in before sending the request. A 401 response is retried once after
+        logging in again.
+
+        Overloaded responses and connection errors are retried according to
+        ``self.retry_policy``, and requests to an endpoint that keeps failing
+        are rejected by ``self.circuit_breaker`` (see :mod:`hansei.retry`).
+
+        The method, endpoint, status, latency, sizes and retries of every
+        request are recorded in ``self.metrics`` (see :mod:`hansei.metrics`).
+
+        If the HTTP cache is enabled, GET responses are served from
+        ``self.http_cache`` or revalidated with a conditional request (see
+        :mod:`hansei.http_cache`). A successful POST, PUT, PATCH or DELETE
+        request drops the responses cached for its url and parent collection.
+
+        :raises: ``hansei.exceptions.KokuCircuitOpen`` if the circuit of the
+            endpoint is open.
         """
-        # The `self.request_kwargs` dict should *always* have a "url" argument.
-        # This is enforced by `self.__init__`. This allows us to call the
-        # `requests.request` function and satisfy its signature:
-        #
-        #     request(method, url, **kwargs)
-        #
+        is_login = url == urljoin(self.url, KOKU_TOKEN_PATH)
+        if not is_login and self.token is None and self.credentials:
+            with self._login_lock:
+                if self.token is None and self.credentials:
+                    self.login(
+                        *self.credentials, use_cache=self._use_token_cache)
+
+        token = self.token
+        response = self._send(method, url, **kwargs)
+
+        if response.status_code == 401 and not is_login and self.credentials:
+            # Release the connection of the rejected response to the pool, a
+            # streamed body is not read and would keep it checked out
+            response.close()
+            with self._login_lock:
+                # Another thread may have logged in again already
+                if self.token == token:
+                    if self.token_cache and self.username and self.credentials:
+                        # The cached token expired or was revoked on the server
+                        self.token_cache.invalidate(
+                            self.url, self.username, self.credentials[1], token)
+                    if self.credentials:
+                        self.login(
+                            *self.credentials, use_cache=self._use_token_cache)
+            response = self._send(method, url, **kwargs)
+
+        self._last_response = response
+        # Handle the local response, concurrent requests of a batch replace
+        # self._last_response
+        return self.response_handler(response)
+
+    def batch(self, calls, max_workers=None):
+        """Send many requests concurrently over the pooled connections.
+
+        Arguments:
+            calls - List of ``(method, endpoint, kwargs)`` tuples. ``kwargs``
+                are the arguments accepted by :meth:`request` and may be
+                omitted
+            max_workers - Maximum number of requests in flight. Defaults to
+                the ``pool-maxsize`` of the ``koku`` config section
+
+        Example::
+            >>> results = client.batch([
+            ...     ('GET', 'reports/costs/', {'params': {'filter[resolution]': 'daily'}}),
+            ...     ('DELETE', 'users/{}/'.format(user_uuid)),
+            ... ])
+            >>> [result.result.status_code for result in results if result.ok]
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of
+            ``calls``. ``result`` is the value returned by
+            ``self.response_handler`` and ``error`` the exception raised by
+            the request, if any.
+        """
+        def send(item):
+            method, endpoint = item[:2]
+            kwargs = item[2] if len(item) > 2 else {}
+            return self.request(method, urljoin(self.url, endpoint), **kwargs)
+
+        return map_concurrently(send, calls, max_workers=max_workers)
+
+    def _send(self, method, url, **kwargs):
+        """Send an HTTP request through the session, retrying it if needed."""
+        endpoint = endpoint_template(url)
+        self.circuit_breaker.check(endpoint)
+
         headers = self.default_headers()
+
+        cache_key = cached = None
+        if (self.http_cache is not None and method == 'GET' and
+                not kwargs.get('stream')):
+            cache_key = self.http_cache.key(
+                url, kwargs.get('params'), self.identity)
+            cached = self.http_cache.lookup(cache_key)
+            if cached is not None:
+                if self.http_cache.is_fresh(cached):
+                    return self.http_cache.serve(cached)
+                headers.update(self.http_cache.conditional_headers(cached))
+
         headers.update(kwargs.get('headers', {}))
-        kwargs['headers'] = headers
+        kwargs = dict(kwargs, headers=headers)
         kwargs.setdefault('verify', self.verify)
-        self._last_response = requests.request(method, url, **kwargs)
-        return self.response_handler(self._last_response)
+
+        attempt = 0
+        start = time.monotonic()
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not self.retry_policy.is_retryable(method, attempt):
+                    self.circuit_breaker.record_failure(endpoint)
+                    self.metrics.record(
+                        method, endpoint, None, time.monotonic() - start,
+                        retries=attempt)
+                    raise
+                response = None
+            else:
+                if not self.retry_policy.is_retryable(
+                        method, attempt, response):
+                    break
+
+            delay = self.retry_policy.backoff(attempt, response)
+            if response is not None:
+                # Release the connection of the discarded response to the pool,
+                # a streamed body is not read and would keep it checked out
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+        self.metrics.record(
+            method, endpoint, response.status_code, time.monotonic() - start,
+            request_bytes=body_size(response.request.body),
+            response_bytes=response_size(response),
+            retries=attempt)
+
+        if response.status_code in self.retry_policy.status_forcelist:
+            self.circuit_breaker.record_failure(endpoint)
+        else:
+            self.circuit_breaker.record_success(endpoint)
+
+        if (self.http_cache is not None and
+                method.upper() not in SAFE_METHODS and
+                response.status_code < 400):
+            self.http_cache.invalidate(url)
+
+        if cache_key is not None:
+            if response.status_code == 304 and cached is not None:
+                response = self.http_cache.revalidated(cache_key, cached)
+            elif response.status_code == 200:
+                self.http_cache.store(cache_key, response)
+
+        return response
 
     @property
     def last_response(self):
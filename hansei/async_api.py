@@ -0,0 +1,379 @@
+# coding=utf-8
+"""Asyncio client for working with KOKU's API.
+
+This module mirrors :mod:`hansei.api` for code that runs on an event loop. A
+single process can keep a large number of requests in flight against the
+koku server without spawning a thread per request.
+
+The response handlers from :mod:`hansei.api` (``code_handler``,
+``json_handler`` and ``echo_handler``) are used unchanged: every response is
+read completely and converted into a ``requests.models.Response`` before it is
+handed to the handler.
+
+"""
+import asyncio
+import ssl
+import time
+from urllib.parse import urljoin
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from yarl import URL
+
+from hansei import api
+from hansei import config
+from hansei import decoder
+from hansei import metrics
+from hansei.constants import (
+    KOKU_DEFAULT_MAX_CONCURRENCY,
+    KOKU_TOKEN_PATH,
+)
+
+
+def build_response(prepared, status, reason, headers, content, url):
+    """Return a ``requests.models.Response`` built from an aiohttp response.
+
+    Arguments:
+        prepared - ``requests.PreparedRequest`` that was sent to the server
+        status - HTTP status code of the response
+        reason - HTTP reason phrase of the response
+        headers - Response headers
+        content - Raw bytes of the response body
+        url - Final url of the response
+    """
+    response = requests.models.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = url
+    response.request = prepared
+    response._content = content  # pylint:disable=protected-access
+    return response
+
+
+def ssl_option(verify=None, cert=None):
+    """Return the aiohttp ``ssl`` argument matching Requests' ``verify`` and ``cert``.
+
+    Arguments:
+        verify - False to skip the certificate verification, True to verify it
+            or the path of a CA bundle to verify it with
+        cert - Path of a client certificate, or ``(certificate, key)`` tuple of
+            paths
+
+    Returns: None to use the default of the session, False or an
+        ``ssl.SSLContext``
+    """
+    if cert is None:
+        if verify is None:
+            return None
+        if verify is False:
+            return False
+        if verify is True:
+            return ssl.create_default_context()
+
+    context = ssl.create_default_context(
+        cafile=verify if isinstance(verify, str) else None)
+    if verify is False:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if cert is not None:
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        else:
+            context.load_cert_chain(*cert)
+    return context
+
+
+def client_timeout(timeout=None):
+    """Return the ``aiohttp.ClientTimeout`` matching Requests' ``timeout``.
+
+    Arguments:
+        timeout - Seconds to wait for the connection and for each read, a
+            ``(connect, read)`` tuple of seconds, or None to wait forever
+    """
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    return aiohttp.ClientTimeout(
+        total=None, sock_connect=connect, sock_read=read)
+
+
+class AsyncClient(object):
+    """An asyncio client for interacting with the koku API.
+
+    This class exposes the same methods as :class:`hansei.api.Client`, but
+    each of them is a coroutine. Arguments are the ones accepted by Requests'
+    functions (``params``, ``json``, ``data``, ``headers``...), they are used
+    to prepare the request which is then sent using `aiohttp`_.
+
+    The number of requests in flight is capped by ``max_concurrency``. Extra
+    requests wait on the event loop until a slot is released.
+
+    Example::
+        >>> import asyncio
+        >>> from hansei.async_api import AsyncClient
+        >>>
+        >>> async def main():
+        ...     async with AsyncClient(username='admin', password='pass') as client:
+        ...         responses = await asyncio.gather(
+        ...             *[client.get('reports/costs/') for _ in range(500)])
+        >>>
+        >>> asyncio.get_event_loop().run_until_complete(main())
+
+    .. _aiohttp: https://docs.aiohttp.org/
+    """
+
+    def __init__(
+            self, response_handler=None, url=None,
+            authenticate=True, username=None, password=None,
+            max_concurrency=None):
+        """Initialize this object, collecting base URL from config file.
+
+        If no response handler is specified, use the `code_handler` which will
+        raise an exception for 'bad' return codes.
+
+        The base URL is built the same way as for :class:`hansei.api.Client`.
+        The concurrency ceiling can be configured in the hansei configuration
+        file::
+
+            koku:
+                max-concurrency: 100
+
+        Arguments:
+            response_handler - Customer handler wrapper for formatting response
+            url - Url for the Koku server. Default is localhost (127.0.0.1)
+            authenticate - If True, login to the server when entering the
+                ``async with`` block
+            username - Username used for server authentication
+            password - Password used for server authentication
+            max_concurrency - Maximum number of requests in flight at once
+        """
+        # Stores the response of the last request made.
+        self._last_response = None
+        self.token = None
+        cfg = config.get_config().get('koku', {})
+        self.url = url or api.build_url(cfg)
+        self.verify = cfg.get('ssl-verify', False)
+        self.max_concurrency = int(max_concurrency or cfg.get(
+            'max-concurrency', KOKU_DEFAULT_MAX_CONCURRENCY))
+        self.metrics = metrics.get_registry()
+        self.decoder = api.get_decoder()
+
+        if response_handler is None:
+            self.response_handler = api.code_handler
+        else:
+            self.response_handler = response_handler
+
+        self._authenticate = authenticate
+        self._username = username
+        self._password = password
+
+        # The aiohttp session and the semaphore are bound to the running loop,
+        # so they are only built when the first request is sent.
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        if self._authenticate:
+            await self.login(username=self._username, password=self._password)
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.close()
+
+    @property
+    def session(self):
+        """Return the ``aiohttp.ClientSession`` used to send requests."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                ssl=ssl_option(self.verify))
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar())
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """Close the session and all of its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def logged_in(self):
+        """Returns True if the client is currently logged in"""
+        return self.token is not None
+
+    async def login(self, username, password):
+        """Login to the server to receive an authorization token.
+
+        Arguments:
+            username - Username for initial server authentication
+            password - Password for initial server authentication
+        """
+        login_request = await self.request(
+            'POST',
+            urljoin(self.url, KOKU_TOKEN_PATH),
+            json={
+                'username': username,
+                'password': password
+            }
+        )
+        self.token = self.decode(login_request)['token']
+        return login_request
+
+    def logout(self, **kwargs):
+        """Start sending unauthorized requests."""
+        self.token = None
+
+    async def get_user(self, **kwargs):
+        """Get the username of the user logged in.
+
+        Send a GET request ot /api/v1/users/current/' and return the response.
+        """
+        url = urljoin(self.url, 'users/current/')
+        return await self.request('GET', url, **kwargs)
+
+    async def server_status(self, **kwargs):
+        """Get the Koku server status
+
+        Send a GET request to /api/v1/status
+        """
+        url = urljoin(self.url, 'status/')
+        return await self.request('GET', url, **kwargs)
+
+    def decode(self, response):
+        """Return the JSON decoded body of ``response``.
+
+        The body is decoded with ``self.decoder``, see :mod:`hansei.decoder`.
+        """
+        return decoder.decode_response(response, self.decoder)
+
+    def default_headers(self):
+        """Build the headers for our request to the server."""
+        if self.token:
+            return {'Authorization': 'Token {}'.format(self.token)}
+        return {}
+
+    async def delete(self, endpoint, **kwargs):
+        """Send an HTTP DELETE request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('DELETE', url, **kwargs)
+
+    async def get(self, endpoint, **kwargs):
+        """Send an HTTP GET request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('GET', url, **kwargs)
+
+    async def options(self, endpoint, **kwargs):
+        """Send an HTTP OPTIONS request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('OPTIONS', url, **kwargs)
+
+    async def head(self, endpoint, **kwargs):
+        """Send an HTTP HEAD request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('HEAD', url, **kwargs)
+
+    async def patch(self, endpoint, payload, **kwargs):
+        """Send an HTTP PATCH request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+            payload - json data of the fields to update
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('PATCH', url, json=payload, **kwargs)
+
+    async def post(self, endpoint, payload, **kwargs):
+        """Send an HTTP POST request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+            payload - json data to include in the request
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('POST', url, json=payload, **kwargs)
+
+    async def put(self, endpoint, payload, **kwargs):
+        """Send an HTTP PUT request.
+
+        Arguments:
+            endpoint - API endpoint to send request
+            payload - json data to include in the request
+        """
+        url = urljoin(self.url, endpoint)
+        return await self.request('PUT', url, json=payload, **kwargs)
+
+    async def request(self, method, url, **kwargs):
+        """Send an HTTP request.
+
+        The request is prepared by Requests so that ``params``, ``json``,
+        ``data`` and ``headers`` behave exactly as they do with
+        :class:`hansei.api.Client`. Headers passed directly in to this method
+        override the ones returned by ``self.default_headers()``.
+
+        The ``timeout``, ``verify``, ``cert`` and ``allow_redirects`` arguments
+        of Requests are translated for aiohttp. ``stream`` is accepted but the
+        body is always read completely.
+        """
+        headers = self.default_headers()
+        headers.update(kwargs.pop('headers', {}))
+        timeout = kwargs.pop('timeout', None)
+        ssl_arg = ssl_option(kwargs.pop('verify', None), kwargs.pop('cert', None))
+        allow_redirects = kwargs.pop('allow_redirects', True)
+        kwargs.pop('stream', None)
+        prepared = requests.Request(
+            method, url, headers=headers, **kwargs).prepare()
+
+        options = {}
+        if ssl_arg is not None:
+            options['ssl'] = ssl_arg
+
+        session = self.session
+        async with self._semaphore:
+            start = time.monotonic()
+            async with session.request(
+                    prepared.method,
+                    URL(prepared.url, encoded=True),
+                    headers=prepared.headers,
+                    data=prepared.body,
+                    allow_redirects=allow_redirects,
+                    timeout=client_timeout(timeout),
+                    **options) as resp:
+                content = await resp.read()
+            latency = time.monotonic() - start
+
+        self.metrics.record(
+            prepared.method, api.endpoint_template(prepared.url), resp.status,
+            latency, request_bytes=api.body_size(prepared.body),
+            response_bytes=len(content))
+        self._last_response = build_response(
+            prepared, resp.status, resp.reason, resp.headers, content,
+            str(resp.url))
+        return self.response_handler(self._last_response)
+
+    @property
+    def last_response(self):
+        return self._last_response
@@ -0,0 +1,199 @@
+# coding=utf-8
+"""In-memory caches shared by the hansei clients and models."""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from hansei.constants import KOKU_DEFAULT_CACHE_MAX_BYTES
+
+
+class LRUCache(object):
+    """A thread safe least recently used cache bounded by size in bytes.
+
+    Every entry is stored with its size, as estimated by the caller. When the
+    total size goes over ``max_bytes`` the least recently used entries are
+    evicted. Entries older than ``ttl`` seconds are discarded on lookup.
+
+    The number of hits and misses of :meth:`get` are counted in ``hits`` and
+    ``misses``.
+    """
+
+    def __init__(self, max_bytes=KOKU_DEFAULT_CACHE_MAX_BYTES, ttl=None):
+        """
+        Arguments:
+            max_bytes - Maximum total size of the cached entries
+            ttl - Seconds an entry is kept, or None to keep entries until
+                they are evicted
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def bytes(self):
+        """Total size of the cached entries"""
+        return self._bytes
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def get(self, key, default=None):
+        """Return the value cached for ``key`` and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[2]):
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size):
+        """Cache ``value`` for ``key``, evicting old entries to make room.
+
+        Values larger than ``max_bytes`` are not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key, default=None):
+        """Remove ``key`` from the cache and return its value."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def pop_matching(self, predicate):
+        """Remove the entries whose key matches ``predicate``.
+
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def _remove(self, key):
+        value, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        return value
+
+    def clear(self):
+        """Remove every entry and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class IdentityMap(object):
+    """A thread safe map of the model objects loaded from the server.
+
+    Objects are keyed by their model class, uuid and the identity of the client
+    that loaded them, see ``hansei.api.Client.identity``, so an object is never
+    served to another user. Objects are only weakly referenced: an object no
+    longer used anywhere else leaves the map. Objects loaded more than ``ttl``
+    seconds ago are discarded on lookup.
+    """
+
+    def __init__(self, ttl=None):
+        """
+        Arguments:
+            ttl - Seconds an object is served from the map, or None to serve it
+                until it is invalidated
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._objects = weakref.WeakValueDictionary()
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    @staticmethod
+    def key(model_class, uuid, identity):
+        """Return the key of an object"""
+        return (model_class, str(uuid), identity)
+
+    def get(self, key):
+        """Return the object stored for ``key``, or None if it is missing or stale."""
+        with self._lock:
+            obj = self._objects.get(key)
+            loaded_at = self._loaded_at.get(key)
+            if obj is not None and self.ttl is not None and \
+                    time.monotonic() - loaded_at > self.ttl:
+                self._remove(key)
+                obj = None
+
+            if obj is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return obj
+
+    def loaded_at(self, key):
+        """Return the ``time.monotonic()`` time the object of ``key`` was loaded at."""
+        return self._loaded_at.get(key)
+
+    def set(self, key, obj, loaded_at=None):
+        """Store ``obj`` for ``key``.
+
+        Arguments:
+            loaded_at - ``time.monotonic()`` time the object was loaded from the
+                server. Defaults to now
+        """
+        with self._lock:
+            self._objects[key] = obj
+            self._loaded_at[key] = time.monotonic() if loaded_at is None else loaded_at
+            # Forget the load times of the objects which were garbage collected
+            if len(self._loaded_at) > 2 * len(self._objects) + 64:
+                for stale_key in set(self._loaded_at) - set(self._objects.keys()):
+                    del self._loaded_at[stale_key]
+
+    def invalidate(self, model_class, uuid):
+        """Remove the object of ``uuid`` stored for any identity."""
+        with self._lock:
+            for key in [key for key in self._loaded_at
+                        if key[0] is model_class and key[1] == str(uuid)]:
+                self._remove(key)
+
+    def _remove(self, key):
+        self._objects.pop(key, None)
+        self._loaded_at.pop(key, None)
+
+    def clear(self):
+        """Remove every object and reset the hit and miss counters."""
+        with self._lock:
+            self._objects.clear()
+            self._loaded_at.clear()
+            self.hits = 0
+            self.misses = 0
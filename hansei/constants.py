@@ -9,6 +9,36 @@ KOKU_DEFAULT_USER = 'admin'
 #Koku Default password for the service admin
 KOKU_DEFAULT_PASSWORD = 'pass'
 
+#Number of per-host connection pools kept by the shared HTTP session
+KOKU_DEFAULT_POOL_CONNECTIONS = 10
+
+#Number of keep-alive connections kept in each per-host pool
+KOKU_DEFAULT_POOL_MAXSIZE = 10
+
+#Maximum number of requests in flight at once for the asyncio client
+KOKU_DEFAULT_MAX_CONCURRENCY = 100
+
+#Number of items requested per page when iterating over list endpoints
+KOKU_DEFAULT_PAGE_SIZE = 100
+
+#Number of seconds a token is served from the on-disk token cache
+KOKU_DEFAULT_TOKEN_TTL = 3600
+
+#Maximum total size in bytes of the entries of an in-memory cache
+KOKU_DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+#Number of seconds a cached response without validators is considered fresh
+KOKU_DEFAULT_CACHE_TTL = 60
+
+#Number of seconds a parsed report is reused by the report cache
+KOKU_DEFAULT_REPORT_CACHE_TTL = 600
+
+#Number of bytes read at a time from streamed report responses
+KOKU_DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+#Number of seconds an object is served from the identity map of the models
+KOKU_DEFAULT_IDENTITY_MAP_TTL = 30
+
 #The root path to access the KOKU server API.
 KOKU_API_VERSION = 'api/v1/'
 
@@ -0,0 +1,64 @@
+# coding=utf-8
+"""JSON decoding of Koku responses.
+
+Report responses grouped by account and service over long ranges are several
+megabytes of JSON, and decoding them with the standard library dominates the
+client CPU time. This module selects the fastest decoder installed and is used
+by :class:`hansei.api.Client` for every response body.
+
+The decoder can be chosen in the hansei config file::
+
+    koku:
+        json-decoder: auto  # auto, orjson or json. auto picks orjson when
+                            # it is installed and falls back to json
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from hansei import exceptions
+
+
+DECODERS = {'json': json.loads}
+"""Available decoders keyed by name. Each one takes ``bytes`` or ``str``."""
+
+if orjson is not None:
+    DECODERS['orjson'] = orjson.loads
+
+
+def get_decoder(name='auto'):
+    """Return the ``loads`` function of the decoder named ``name``.
+
+    Arguments:
+        name - ``auto`` to use orjson when installed and json otherwise, or the
+            name of one of the :data:`DECODERS`
+
+    :raises: ``hansei.exceptions.KokuException`` if the decoder is not
+        available.
+    """
+    if name in (None, 'auto'):
+        return DECODERS.get('orjson', json.loads)
+
+    try:
+        return DECODERS[name]
+    except KeyError:
+        raise exceptions.KokuException(
+            'JSON decoder {!r} is not available. Available decoders are: '
+            '{}'.format(name, ', '.join(sorted(DECODERS))))
+
+
+def decode_response(response, loads=None):
+    """Decode the JSON body of ``response``.
+
+    Arguments:
+        response - ``requests.models.Response`` with a JSON body
+        loads - Decoder function. Defaults to ``get_decoder()``
+
+    :raises: ``ValueError`` (``json.JSONDecodeError`` for both decoders) if
+        the body is not valid JSON.
+    """
+    loads = loads or get_decoder()
+    return loads(response.content)
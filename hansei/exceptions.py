@@ -1,5 +1,6 @@
 # coding=utf-8
 """Custom exceptions defined by Hansei."""
+from requests.exceptions import RequestException
 
 
 class KokuException(Exception):
@@ -24,3 +25,12 @@ class KokuBaseUrlNotFound(KokuException):
     """
 
 
+class KokuCircuitOpen(KokuException, RequestException):
+    """Requests to a Koku endpoint are rejected because it keeps failing.
+
+    It is a ``requests.exceptions.RequestException``, like the errors raised
+    when the request is sent.
+
+    See :class:`hansei.retry.CircuitBreaker` for more information on when a
+    circuit opens and closes again.
+    """
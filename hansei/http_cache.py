@@ -0,0 +1,148 @@
+# coding=utf-8
+"""Conditional GET cache for the responses of the Koku API.
+
+The report tests send the same GET requests over and over. When the cache is
+enabled, :class:`hansei.api.Client` keeps the responses of successful GET
+requests and:
+
+* revalidates them with ``If-None-Match`` / ``If-Modified-Since`` when the
+  server sent an ``ETag`` or ``Last-Modified`` header, reusing the cached
+  response on a ``304 Not Modified``,
+* serves them without any request for ``ttl`` seconds otherwise.
+
+Once a POST, PUT, PATCH or DELETE request succeeds, the responses cached for
+its url and for the parent collection of the url are dropped, so a customer,
+user or provider is never read back from the cache after it changed.
+
+Responses are keyed by url, query parameters and the identity of the
+authenticated user, so a response is never served to another tenant.
+
+The cache is configured in the hansei config file::
+
+    koku:
+        http-cache:
+            enabled: true
+            max-bytes: 67108864  # LRU eviction above this total body size
+            ttl: 60              # freshness of responses without validators
+"""
+import copy
+import time
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from hansei.cache import LRUCache
+from hansei.constants import (
+    KOKU_DEFAULT_CACHE_MAX_BYTES,
+    KOKU_DEFAULT_CACHE_TTL,
+)
+
+
+#Methods which do not change the resources of the server
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+CachedResponse = namedtuple('CachedResponse', ['response', 'stored_at'])
+
+
+def canonical_url(url, params=None):
+    """Return ``url`` with ``params`` merged in and the query sorted."""
+    prepared_url = requests.Request('GET', url, params=params).prepare().url
+    scheme, netloc, path, query, fragment = urlsplit(prepared_url)
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+class HTTPCache(object):
+    """Cache of GET responses with conditional revalidation."""
+
+    def __init__(self, max_bytes=KOKU_DEFAULT_CACHE_MAX_BYTES,
+                 ttl=KOKU_DEFAULT_CACHE_TTL):
+        """
+        Arguments:
+            max_bytes - Maximum total size of the cached response bodies
+            ttl - Seconds a response without validators is served from cache
+        """
+        self.ttl = ttl
+        self.responses = LRUCache(max_bytes=max_bytes)
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Return a cache configured from the ``http-cache`` key of the ``koku`` config section.
+
+        Returns None if the cache is not enabled.
+        """
+        cache_cfg = cfg.get('http-cache', {})
+        if not cache_cfg.get('enabled', False):
+            return None
+        return cls(
+            max_bytes=int(cache_cfg.get(
+                'max-bytes', KOKU_DEFAULT_CACHE_MAX_BYTES)),
+            ttl=float(cache_cfg.get('ttl', KOKU_DEFAULT_CACHE_TTL)))
+
+    @staticmethod
+    def key(url, params, identity):
+        """Return the cache key of a GET request.
+
+        Arguments:
+            url - Url of the request
+            params - Query parameters of the request
+            identity - Identity of the authenticated user, see
+                ``hansei.api.Client.identity``
+        """
+        return (canonical_url(url, params), identity)
+
+    @staticmethod
+    def has_validators(response):
+        return 'ETag' in response.headers or 'Last-Modified' in response.headers
+
+    def lookup(self, key):
+        """Return the :class:`CachedResponse` stored for ``key``, or None."""
+        return self.responses.get(key)
+
+    def is_fresh(self, cached):
+        """Return True if ``cached`` can be served without asking the server."""
+        return (not self.has_validators(cached.response) and
+                time.monotonic() - cached.stored_at <= self.ttl)
+
+    @staticmethod
+    def conditional_headers(cached):
+        """Return the headers revalidating ``cached`` with the server."""
+        headers = {}
+        if 'ETag' in cached.response.headers:
+            headers['If-None-Match'] = cached.response.headers['ETag']
+        if 'Last-Modified' in cached.response.headers:
+            headers['If-Modified-Since'] = cached.response.headers['Last-Modified']
+        return headers
+
+    def store(self, key, response):
+        """Cache a successful response."""
+        self.responses.set(
+            key, CachedResponse(response, time.monotonic()),
+            len(response.content))
+
+    def revalidated(self, key, cached):
+        """Return a copy of ``cached`` after the server answered 304."""
+        self.store(key, cached.response)
+        return copy.copy(cached.response)
+
+    def serve(self, cached):
+        """Return a copy of the cached response."""
+        return copy.copy(cached.response)
+
+    def invalidate(self, url):
+        """Remove the responses cached for ``url`` and its parent collection.
+
+        The responses cached for every query parameters and identity are
+        removed. For instance, invalidating ``customers/{uuid}/`` drops the
+        cached ``customers/{uuid}/`` and ``customers/`` responses.
+        """
+        scheme, netloc, path = urlsplit(canonical_url(url))[:3]
+        parent = path.rstrip('/').rsplit('/', 1)[0] + '/'
+        stale = {(scheme, netloc, path), (scheme, netloc, parent)}
+        self.responses.pop_matching(
+            lambda key: tuple(urlsplit(key[0])[:3]) in stale)
+
+    def clear(self):
+        """Remove every cached response."""
+        self.responses.clear()
@@ -0,0 +1,247 @@
+# coding=utf-8
+"""Incremental parsing of JSON documents received in chunks.
+
+Large reports are parsed while they are downloaded instead of being decoded in
+one go, so only the line item being parsed is held in memory rather than the
+whole body and its decoded tree.
+
+The parser emits the events of ``ijson.basic_parse``: ``start_map``,
+``map_key``, ``end_map``, ``start_array``, ``end_array``, ``string``,
+``number``, ``boolean`` and ``null``. ijson is used when it is installed,
+otherwise a pure Python tokenizer is used.
+"""
+import codecs
+import json
+import re
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+
+_NUMBER_RE = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_NUMBER_CHARS_RE = re.compile(r'[-+.eE0-9]*')
+_WHITESPACE = ' \t\n\r'
+_LITERALS = (('true', 'boolean', True), ('false', 'boolean', False), ('null', 'null', None))
+_START_EVENTS = ('start_map', 'start_array')
+_END_EVENTS = ('end_map', 'end_array')
+
+
+def basic_parse(chunks):
+    """Yield the ``(event, value)`` pairs of the JSON document split in ``chunks``.
+
+    Numbers are returned as ``int`` or ``float``, as ``json.loads`` does.
+
+    Arguments:
+        chunks - Iterable of ``bytes``, e.g. ``response.iter_content(chunk_size)``
+
+    :raises: ValueError if the document is not valid JSON
+    """
+    if ijson is not None:
+        return ijson.basic_parse(_ChunkReader(chunks), use_float=True)
+    return _basic_parse(chunks)
+
+
+class _ChunkReader(object):
+    """File like object reading from an iterable of bytes, as ijson expects."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def read(self, size=-1):
+        # ijson reads 0 bytes to tell binary files from text files
+        if not size:
+            return b''
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+
+def _basic_parse(chunks):  # pylint:disable=too-many-branches,too-many-statements
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+    # 'map' or 'array' for each container being parsed
+    containers = []
+    # Next token expected: 'value', 'key', 'colon', 'comma' (or the end of the container),
+    # 'first_value' and 'first_key' (or the end of the empty container) and 'done' once the
+    # document is complete
+    expect = 'value'
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+
+        token = None
+        if pos < len(buf):
+            char = buf[pos]
+            if char == '"':
+                if expect not in ('value', 'first_value', 'key', 'first_key'):
+                    raise ValueError('Unexpected string at character {}'.format(pos))
+                try:
+                    value, end = json.decoder.scanstring(buf, pos + 1)
+                except ValueError:
+                    if eof:
+                        raise
+                else:
+                    if expect in ('key', 'first_key'):
+                        token = ('map_key', value)
+                        expect = 'colon'
+                    else:
+                        token = ('string', value)
+                        expect = 'comma' if containers else 'done'
+                    pos = end
+            elif char in '-0123456789':
+                if expect not in ('value', 'first_value'):
+                    raise ValueError('Unexpected number at character {}'.format(pos))
+                end = _NUMBER_CHARS_RE.match(buf, pos).end()
+                # A number running to the end of the buffer may go on in the next chunk
+                if end < len(buf) or eof:
+                    match = _NUMBER_RE.fullmatch(buf, pos, end)
+                    if not match:
+                        raise ValueError('Invalid number at character {}'.format(pos))
+                    text = match.group()
+                    value = float(text) if match.group(1) or match.group(2) else int(text)
+                    token = ('number', value)
+                    expect = 'comma' if containers else 'done'
+                    pos = end
+            elif char in 'tfn':
+                if expect not in ('value', 'first_value'):
+                    raise ValueError('Unexpected literal at character {}'.format(pos))
+                for literal, event, value in _LITERALS:
+                    if buf.startswith(literal, pos):
+                        token = (event, value)
+                        expect = 'comma' if containers else 'done'
+                        pos += len(literal)
+                        break
+                else:
+                    if eof or not any(
+                            literal.startswith(buf[pos:]) for literal, _, _ in _LITERALS):
+                        raise ValueError('Invalid literal at character {}'.format(pos))
+            elif char in '{[':
+                if expect not in ('value', 'first_value'):
+                    raise ValueError('Unexpected {!r} at character {}'.format(char, pos))
+                if char == '{':
+                    containers.append('map')
+                    expect = 'first_key'
+                    token = ('start_map', None)
+                else:
+                    containers.append('array')
+                    expect = 'first_value'
+                    token = ('start_array', None)
+                pos += 1
+            elif char in '}]':
+                container = 'map' if char == '}' else 'array'
+                if (expect not in ('comma', 'first_' + ('key' if char == '}' else 'value')) or
+                        not containers or containers.pop() != container):
+                    raise ValueError('Unexpected {!r} at character {}'.format(char, pos))
+                expect = 'comma' if containers else 'done'
+                token = ('end_map' if char == '}' else 'end_array', None)
+                pos += 1
+            elif char == ',' and expect == 'comma':
+                expect = 'key' if containers[-1] == 'map' else 'value'
+                pos += 1
+                continue
+            elif char == ':' and expect == 'colon':
+                expect = 'value'
+                pos += 1
+                continue
+            else:
+                raise ValueError('Unexpected {!r} at character {}'.format(char, pos))
+
+        if token is not None:
+            yield token
+            continue
+
+        if eof:
+            if expect != 'done':
+                raise ValueError('Truncated JSON document')
+            return
+
+        # Keep the incomplete token, if any, and read the next chunk
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf = buf[pos:] + decoder.decode(b'', final=True)
+        else:
+            buf = buf[pos:] + decoder.decode(chunk)
+        pos = 0
+
+
+def build_value(event, value, events):
+    """Return the value starting with ``(event, value)``, reading the rest of it from ``events``.
+
+    Arguments:
+        event, value - First event of the value
+        events - Iterator of the following ``(event, value)`` pairs
+    """
+    if event not in _START_EVENTS:
+        return value
+
+    root = {} if event == 'start_map' else []
+    stack = [root]
+    keys = [None]
+    for event, value in events:
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event in _END_EVENTS:
+            stack.pop()
+            keys.pop()
+            if not stack:
+                return root
+            continue
+
+        if event == 'start_map':
+            value = {}
+        elif event == 'start_array':
+            value = []
+
+        parent = stack[-1]
+        if type(parent) is list:
+            parent.append(value)
+        else:
+            parent[keys[-1]] = value
+
+        if event in _START_EVENTS:
+            stack.append(value)
+            keys.append(None)
+
+    raise ValueError('Truncated JSON document')
+
+
+def iter_report_line_items(events, report):
+    """Yield the line items of a Koku report while it is parsed.
+
+    The line items are the entries of the ``values`` lists found under ``data``. Each one is
+    built and yielded as soon as it is parsed. The other top level fields of the report
+    (``total``, ``filter``, ``group_by``, ``order_by``...) are stored in ``report``.
+
+    Arguments:
+        events - Iterable of ``(event, value)`` pairs, see :func:`basic_parse`
+        report - Dictionary receiving the top level fields of the report except ``data``
+    """
+    events = iter(events)
+    # Number of containers being walked
+    depth = 0
+    for event, value in events:
+        if event == 'map_key':
+            if depth == 1 and value != 'data':
+                report[value] = build_value(*next(events), events)
+            elif depth > 1 and value == 'values':
+                event, value = next(events)
+                if event != 'start_array':
+                    build_value(event, value, events)
+                    continue
+                for event, value in events:
+                    if event == 'end_array':
+                        break
+                    yield build_value(event, value, events)
+        elif event in _START_EVENTS:
+            depth += 1
+        elif event in _END_EVENTS:
+            depth -= 1
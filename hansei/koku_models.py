@@ -1,15 +1,30 @@
 # coding: utf-8
 """Models for use with the Koku API."""
 
-import decimal
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pformat
 from urllib.parse import urljoin
 
-from hansei import api, config
+from requests.exceptions import HTTPError
+
+from hansei import api, config, json_stream
+from hansei.aggregate import aggregate
+from hansei.cache import IdentityMap, LRUCache
 from hansei.exceptions import KokuException
+from hansei.report_columns import NUMERIC_COLUMNS, TEXT_COLUMNS, ReportColumns
+from hansei.report_index import LineItemIndex
+from hansei.rollup import check_source, last_date, rollup
+from hansei.snapshot import Snapshot, write_snapshot
 from hansei.constants import (
     KOKU_DEFAULT_USER,
     KOKU_DEFAULT_PASSWORD,
+    KOKU_DEFAULT_PAGE_SIZE,
+    KOKU_DEFAULT_CACHE_MAX_BYTES,
+    KOKU_DEFAULT_IDENTITY_MAP_TTL,
+    KOKU_DEFAULT_REPORT_CACHE_TTL,
+    KOKU_DEFAULT_STREAM_CHUNK_SIZE,
     KOKU_CUSTOMER_PATH,
     KOKU_USER_PATH,
     KOKU_PROVIDER_PATH,
@@ -19,6 +34,170 @@ from hansei.constants import (
 )
 
 
+# `get_report_cache` uses this as a cache of the parsed reports, shared by every
+# report object of the process.
+_NOT_BUILT = object()
+_REPORT_CACHE = _NOT_BUILT
+# Guards the creation of the process wide caches
+_CACHE_LOCK = threading.Lock()
+
+
+def get_report_cache():
+    """Return the ``hansei.cache.LRUCache`` of parsed reports shared by all report objects.
+
+    The cache is configured in the ``koku`` section of the hansei config file::
+
+        koku:
+            report-cache:
+                enabled: true
+                max-bytes: 134217728  # evicts the least recently used reports
+                                      # when their JSON size goes above it
+                ttl: 600              # seconds a report is reused
+
+    The ``hits`` and ``misses`` attributes of the cache count the report requests it saved and
+    the ones it could not serve.
+
+    Returns None if the cache is not enabled.
+    """
+    global _REPORT_CACHE  # pylint:disable=global-statement
+    with _CACHE_LOCK:
+        if _REPORT_CACHE is _NOT_BUILT:
+            cache_cfg = config.get_config().get('koku', {}).get('report-cache', {})
+            _REPORT_CACHE = None
+            if cache_cfg.get('enabled', False):
+                _REPORT_CACHE = LRUCache(
+                    max_bytes=int(cache_cfg.get('max-bytes', KOKU_DEFAULT_CACHE_MAX_BYTES)),
+                    ttl=float(cache_cfg.get('ttl', KOKU_DEFAULT_REPORT_CACHE_TTL)))
+        return _REPORT_CACHE
+
+
+# `get_identity_map` uses this as the map of the model objects loaded by every client of the
+# process.
+_IDENTITY_MAP = _NOT_BUILT
+
+
+def get_identity_map():
+    """Return the ``hansei.cache.IdentityMap`` of the customers, users and providers loaded from
+    the server.
+
+    When it is enabled, ``read_customer``, ``read_user`` and ``read_provider`` return the object
+    of the uuid loaded by an earlier read or list call of the same user, without sending a
+    request, unless it was loaded more than ``ttl`` seconds ago. Updating or deleting an object
+    removes it from the map.
+
+    The map is configured in the ``koku`` section of the hansei config file::
+
+        koku:
+            identity-map:
+                enabled: true
+                ttl: 30  # seconds an object is served from the map
+
+    Returns None if the map is not enabled.
+    """
+    global _IDENTITY_MAP  # pylint:disable=global-statement
+    with _CACHE_LOCK:
+        if _IDENTITY_MAP is _NOT_BUILT:
+            map_cfg = config.get_config().get('koku', {}).get('identity-map', {})
+            _IDENTITY_MAP = None
+            if map_cfg.get('enabled', False):
+                _IDENTITY_MAP = IdentityMap(
+                    ttl=float(map_cfg.get('ttl', KOKU_DEFAULT_IDENTITY_MAP_TTL)))
+        return _IDENTITY_MAP
+
+
+def _read_model(model_class, uuid, client):
+    """Return the ``model_class`` object of ``uuid``, from the identity map if possible.
+
+    Arguments:
+        model_class - ``KokuObject`` subclass of the object
+        uuid - Koku uuid of the object
+        client - ``hansei.api.Client`` reading the object
+    """
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        key = identity_map.key(model_class, uuid, client.identity)
+        cached = identity_map.get(key)
+        if isinstance(cached, model_class):
+            return cached
+        if cached is not None:
+            # A row of a list call, build the model from it
+            model = model_class(uuid=uuid)
+            model.load(cached.payload())
+            identity_map.set(key, model, loaded_at=identity_map.loaded_at(key))
+            return model
+
+    model = model_class(uuid=uuid)
+    model.load(client.decode(model._read(client)))
+    if identity_map is not None:
+        identity_map.set(key, model)
+    return model
+
+
+def _remember(record, client):
+    """Add a row of a list call to the identity map, if it is enabled."""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.set(
+            identity_map.key(record._model, record.uuid, client.identity), record)
+    return record
+
+
+def _canonical_value(value):
+    """Return a hashable value with lists turned into tuples and dicts sorted by key"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _canonical_value(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical_value(val) for val in value)
+    return value
+
+
+def _iter_results(client, endpoint, page_size=None, prefetch=True, **kwargs):
+    """Yield every item of a paginated Koku list endpoint.
+
+    The ``next`` links of the paginated responses are followed until the last
+    page. While the items of the current page are being consumed, the next page
+    is fetched in the background so only two pages are ever held in memory.
+
+    Arguments:
+        client - ``hansei.api.Client`` used to send the requests
+        endpoint - API endpoint of the list
+        page_size - Number of items requested per page. Defaults to the
+            ``page-size`` value of the ``koku`` config section
+        prefetch - If False, request each page only once the previous one has
+            been consumed
+    """
+    if page_size is None:
+        page_size = config.get_config().get('koku', {}).get(
+            'page-size', KOKU_DEFAULT_PAGE_SIZE)
+
+    params = dict(kwargs.pop('params', None) or {})
+    params['limit'] = page_size
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        response = client.get(endpoint, params=params, **kwargs)
+        while True:
+            page = client.decode(response)
+            next_url = page.get('next')
+            next_page = None
+            if next_url and executor:
+                next_page = executor.submit(client.get, next_url, **kwargs)
+
+            for result in page['results']:
+                yield result
+
+            if not next_url:
+                break
+
+            if next_page:
+                response = next_page.result()
+            else:
+                response = client.get(next_url, **kwargs)
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+
+
 class KokuObject(object):
     """A base class for other KOKU models.
 
@@ -71,17 +250,37 @@ class KokuObject(object):
             if k not in ['uuid',
                          'client',
                          'endpoint',
-                        ]
+                        ] and not k.startswith('_')
         }
 
     def update_payload(self):
-        """Return a dictionary for POST or PUT requests."""
+        """Return a dictionary for POST or PUT requests.
+
+        Attributes starting with an underscore are internal to hansei and never sent.
+        """
         return {
             k: v for k, v in vars(self).items()
             if k not in ['uuid',
                          'client',
                          'endpoint',
-                        ]
+                        ] and not k.startswith('_')
+        }
+
+    def _mark_clean(self):
+        """Remember the current fields as the ones saved on the server, see ``changed_fields``"""
+        self._saved_fields = copy.deepcopy(self.update_payload())
+
+    def changed_fields(self):
+        """Return the fields of ``update_payload`` changed since the object was loaded or
+        created. Every field is changed if the object was never loaded from the server.
+        """
+        saved = getattr(self, '_saved_fields', None)
+        payload = self.update_payload()
+        if saved is None:
+            return payload
+        return {
+            k: v for k, v in payload.items()
+            if k not in saved or saved[k] != v
         }
 
     def to_str(self):
@@ -100,9 +299,11 @@ class KokuObject(object):
         """Send GET request return the user assigned to the client authentication token"""
         return self.client.get_user()
 
-    def _create(self, client=None, **kwargs):
+    def _create(self, client=None, decode=True, **kwargs):
         """Send POST request to the self.endpoint of this object.
 
+        :param decode: If False, the response body is not decoded and
+            ``self.uuid`` is left untouched.
         :param ``**kwargs``: Additional arguments accepted by Requests's
             ``request.request()`` method.
 
@@ -119,7 +320,9 @@ class KokuObject(object):
 
         response = client.post(self.endpoint, self.payload(), **kwargs)
         if response.status_code in range(200, 203):
-            self.uuid = response.json().get('uuid')
+            self._mark_clean()
+            if decode:
+                self.uuid = client.decode(response).get('uuid')
         return response
 
     def _list(self, client=None, **kwargs):
@@ -149,21 +352,40 @@ class KokuObject(object):
         return client.get(self.path(), **kwargs)
 
     def _update(self, client=None, **kwargs):
-        """Send PUT request to the self.endpoint/{id} of this object.
+        """Send a PATCH request with the fields changed since the object was loaded or created.
 
         :param ``**kwargs``: Additional arguments accepted by Requests's
             `request.request()` method.
 
-        Sends `self.update_payload()` as the data of the PUT request, thereby
-        updating the object on the server with the same `id` as this object
-        with the fields contained in `self.update_payload()`.
+        Sends the fields of `self.update_payload()` which differ from the ones loaded from, or
+        last saved to, the server, see `self.changed_fields()`. If the server does not allow
+        PATCH requests (405) the whole `self.update_payload()` is sent in a PUT request instead.
 
-        :returns: requests.models.Response. The json of this response contains
-            the data associated with this object's `self.uuid`.
+        :returns: requests.models.Response, or None if no field changed and no request was
+            sent. The json of this response contains the data associated with this object's
+            `self.uuid`.
         """
         client = client or self.client
 
-        return client.put(self.path(), self.update_payload(), **kwargs)
+        changes = self.changed_fields()
+        if not changes:
+            return None
+
+        try:
+            try:
+                response = client.patch(self.path(), changes, **kwargs)
+            except HTTPError as error:
+                if error.response is None or error.response.status_code != 405:
+                    raise
+                response = error.response
+            if response.status_code == 405:
+                response = client.put(self.path(), self.update_payload(), **kwargs)
+        finally:
+            self._forget()
+
+        if response.status_code in range(200, 300):
+            self._mark_clean()
+        return response
 
     def _delete(self, client=None, **kwargs):
         """Send DELETE request to the self.endpoint/{id} of this object.
@@ -176,7 +398,16 @@ class KokuObject(object):
         """
         client = client or self.client
 
-        return client.delete(self.path(), **kwargs)
+        try:
+            return client.delete(self.path(), **kwargs)
+        finally:
+            self._forget()
+
+    def _forget(self):
+        """Remove this object from the identity map, see ``get_identity_map``"""
+        identity_map = get_identity_map()
+        if identity_map is not None and self.uuid:
+            identity_map.invalidate(type(self), self.uuid)
 
     #TODO: Refactor payload() & fields()
     def load(self, payload):
@@ -192,13 +423,14 @@ class KokuObject(object):
             raise KokuException(
                 'Unable to refresh {} object. No uuid specified'.format(self.__class__))
 
-        response = self.read()
-        response_data = response.json()
+        response = self._read()
+        response_data = self.client.decode(response)
 
         self_vars = self.payload()
         for key in response_data:
             if key in self_vars:
                 setattr(self, key, response_data[key])
+        self._mark_clean()
 
     @property
     def last_response(self):
@@ -210,8 +442,11 @@ class KokuObject(object):
 
     @property
     def logged_in(self):
-        """Returns True if the client is currently logged in"""
-        return self.client.token is not None
+        """Returns True if the client is currently logged in
+
+        See ``hansei.api.Client.logged_in``
+        """
+        return self.client.logged_in
 
     def logout(self):
         """Logout and make current token invalid"""
@@ -222,7 +457,7 @@ class KokuObject(object):
 class KokuServiceAdmin(KokuObject):
     """Class to perform actions as the Koku Service Admin"""
 
-    def __init__(self, client=None, username=None, password=None):
+    def __init__(self, client=None, username=None, password=None, lazy=False):
         """
         Arguments:
             client - existing ``hansei.api.Client`` instance used to communicate with the Koku
@@ -230,13 +465,14 @@ class KokuServiceAdmin(KokuObject):
                 are provided
             username - username to use for authentication
             password - password to use for authentication
+            lazy - If True, the new client only logs in when it sends its first request
         """
         cfg = config.get_config().get('koku', {})
         self.username = username or cfg.get('username', KOKU_DEFAULT_USER)
         self.password = password or cfg.get('password', KOKU_DEFAULT_PASSWORD)
 
         self.client = client if client else api.Client(
-            username=self.username, password=self.password)
+            username=self.username, password=self.password, lazy=lazy)
 
         self.uuid = None
 
@@ -255,10 +491,15 @@ class KokuServiceAdmin(KokuObject):
     def _delete(self, client=None):
         raise NotImplementedError("Cannot delete a service admin account")
 
-    def login(self):
-        """Login as the currently assigned service admin user"""
-        self.client.login(self.username, self.password)
-        return self.client.token is not None
+    def login(self, lazy=False, use_cache=True):
+        """Login as the currently assigned service admin user
+
+        Arguments:
+            lazy - If True, defer the login until the next request of the client
+            use_cache - If False, bypass the token cache of the client
+        """
+        self.client.login(self.username, self.password, lazy=lazy, use_cache=use_cache)
+        return self.client.logged_in
 
     def create_customer(self, name, owner):
         """Create a Koku Customer object
@@ -271,49 +512,97 @@ class KokuServiceAdmin(KokuObject):
                     email - Owner email address
                     password - Owner user password
 
+        The client of the new customer is not logged in, call ``login`` to authenticate as the
+        owner.
+
         Returns: ``hansei.koku_models.KokuCustomer`` object
         """
         customer = KokuCustomer(name=name, owner=owner)
         customer._create(self.client)
         return customer
 
-    def read_customer(self, uuid):
+    def create_customers(self, specs, max_workers=None):
+        """Create many Koku Customer objects concurrently
+
+        Args:
+            specs - List of dictionaries of the arguments of ``create_customer``
+                Example: [{'name': 'Customer 1', 'owner': {...}}, ...]
+            max_workers - Maximum number of customers created at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+
+        A failure to create a customer does not stop the creation of the other ones.
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of ``specs``. ``result`` is the
+            ``hansei.koku_models.KokuCustomer`` object and ``error`` the exception raised
+            creating it
+        """
+        return api.map_concurrently(
+            lambda spec: self.create_customer(**spec), specs, max_workers=max_workers)
+
+    def read_customer(self, uuid, lazy=False):
         """Get a Koku Customer object with assigned uuid
 
         Args:
             uuid - Koku uuid of the customer to retrieve
+            lazy - If True, return a ``hansei.koku_models.KokuProxy`` of the customer which only
+                sends the GET request when a field other than the uuid is first accessed
 
         Returns: ``hansei.koku_models.KokuCustomer`` object
         """
-        customer = KokuCustomer(uuid=uuid)
-        customer.load(customer._read(self.client).json())
-        return customer
+        if lazy:
+            return KokuProxy(KokuCustomer, uuid, self.client)
+        return _read_model(KokuCustomer, uuid, self.client)
 
     def delete_customer(self, uuid):
         """Delete a Koku Customer object with assigned uuid
 
         Args:
             uuid - Koku uuid of the customer to delete
+
+        Returns: ``requests.models.Response`` of the DELETE request
         """
-        customer = KokuCustomer(uuid=uuid)
-        customer._delete(self.client)
+        customer = KokuCustomer(client=self.client, uuid=uuid)
+        return customer._delete()
 
-    def list_customers(self):
-        """Retrieve the list of customers on the Koku Server
+    def delete_customers(self, uuids, max_workers=None):
+        """Delete many Koku Customer objects concurrently
+
+        Args:
+            uuids - Koku uuids of the customers to delete
+            max_workers - Maximum number of customers deleted at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of ``uuids``. ``result`` is the
+            response of the DELETE request and ``error`` the exception raised deleting the
+            customer, if any
+        """
+        return api.map_concurrently(self.delete_customer, uuids, max_workers=max_workers)
+
+    def iter_customers(self, page_size=None):
+        """Iterate over all of the customers on the Koku Server
+
+        Pages are requested lazily, following the ``next`` links of the list
+        endpoint.
+
+        Args:
+            page_size - Number of customers requested per page
 
-        Returns: List of ``hansei.koku_models.KokuCustomer`` objects
+        Returns: Generator of ``hansei.koku_models.KokuCustomerRecord`` objects sharing the
+            client of the service admin
         """
-        customer_list = []
-        self.client.get(KOKU_CUSTOMER_PATH)
-        assert self.client.last_response, 'Unable to retrieve customer list in {}.list_customers()'.format(
-            self.__class__)
+        for customer_response in _iter_results(
+                self.client, KOKU_CUSTOMER_PATH, page_size=page_size):
+            yield _remember(KokuCustomerRecord(self.client, customer_response), self.client)
 
-        for customer_response in self.last_response.json()['results']:
-            cust = KokuCustomer()
-            cust.load(customer_response)
-            customer_list.append(cust)
+    def list_customers(self, page_size=None):
+        """Retrieve the list of customers on the Koku Server
+
+        Args:
+            page_size - Number of customers requested per page
 
-        return customer_list
+        Returns: List of ``hansei.koku_models.KokuCustomerRecord`` objects
+        """
+        return list(self.iter_customers(page_size=page_size))
 
 
 class KokuCustomer(KokuObject):
@@ -334,19 +623,23 @@ class KokuCustomer(KokuObject):
                     email - Owner email address
                     password - Owner user password
         """
-        super().__init__(client=client, uuid=uuid, authenticate=False)
         # If no client specified create ``api.Client`` with no authentication
-        self.client = client or api.Client(authenticate=False)
+        super().__init__(client=client, uuid=uuid, authenticate=False)
         self.name = name
         self.owner = owner
         self.endpoint = KOKU_CUSTOMER_PATH
 
-    def login(self):
+    def login(self, lazy=False, use_cache=True):
         """Login as the customer owner
         Authentication info is provided by the ``KokuCustomer.owner`` dictionary
+
+        Arguments:
+            lazy - If True, defer the login until the next request of the client
+            use_cache - If False, bypass the token cache of the client
         """
-        self.client.login(self.owner['username'], self.owner['password'])
-        return self.client.token is not None
+        self.client.login(
+            self.owner['username'], self.owner['password'], lazy=lazy, use_cache=use_cache)
+        return self.client.logged_in
 
     def load(self, payload):
         """Populate the object data from the response of a GET request
@@ -357,6 +650,7 @@ class KokuCustomer(KokuObject):
         self.uuid = payload['uuid']
         self.name = payload['name']
         self.owner = payload['owner']
+        self._mark_clean()
 
     def payload(self):
         """Return a dictionary for POST or PUT requests."""
@@ -375,23 +669,42 @@ class KokuCustomer(KokuObject):
             email - User email address
             password - User password
 
+        The client of the new user is not logged in, call ``login`` to authenticate as the user.
+
         Returns: ``hansei.koku_models.KokuUser`` object
         """
         user = KokuUser(username=username, email=email, password=password)
         user._create(self.client)
         return user
 
-    def read_user(self, uuid):
+    def create_users(self, specs, max_workers=None):
+        """Create many Koku User objects concurrently
+
+        Args:
+            specs - List of dictionaries of the arguments of ``create_user``
+                Example: [{'username': 'user1', 'email': 'user1@foo.com', 'password': '...'}]
+            max_workers - Maximum number of users created at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of ``specs``. ``result`` is the
+            ``hansei.koku_models.KokuUser`` object and ``error`` the exception raised creating it
+        """
+        return api.map_concurrently(
+            lambda spec: self.create_user(**spec), specs, max_workers=max_workers)
+
+    def read_user(self, uuid, lazy=False):
         """Get a Koku User object with assigned uuid
 
         Args:
             uuid - Koku uuid of the user to retrieve
+            lazy - If True, return a ``hansei.koku_models.KokuProxy`` of the user which only
+                sends the GET request when a field other than the uuid is first accessed
 
         Returns: ``hansei.koku_models.KokuUser`` object
         """
-        user = KokuUser(uuid=uuid)
-        user.load(user._read(self.client).json())
-        return user
+        if lazy:
+            return KokuProxy(KokuUser, uuid, self.client)
+        return _read_model(KokuUser, uuid, self.client)
 
 
     def delete_user(self, uuid):
@@ -399,28 +712,52 @@ class KokuCustomer(KokuObject):
 
         Args:
             uuid - Koku uuid of the user to delete
+
+        Returns: ``requests.models.Response`` of the DELETE request
+        """
+        user = KokuUser(client=self.client, uuid=uuid)
+        return user._delete()
+
+    def delete_users(self, uuids, max_workers=None):
+        """Delete many Koku User objects concurrently
+
+        Args:
+            uuids - Koku uuids of the users to delete
+            max_workers - Maximum number of users deleted at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of ``uuids``. ``result`` is the
+            response of the DELETE request and ``error`` the exception raised deleting the
+            user, if any
         """
-        user = KokuUser(uuid=uuid)
-        user._delete(self.client)
+        return api.map_concurrently(self.delete_user, uuids, max_workers=max_workers)
 
     #TODO: This should be in KokuObject since all authenticated 'users' can query
-    def list_users(self):
-        """Retrieve the list of users on the Koku Server
+    def iter_users(self, page_size=None):
+        """Iterate over all of the users on the Koku Server
+
+        Pages are requested lazily, following the ``next`` links of the list
+        endpoint.
 
-        Returns: List of ``hansei.koku_models.KokuUser`` objects
+        Args:
+            page_size - Number of users requested per page
+
+        Returns: Generator of ``hansei.koku_models.KokuUserRecord`` objects sharing the client
+            of the customer
         """
-        user_list = []
-        response = self.client.get(KOKU_USER_PATH)
+        for user_response in _iter_results(
+                self.client, KOKU_USER_PATH, page_size=page_size):
+            yield _remember(KokuUserRecord(self.client, user_response), self.client)
 
-        assert response, 'Unable to retrieve user list in {}.list_users()'.format(
-            self.__class__)
+    def list_users(self, page_size=None):
+        """Retrieve the list of users on the Koku Server
 
-        for user_response in response.json()['results']:
-            tmp_user = KokuUser()
-            tmp_user.load(user_response)
-            user_list.append(tmp_user)
+        Args:
+            page_size - Number of users requested per page
 
-        return user_list
+        Returns: List of ``hansei.koku_models.KokuUserRecord`` objects
+        """
+        return list(self.iter_users(page_size=page_size))
 
 
 class KokuUser(KokuObject):
@@ -444,11 +781,17 @@ class KokuUser(KokuObject):
 
     def __enter__(self):
         self._orig_token = self.client.token
+        self._orig_username = self.client.username
+        self._orig_credentials = self.client.credentials
         self.client.login(self.username, self.password)
 
     def __exit__(self, *args, **kwargs):
         self.client.token = self._orig_token
+        self.client.username = self._orig_username
+        self.client.credentials = self._orig_credentials
         self._orig_token = None
+        self._orig_username = None
+        self._orig_credentials = None
 
     def payload(self):
         """Return a dictionary for POST or PUT requests."""
@@ -472,11 +815,17 @@ class KokuUser(KokuObject):
         self.username = payload['username']
         self.email = payload['email']
         self.password = None
+        self._mark_clean()
 
-    def login(self):
-        """Login as the currently assigned user"""
-        self.client.login(self.username, self.password)
-        return self.client.token is not None
+    def login(self, lazy=False, use_cache=True):
+        """Login as the currently assigned user
+
+        Arguments:
+            lazy - If True, defer the login until the next request of the client
+            use_cache - If False, bypass the token cache of the client
+        """
+        self.client.login(self.username, self.password, lazy=lazy, use_cache=use_cache)
+        return self.client.logged_in
 
     ##################################################
     # Provider
@@ -497,43 +846,85 @@ class KokuUser(KokuObject):
         provider._create(self.client)
         return provider
 
-    def read_provider(self, uuid):
+    def create_providers(self, specs, max_workers=None):
+        """Create many Koku Providers concurrently
+
+        Args:
+            specs - List of dictionaries of the arguments of ``create_provider``
+            max_workers - Maximum number of providers created at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of ``specs``. ``result`` is the
+            ``hansei.koku_models.KokuProvider`` object and ``error`` the exception raised
+            creating it
+        """
+        return api.map_concurrently(
+            lambda spec: self.create_provider(**spec), specs, max_workers=max_workers)
+
+    def read_provider(self, uuid, lazy=False):
         """Get a Koku Provider object with assigned uuid
 
         Args:
             uuid - Koku uuid of the provider to retrieve
+            lazy - If True, return a ``hansei.koku_models.KokuProxy`` of the provider which only
+                sends the GET request when a field other than the uuid is first accessed
 
         Returns: ``hansei.koku_models.KokuProvider`` object
         """
-        provider = KokuProvider(uuid=uuid)
-        provider.load(provider._read(self.client).json())
-        return provider
+        if lazy:
+            return KokuProxy(KokuProvider, uuid, self.client)
+        return _read_model(KokuProvider, uuid, self.client)
 
-    def list_providers(self):
-        """Retrieve the list of providers assigned to the current user
+    def iter_providers(self, page_size=None):
+        """Iterate over all of the providers assigned to the current user
+
+        Pages are requested lazily, following the ``next`` links of the list
+        endpoint.
+
+        Args:
+            page_size - Number of providers requested per page
 
-        Returns: List of ``hansei.koku_models.KokProvider`` objects
+        Returns: Generator of ``hansei.koku_models.KokuProviderRecord`` objects sharing the
+            client of the user
         """
-        providerlist = []
-        response = self.client.get(KOKU_PROVIDER_PATH)
+        for provider_response in _iter_results(
+                self.client, KOKU_PROVIDER_PATH, page_size=page_size):
+            yield _remember(KokuProviderRecord(self.client, provider_response), self.client)
 
-        assert response, 'Unable to retrieve provider list in KokuUser.list_providers()'
+    def list_providers(self, page_size=None):
+        """Retrieve the list of providers assigned to the current user
 
-        for provider_response in response.json()['results']:
-            tmp_provider = KokuProvider()
-            tmp_provider.load(provider_response)
-            providerlist.append(tmp_provider)
+        Args:
+            page_size - Number of providers requested per page
 
-        return providerlist
+        Returns: List of ``hansei.koku_models.KokuProviderRecord`` objects
+        """
+        return list(self.iter_providers(page_size=page_size))
 
     def delete_provider(self, uuid):
         """Delete the provider specified by uuid
 
         Arguments:
             uuid - Koku uuid of the provider to delete
+
+        Returns: ``requests.models.Response`` of the DELETE request
+        """
+        provider = KokuProvider(client=self.client, uuid=uuid)
+        return provider._delete()
+
+    def delete_providers(self, uuids, max_workers=None):
+        """Delete many providers concurrently
+
+        Arguments:
+            uuids - Koku uuids of the providers to delete
+            max_workers - Maximum number of providers deleted at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+
+        Returns: List of ``hansei.api.BatchResult`` in the order of ``uuids``. ``result`` is the
+            response of the DELETE request and ``error`` the exception raised deleting the
+            provider, if any
         """
-        provider = KokuProvider(uuid=uuid)
-        provider._delete(self.client)
+        return api.map_concurrently(self.delete_provider, uuids, max_workers=max_workers)
 
     ##################################################
     # User Preferences
@@ -633,6 +1024,172 @@ class KokuProvider(KokuObject):
         self.authentication = payload['authentication']
         self.billing_source = payload['billing_source']
         self.uuid = payload['uuid']
+        self._mark_clean()
+
+
+class KokuProxy(object):
+    """A model object read from the server on first use.
+
+    The proxy only holds the uuid of the object, so it can be passed to a delete or preference
+    call without any request. The GET request is sent the first time another attribute is
+    accessed, or when ``resolve`` is called, and the attributes are then those of the model.
+    Use ``resolve_all`` to read many proxies concurrently.
+    """
+    __slots__ = ('uuid', '_model_class', '_client', '_model', '_lock', '__weakref__')
+
+    def __init__(self, model_class, uuid, client):
+        """
+        Arguments:
+            model_class - ``KokuObject`` subclass of the object
+            uuid - Koku uuid of the object
+            client - ``hansei.api.Client`` reading the object
+        """
+        object.__setattr__(self, 'uuid', uuid)
+        object.__setattr__(self, '_model_class', model_class)
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_model', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    @property
+    def resolved(self):
+        """Returns True if the object was read from the server"""
+        return self._model is not None
+
+    def resolve(self):
+        """Read the object from the server, once, and return the model object"""
+        with self._lock:
+            if self._model is None:
+                object.__setattr__(
+                    self, '_model', _read_model(self._model_class, self.uuid, self._client))
+            return self._model
+
+    def __getattr__(self, name):
+        # Only called for the attributes which are not set on the proxy. The slots of a proxy
+        # built by copy or pickle are not set yet, and special names are looked up by the copy,
+        # pickle and other protocols on the proxy itself: none of them reads the object.
+        if name in KokuProxy.__slots__ or (name.startswith('__') and name.endswith('__')):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name, value):
+        if name in KokuProxy.__slots__:
+            raise AttributeError('{} can not be set on a proxy'.format(name))
+        setattr(self.resolve(), name, value)
+
+    def __copy__(self):
+        """Return a new proxy of the same object, read again on first use"""
+        return KokuProxy(self._model_class, self.uuid, self._client)
+
+    def __deepcopy__(self, memo):
+        # The client is shared, like the one of ``KokuRecord`` objects
+        return self.__copy__()
+
+    def __repr__(self):
+        if self._model is None:
+            return '<{} proxy uuid={!r}>'.format(self._model_class.__name__, self.uuid)
+        return repr(self._model)
+
+
+def resolve_all(proxies, max_workers=None):
+    """Read the objects of many ``KokuProxy`` concurrently.
+
+    Proxies which were already resolved are not read again.
+
+    Arguments:
+        proxies - Iterable of ``KokuProxy`` objects
+        max_workers - Maximum number of objects read at the same time. Defaults to the
+            ``pool-maxsize`` of the ``koku`` config section
+
+    Returns: List of ``hansei.api.BatchResult`` in the order of ``proxies``. ``result`` is the
+        model object and ``error`` the exception raised reading it
+    """
+    return api.map_concurrently(
+        lambda proxy: proxy.resolve(), list(proxies), max_workers=max_workers)
+
+
+class KokuRecord(object):
+    """A compact, read-only row of a list endpoint.
+
+    Listing builds one record per row instead of a full ``KokuObject``, which would create and
+    configure an ``api.Client`` of its own. Records hold the fields of the row in slots and
+    share the client of the object that listed them. ``materialize`` builds the full model.
+    """
+    __slots__ = ('client', '__weakref__')
+
+    # (attribute, key of the json payload) of each field of the record
+    _fields = ()
+    # ``KokuObject`` class built by ``materialize``
+    _model = None
+
+    def __init__(self, client, payload):
+        """
+        Arguments:
+            client - ``hansei.api.Client`` the row was listed with
+            payload - dictionary of the row from the json response
+        """
+        self.client = client
+        for attribute, key in self._fields:
+            setattr(self, attribute, payload[key])
+
+    def payload(self):
+        """Return the fields of the record as a dictionary, keyed as in the json response"""
+        return {key: getattr(self, attribute) for attribute, key in self._fields}
+
+    def materialize(self, client=None):
+        """Return the full model object of the record
+
+        Arguments:
+            client - ``hansei.api.Client`` of the model. Defaults to a new client which is not
+                logged in, sending its requests to the server and through the session of the
+                client shared by the record. The shared client usually belongs to the user who
+                listed the rows, it must not be logged in again as the model.
+        """
+        if client is None:
+            client = api.Client(
+                url=self.client.url, session=self.client.session, authenticate=False)
+        model = self._model(client=client)
+        model.load(self.payload())
+        return model
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.payload() == other.payload()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(attribute, getattr(self, attribute))
+            for attribute, _ in self._fields))
+
+
+class KokuCustomerRecord(KokuRecord):
+    """Row of the customer list, see ``KokuServiceAdmin.list_customers``"""
+    __slots__ = ('uuid', 'name', 'owner')
+    _fields = (('uuid', 'uuid'), ('name', 'name'), ('owner', 'owner'))
+    _model = KokuCustomer
+
+
+class KokuUserRecord(KokuRecord):
+    """Row of the user list, see ``KokuCustomer.list_users``"""
+    __slots__ = ('uuid', 'username', 'email')
+    _fields = (('uuid', 'uuid'), ('username', 'username'), ('email', 'email'))
+    _model = KokuUser
+
+
+class KokuProviderRecord(KokuRecord):
+    """Row of the provider list, see ``KokuUser.list_providers``"""
+    __slots__ = ('uuid', 'name', 'provider_type', 'authentication', 'billing_source')
+    _fields = (
+        ('uuid', 'uuid'),
+        ('name', 'name'),
+        ('provider_type', 'type'),
+        ('authentication', 'authentication'),
+        ('billing_source', 'billing_source'),
+    )
+    _model = KokuProvider
 
 
 class KokuBaseReport(object):
@@ -649,8 +1206,11 @@ class KokuBaseReport(object):
         # Initialize all properties storing all cached report data
         self._clear_report_cache()
 
-    def get(self, report_filter=None, order_by=None, group_by=None):
+    @staticmethod
+    def query_params(report_filter=None, order_by=None, group_by=None):
         """
+        Returns the query params of a report request
+
         Arguments:
             report_filter - Dictionary of filter queries key. Key:Value => Filter name:Filter Value
             order_by - tuple of the order by value.
@@ -658,7 +1218,6 @@ class KokuBaseReport(object):
             group_by - List of tuples for accounts, services,... to group by
                 Example: [['account', '*'], ['service', 'Compute Instance']]
         """
-
         query_params = {}
         if order_by:
             query_params['order_by[{}]'.format(order_by[0])] = order_by[1]
@@ -679,14 +1238,102 @@ class KokuBaseReport(object):
             for key, val in report_filter.items():
                 query_params['filter[{}]'.format(key)] = val
 
+        return query_params
+
+    def query_key(self, report_filter=None, order_by=None, group_by=None):
+        """
+        Returns the canonical key of a report query: the url of the server, the endpoint, the
+        identity of the client, the filter sorted by name, the group_by list in order (it drives
+        the nesting of the report data) and the order_by. Two queries with the same key return
+        the same report.
+        """
+        return (
+            self.client.url,
+            self.endpoint,
+            self.client.identity,
+            tuple(sorted(
+                (str(key), _canonical_value(val))
+                for key, val in (report_filter or {}).items())),
+            tuple(
+                (str(key), _canonical_value(val)) for key, val in (group_by or [])),
+            _canonical_value(order_by) if order_by else None,
+        )
+
+    def get(self, report_filter=None, order_by=None, group_by=None, decode=True):
+        """
+        Arguments:
+            report_filter - Dictionary of filter queries key. Key:Value => Filter name:Filter Value
+            order_by - tuple of the order by value.
+                Example: ['cost', 'asc']
+            group_by - List of tuples for accounts, services,... to group by
+                Example: [['account', '*'], ['service', 'Compute Instance']]
+            decode - If False, skip decoding the report and return the
+                ``requests.models.Response``. ``last_report`` is left empty
+
+        If the report cache is enabled (see ``get_report_cache``) a report fetched earlier in
+        the process with the same ``query_key`` is returned without sending a request. Cached
+        reports are shared and must not be modified.
+
+        Returns: The decoded report, or the response if ``decode`` is False
+        """
+        query_params = self.query_params(
+            report_filter=report_filter, order_by=order_by, group_by=group_by)
+
         # Clear the cache of items from the last report
         self._clear_report_cache()
+        self.last_report = None
+
+        report_cache = get_report_cache() if decode else None
+        if report_cache is not None:
+            key = self.query_key(
+                report_filter=report_filter, order_by=order_by, group_by=group_by)
+            self.last_report = report_cache.get(key)
+            if self.last_report is not None:
+                return self.last_report
 
         response = self.client.get(self.endpoint, params=query_params)
-        self.last_report = response.json()
+        if not decode:
+            return response
+
+        self.last_report = self.client.decode(response)
+
+        if report_cache is not None:
+            report_cache.set(key, self.last_report, len(response.content))
 
         return self.last_report
 
+    def stream(self, report_filter=None, order_by=None, group_by=None,
+               chunk_size=KOKU_DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Yields the line items of a report while its response is downloaded, holding only the
+        line item being parsed in memory instead of the whole report. See ``get`` for the
+        arguments.
+
+        ``last_report`` is set to a dictionary receiving the top level fields of the report
+        (filter, group_by, order_by, total...) as they are parsed, without 'data'. The 'total'
+        comes after 'data' in Koku responses so it is available once all of the line items have
+        been read.
+
+        Example:
+            line_items_total = aggregate(report.stream(report_filter=...)).total
+            assert line_items_total == Decimal(str(report.total['value']))
+
+        Arguments:
+            chunk_size - Number of bytes read from the response at a time
+        """
+        query_params = self.query_params(
+            report_filter=report_filter, order_by=order_by, group_by=group_by)
+
+        self._clear_report_cache()
+        self.last_report = {}
+
+        response = self.client.get(self.endpoint, params=query_params, stream=True)
+        try:
+            events = json_stream.basic_parse(response.iter_content(chunk_size))
+            yield from json_stream.iter_report_line_items(events, self.last_report)
+        finally:
+            response.close()
+
     @property
     def filter(self):
         """The filter params used in the last report query as returned by the Koku json response"""
@@ -709,73 +1356,256 @@ class KokuBaseReport(object):
     def _clear_report_cache(self):
         """ Clear all of the data that we cached during operations on the last report"""
 
-        self._line_items = None
+        # Views derived from report data: (view name, id of the data) => (data, view). The data
+        # is kept in the entry so that its id can not be reused by another object
+        self._views = {}
 
-    def _traverse_report_line_items(self, root_object):
+    def _view(self, name, data, build):
         """
-        Recursively traverses the report data to generate a list of the cost
-        or storage used per time_scope_unit
+        Returns the view ``name`` of ``data``, calling ``build(data)`` the first time it is
+        requested for this data object. Defaults to the data of the last report.
         """
-        line_item_list = []
+        data = self.data if data is None else data
+        key = (name, id(data))
+        entry = self._views.get(key)
+        if entry is None or entry[0] is not data:
+            entry = (data, build(data))
+            self._views[key] = entry
+        return entry[1]
+
+    def iter_line_items(self, data=None):
+        """
+        Yields the line items of the report one at a time. The line items are the entries of
+        the 'values' lists, holding the cost or storage used per time_scope_unit.
 
-        root_object_type = type(root_object)
-        if not root_object or (root_object_type not in [list, dict]):
-            return line_item_list
+        The report data is walked depth first with an explicit stack, in the same order as the
+        report, so no intermediate list is built and deep group_by reports do not recurse.
 
-        if root_object_type is list:
-            for item in root_object:
-                if type(item) in [list, dict]:
-                    line_item_list.extend(self._traverse_report_line_items(item))
-        else:
-            if root_object_type is dict:
+        Arguments:
+            data (List OR dict)- data object as returned by a Koku report request
+        """
+        data = self.data if data is None else data
+
+        # Stack of iterators over the children of the lists and dicts being walked
+        stack = [iter((data,))]
+        while stack:
+            try:
+                node = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                continue
+
+            node_type = type(node)
+            if not node or node_type not in (list, dict):
+                continue
+
+            if node_type is list:
+                stack.append(iter(node))
+            elif 'values' in node:
                 # Once we hit 'values' key it will be a list that contains all
                 # of the costs or storage usage for 'time_scope_units'
-                if 'values' in root_object:
-                    return line_item_list + root_object['values']
-
-                for key, val in root_object.items():
-                    if type(val) in [list, dict]:
-                        line_item_list.extend(self._traverse_report_line_items(val))
-
-        return line_item_list
+                yield from node['values']
+            else:
+                stack.append(iter(node.values()))
 
     def report_line_items(self, data=None):
         """
         Returns a list of the 'total' value of an item fetched from the individual rows in the
         report.The item could be total cost/storage usage/VM uptime.
 
+        The list is built once per data object and must not be modified.
+
         Arguments:
-            data (List OR dict)- data object as returned by a Koku report request
+            data (List OR dict)- data object as returned by a Koku report request. Defaults to
+                the data of the last report
+        """
+        return self._view(
+            'line_items', data, lambda data: list(self.iter_line_items(data)))
+
+    def columns(self, data=None):
+        """
+        Returns a ``hansei.report_columns.ReportColumns`` view of the line items of the last
+        report: one array per field (date, units, total, count and each group_by key) so that
+        totals, per-group sums and per-date sums are computed with vectorized operations.
+
+        Example:
+            columns = report.columns()
+            columns.total()
+            columns.sum_by('account', 'service')
+            columns.sum_by_date()
+        """
+        return self._view(
+            'columns', data,
+            lambda data: ReportColumns.from_line_items(self.report_line_items(data)))
+
+    def aggregate(self, data=None):
+        """
+        Sums the totals and counts of the line items of the last report in a single pass, see
+        ``hansei.aggregate.aggregate``.
+
+        Returns: ``hansei.aggregate.Aggregate`` with the total, the number of line items, the
+            sum of their counts and the subtotals per units. None if there is no report saved
+        """
+        data = self.data if data is None else data
+        if not data:
+            return None
+
+        return self._view(
+            'aggregate', data, lambda data: aggregate(self.report_line_items(data)))
+
+    def group_index(self, *keys, data=None):
+        """
+        Returns the line items of the last report indexed by the values of the group_by
+        ``keys``. The index is built once per report and must not be modified.
+
+        Example:
+            >>> report.group_index('account')
+            {'111': [{...}, {...}], '222': [{...}]}
+            >>> report.group_index('account', 'service')
+            {('111', 'EC2'): [{...}], ...}
+
+        Returns: Dictionary of group value to the list of its line items, in report order.
+            The group value is a tuple when indexing by more than one key.
         """
-        data = data or self.data
+        if not keys:
+            raise ValueError('At least one key to index by is required')
+
+        def build(data):
+            index = {}
+            for item in self.report_line_items(data):
+                if len(keys) == 1:
+                    group = item.get(keys[0])
+                else:
+                    group = tuple(item.get(key) for key in keys)
+                index.setdefault(group, []).append(item)
+            return index
+
+        return self._view(('group_index',) + keys, data, build)
+
+    def date_index(self, data=None):
+        """Returns the line items of the last report indexed by date, see ``group_index``"""
+        return self.group_index('date', data=data)
+
+    def index(self, data=None):
+        """
+        Returns a ``hansei.report_index.LineItemIndex`` of the line items of the last report,
+        keyed by date and the values of the group_by keys of the report, in order. The index
+        is built once per report in a single pass.
+
+        Line items may be nested by a key missing from the group_by of the report, e.g. the
+        instance types of ``KokuInstanceReport``. Such keys are indexed after the group_by keys.
+
+        Example:
+            index = report.index()
+            index.lookup('2018-07-01', '111', 'EC2')['total']
+            index.lookup(date='2018-07-01', account='111', service='EC2')
+            index.slice(account='111')
+        """
+        def build(data):
+            line_items = self.report_line_items(data)
+            group_keys = list(self.group_by or {})
+            known = set(NUMERIC_COLUMNS + TEXT_COLUMNS)
+            for item in line_items:
+                for key in item:
+                    if key not in known and key not in group_keys:
+                        group_keys.append(key)
+            return LineItemIndex(line_items, group_keys)
+
+        return self._view('index', data, build)
+
+    def save_snapshot(self, path, commit=None):
+        """
+        Saves the line items and the filter, group_by, order_by and total of the last report to
+        a binary snapshot file, see ``hansei.snapshot``.
 
-        if self._line_items:
-            return self._line_items
+        Arguments:
+            path - Path of the snapshot file
+            commit - Git commit of the Koku server the report was fetched from. Defaults to the
+                commit returned by the server status
+        """
+        if self.last_report is None:
+            raise KokuException('There is no report to save')
+
+        if commit is None:
+            commit = self.client.decode(self.client.server_status()).get('commit')
+
+        write_snapshot(path, self.columns(), {
+            'report': type(self).__name__,
+            'endpoint': self.endpoint,
+            'commit': commit,
+            'filter': self.filter,
+            'group_by': self.group_by,
+            'order_by': self.order_by,
+            'total': self.total,
+        })
+
+    @staticmethod
+    def load_snapshot(path):
+        """
+        Loads a report snapshot saved by ``save_snapshot``. The line items are memory mapped
+        and read as columns with ``snapshot.columns()``.
 
-        self._line_items = self._traverse_report_line_items(data)
+        Example:
+            with KokuCostReport.load_snapshot('cost.snapshot') as snapshot:
+                assert snapshot.columns().sum_by('account') == report.columns().sum_by('account')
 
-        return self._line_items
+        Returns: ``hansei.snapshot.Snapshot``
+        """
+        return Snapshot(path)
+
+    def rollup(self, report_filter=None, group_by=None, today=None):
+        """
+        Computes locally the report of another query from the line items of the last report,
+        see ``hansei.rollup.rollup``. The last report must be a daily report grouped by every
+        key of ``group_by``, over a time window covering the one of ``report_filter``.
+
+        Example:
+            fine = KokuCostReport(client)
+            fine.get(report_filter={'resolution': 'daily', 'time_scope_value': -1,
+                                    'time_scope_units': 'month'},
+                     group_by=[['account', '*'], ['service', '*']])
+            monthly = fine.rollup(report_filter={'resolution': 'monthly',
+                                                 'time_scope_value': -1,
+                                                 'time_scope_units': 'month'},
+                                  group_by=[['service', '*']])
+            monthly.calculate_total()
+
+        ``today`` is the last day of the time windows, it defaults to the newest day of the
+        last report, which is the date of the server when it computed the report.
+
+        Returns: Report object of the same class whose ``last_report`` holds the computed report
+
+        :raises: KokuException if the last report does not hold every line item of the report,
+            see ``hansei.rollup.check_source``
+        """
+        if self.last_report is None:
+            raise KokuException('There is no report to roll up')
+        if today is None:
+            today = last_date(self.last_report)
+        check_source(self.filter, self.group_by, report_filter=report_filter,
+                     group_by=group_by, today=today)
+
+        report = type(self)(self.client)
+        report.last_report = rollup(
+            self.report_line_items(), report_filter=report_filter, group_by=group_by,
+            today=today)
+        return report
 
     def calculate_total(self):
         """
         Calculates the total cost/storage usage/VM uptime by adding all of the individual
         items reported in report data.
+
+        The totals are summed exactly as fixed-point integers and returned as a ``Decimal``
+        rounded to micro-units. The sum is computed once per report.
         """
         # Check to see if we have a report saved
         if not self.data:
             return None
 
-        total_item = decimal.Decimal(0.0)
-        item_list = self.report_line_items(self.data)
-        for item in item_list:
-            total_item = total_item + (
-                decimal.Decimal(item['total']) if item['total'] else 0.0)
-
-        # Koku will return a null total if there are no line item charges in the list
-        if len(item_list) == 0:
-            total_item = None
-
-        return total_item
+        # Koku will return a null total if there are no line item charges in the list, and so
+        # does aggregate()
+        return self.aggregate().total
 
     @property
     def total(self):
@@ -864,3 +1694,131 @@ class KokuInstanceReport(KokuBaseReport):
     def __init__(self, client):
         super().__init__(client)
         self.endpoint = KOKU_INSTANCE_REPORTS_PATH
+
+
+class ReportMatrix(object):
+    """
+    Reports of several report classes for every query of a grid, fetched concurrently.
+
+    The reports of a class are fetched on the first lookup of one of them, and the lookup only
+    waits for its own report. Every report class is fetched by the same pool of threads, so the
+    classes started at the same time, for instance with ``fetch(wait=False)``, share the
+    ``max_workers`` budget instead of each opening ``max_workers`` connections.
+
+    Example:
+        matrix = ReportMatrix(
+            [KokuCostReport, KokuInstanceReport],
+            [(None, None), ({'resolution': 'daily'}, [['account', '*']])],
+            client=customer.client)
+        matrix.fetch(wait=False)
+        report = matrix.report(KokuCostReport, {'resolution': 'daily'}, [['account', '*']])
+        matrix.close()
+    """
+    def __init__(self, report_classes, grid, client=None, max_workers=None):
+        """
+        Arguments:
+            report_classes - List of ``KokuBaseReport`` subclasses to fetch
+            grid - List of ``(report_filter, group_by)`` or ``(report_filter, group_by,
+                order_by)`` tuples, see ``KokuBaseReport.get``
+            client - Authenticated ``hansei.api.Client`` object shared by every report.
+                Defaults to a client authenticated from the config
+            max_workers - Maximum number of reports fetched at the same time. Defaults to the
+                ``pool-maxsize`` of the ``koku`` config section
+        """
+        if client is None:
+            cfg = config.get_config().get('koku', {})
+            client = api.Client(
+                username=cfg.get('username', KOKU_DEFAULT_USER),
+                password=cfg.get('password', KOKU_DEFAULT_PASSWORD))
+        self.client = client
+        self.max_workers = max_workers
+        self._queries = []
+        # Future of the ``hansei.api.BatchResult`` of each query, None until it is submitted
+        self._results = {}
+        self._executor = None
+        self.extend(report_classes, grid)
+
+    def extend(self, report_classes, grid):
+        """Add the queries of ``grid`` for ``report_classes`` to the matrix"""
+        for report_class in report_classes:
+            for query in grid:
+                query = tuple(query) + (None,) * (3 - len(query))
+                if (report_class, self._key(*query)) not in self._results:
+                    self._queries.append((report_class, query))
+                    self._results[(report_class, self._key(*query))] = None
+
+    @staticmethod
+    def _key(report_filter, group_by, order_by):
+        return (
+            _canonical_value(report_filter or {}),
+            _canonical_value(group_by or []),
+            _canonical_value(order_by or []))
+
+    def fetch(self, report_class=None, wait=True):
+        """
+        Fetch every report of the matrix that has not been fetched yet, concurrently.
+
+        A failing query does not stop the other ones, its exception is raised by ``report``.
+
+        Arguments:
+            report_class - If set, only fetch the reports of this ``KokuBaseReport`` subclass
+            wait - If False, return once the reports are submitted to the pool of threads
+
+        Returns: self
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers or api.default_max_workers())
+
+        futures = []
+        for query_class, query in self._queries:
+            if report_class is not None and query_class is not report_class:
+                continue
+            key = (query_class, self._key(*query))
+            if self._results[key] is None:
+                self._results[key] = self._executor.submit(
+                    self._fetch_report, query_class, *query)
+            futures.append(self._results[key])
+
+        if wait:
+            for future in futures:
+                future.result()
+        return self
+
+    def _fetch_report(self, report_class, report_filter, group_by, order_by):
+        """Return the ``hansei.api.BatchResult`` of fetching one report"""
+        try:
+            report = report_class(self.client)
+            report.get(report_filter=report_filter, order_by=order_by, group_by=group_by)
+            return api.BatchResult(report, None)
+        except Exception as error:  # pylint:disable=broad-except
+            return api.BatchResult(None, error)
+
+    def close(self):
+        """Stop the pool of threads once the submitted reports are fetched"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __len__(self):
+        return len(self._queries)
+
+    def report(self, report_class, report_filter=None, group_by=None, order_by=None):
+        """
+        Returns the fetched ``report_class`` object of a query of the grid. The first lookup of
+        a report class submits every query of the grid for that class, and waits for this one.
+
+        :raises: KeyError if the query is not part of the matrix, or the exception raised when
+            fetching the report
+        """
+        key = (report_class, self._key(report_filter, group_by, order_by))
+        if key not in self._results:
+            raise KeyError('{} {!r} is not part of the report matrix'.format(
+                report_class.__name__, (report_filter, group_by, order_by)))
+        if self._results[key] is None:
+            self.fetch(report_class, wait=False)
+
+        result = self._results[key].result()
+        if not result.ok:
+            raise result.error
+        return result.result
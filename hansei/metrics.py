@@ -0,0 +1,161 @@
+# coding=utf-8
+"""In-memory metrics of the requests sent to the Koku API.
+
+Every request sent by :class:`hansei.api.Client` is recorded in the registry
+returned by :func:`get_registry`, grouped by HTTP method and endpoint template
+(``reports/costs/``, ``customers/{uuid}/``...). The pytest hooks in
+``hansei/tests/conftest.py`` use it to report which endpoints slow down a run.
+"""
+import math
+import threading
+from collections import Counter, namedtuple
+
+
+EndpointSummary = namedtuple('EndpointSummary', [
+    'method', 'endpoint', 'count', 'errors', 'retries',
+    'p50', 'p95', 'p99', 'request_bytes', 'response_bytes',
+])
+"""Latency percentiles (in seconds) and totals of an endpoint."""
+
+
+class Histogram(object):
+    """Count samples in log-spaced buckets and report their percentiles.
+
+    The memory used does not grow with the number of samples. The bounds of the
+    buckets grow by ``growth`` from ``minimum``, so a percentile is within that
+    relative error of the value of the sample.
+    """
+
+    def __init__(self, minimum=1e-4, growth=1.05):
+        """
+        Arguments:
+            minimum - Upper bound of the first bucket, smaller samples are
+                counted in it
+            growth - Ratio between the bounds of two consecutive buckets
+        """
+        self.minimum = minimum
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        # Bucket index => number of samples
+        self._buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        if value <= self.minimum:
+            return 0
+        return int(math.ceil(math.log(value / self.minimum) / self._log_growth))
+
+    def add(self, value):
+        """Add a sample to the histogram."""
+        bucket = self._bucket(value)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """Return the nearest-rank percentile of the samples, or None if empty.
+
+        The upper bound of the bucket of the sample is returned, clamped to
+        the smallest and largest samples.
+
+        Arguments:
+            percent - Percentile to return, between 0 and 100
+        """
+        if not self.count:
+            return None
+        rank = max(int(math.ceil(percent / 100.0 * self.count)), 1)
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                break
+        value = self.minimum * self.growth ** bucket
+        return min(max(value, self.min), self.max)
+
+
+class EndpointMetrics(object):
+    """Metrics collected for one method and endpoint template."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        # Only the totals of the sizes are reported, no need to keep samples
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses = Counter()
+        self.retries = 0
+
+
+class MetricsRegistry(object):
+    """Thread safe registry of :class:`EndpointMetrics` keyed by method and endpoint."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(
+            self, method, endpoint, status, latency,
+            request_bytes=0, response_bytes=0, retries=0):
+        """Record one request.
+
+        Arguments:
+            method - HTTP method of the request
+            endpoint - Endpoint template, see ``hansei.api.endpoint_template``
+            status - Status code of the response, None if no response was received
+            latency - Seconds spent sending the request, retries included
+            request_bytes - Size of the request body
+            response_bytes - Size of the response body
+            retries - Number of times the request was retried
+        """
+        with self._lock:
+            metrics = self._endpoints.get((method, endpoint))
+            if metrics is None:
+                metrics = self._endpoints[(method, endpoint)] = EndpointMetrics()
+            metrics.latency.add(latency)
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+            metrics.statuses[status] += 1
+            metrics.retries += retries
+
+    def endpoint(self, method, endpoint):
+        """Return the :class:`EndpointMetrics` of an endpoint, or None."""
+        return self._endpoints.get((method, endpoint))
+
+    def summary(self):
+        """Return a list of :class:`EndpointSummary`, slowest p95 first."""
+        with self._lock:
+            rows = []
+            for (method, endpoint), metrics in self._endpoints.items():
+                errors = sum(
+                    count for status, count in metrics.statuses.items()
+                    if status is None or status >= 400)
+                rows.append(EndpointSummary(
+                    method=method,
+                    endpoint=endpoint,
+                    count=metrics.latency.count,
+                    errors=errors,
+                    retries=metrics.retries,
+                    p50=metrics.latency.percentile(50),
+                    p95=metrics.latency.percentile(95),
+                    p99=metrics.latency.percentile(99),
+                    request_bytes=metrics.request_bytes,
+                    response_bytes=metrics.response_bytes,
+                ))
+        return sorted(rows, key=lambda row: row.p95, reverse=True)
+
+    def clear(self):
+        """Forget every recorded request."""
+        with self._lock:
+            self._endpoints.clear()
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_registry():
+    """Return the registry shared by all of the clients in the process."""
+    return _REGISTRY
@@ -0,0 +1,174 @@
+# coding=utf-8
+"""Columnar view of the line items of a Koku report.
+
+Validating large reports walks thousands of line item dictionaries. A
+:class:`ReportColumns` holds the same data as one array per field (``date``,
+``units``, ``total``, ``count`` and each group_by key such as ``account``,
+``service`` or ``instance_type``), so totals, per-group sums and per-date sums
+are computed with vectorized operations.
+
+NumPy is optional. When it is not installed the columns are plain lists and
+the same operations are computed in Python.
+"""
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+NUMERIC_COLUMNS = ('total', 'count')
+"""Line item fields holding numbers. Missing or null values are read as 0,
+strings are converted to floats."""
+
+TEXT_COLUMNS = ('date', 'units')
+"""Line item fields present whatever the group_by of the report."""
+
+
+class ReportColumns(object):
+    """Arrays of line item fields, all of the same length.
+
+    Columns can be read with ``columns['total']``. Text columns hold the empty
+    string where a line item has no value.
+    """
+
+    def __init__(self, columns):
+        """
+        Arguments:
+            columns - Dictionary of column name to array (``numpy.ndarray``,
+                list or any other sequence)
+        """
+        self._columns = dict(columns)
+        lengths = {len(column) for column in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(
+                'All of the columns must have the same length, got {}'.format(
+                    sorted(lengths)))
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_line_items(cls, line_items, group_keys=None):
+        """Build the columns from line item dictionaries in a single pass.
+
+        Arguments:
+            line_items - Iterable of line item dictionaries, see
+                ``hansei.koku_models.KokuBaseReport.iter_line_items``
+            group_keys - Names of the group_by fields to extract. Defaults to
+                every field of the line items which is neither a numeric nor
+                a text column
+        """
+        line_items = list(line_items)
+        if group_keys is None:
+            known = set(NUMERIC_COLUMNS + TEXT_COLUMNS)
+            group_keys = []
+            for item in line_items:
+                for key in item:
+                    if key not in known and key not in group_keys:
+                        group_keys.append(key)
+
+        columns = {}
+        for name in NUMERIC_COLUMNS:
+            # Totals may be strings, read them as NumPy would
+            values = [float(item.get(name) or 0) for item in line_items]
+            columns[name] = (
+                numpy.array(values, dtype=numpy.float64) if numpy else values)
+
+        for name in TEXT_COLUMNS + tuple(group_keys):
+            values = [
+                '' if item.get(name) is None else str(item[name])
+                for item in line_items
+            ]
+            columns[name] = numpy.array(values, dtype=str) if numpy else values
+
+        return cls(columns)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    @property
+    def names(self):
+        """Names of the columns"""
+        return list(self._columns)
+
+    @property
+    def group_keys(self):
+        """Names of the group_by columns"""
+        return [
+            name for name in self._columns
+            if name not in NUMERIC_COLUMNS + TEXT_COLUMNS
+        ]
+
+    def total(self, column='total'):
+        """Return the sum of a numeric column."""
+        if numpy is not None:
+            return float(numpy.sum(self._columns[column], dtype=numpy.float64))
+        return float(sum(float(value) for value in self._columns[column]))
+
+    def sum_by(self, *keys, column='total'):
+        """Return the sums of a numeric column for each combination of ``keys``.
+
+        Arguments:
+            keys - Names of the columns to group by
+            column - Name of the numeric column to sum
+
+        Example::
+            >>> columns.sum_by('account')
+            {'111': 10.5, '222': 3.25}
+            >>> columns.sum_by('date', 'service')
+            {('2018-07-01', 'EC2'): 1.5, ...}
+
+        Returns: Dictionary of group value to sum. The group value is a tuple
+            when grouping by more than one key.
+        """
+        if not keys:
+            raise ValueError('At least one column to group by is required')
+        if not self._length:
+            return {}
+
+        if numpy is None:
+            return self._sum_by_python(keys, column)
+
+        uniques = []
+        codes = []
+        for key in keys:
+            unique, inverse = numpy.unique(
+                self._columns[key], return_inverse=True)
+            uniques.append(unique.tolist())
+            codes.append(inverse.ravel())
+
+        # Only the combinations present in the rows are numbered, the
+        # Cartesian product of the unique values of the keys may be huge
+        groups, group_codes = numpy.unique(
+            numpy.stack(codes, axis=1), axis=0, return_inverse=True)
+        sums = numpy.bincount(
+            group_codes.ravel(),
+            weights=numpy.asarray(self._columns[column], dtype=numpy.float64),
+            minlength=len(groups))
+
+        result = {}
+        for group_code, group_sum in zip(groups.tolist(), sums.tolist()):
+            group = tuple(
+                unique[index] for unique, index in zip(uniques, group_code))
+            result[group if len(keys) > 1 else group[0]] = group_sum
+        return result
+
+    def _sum_by_python(self, keys, column):
+        result = {}
+        values = self._columns[column]
+        if len(keys) == 1:
+            for group, value in zip(self._columns[keys[0]], values):
+                result[group] = result.get(group, 0.0) + float(value)
+        else:
+            groups = zip(*(self._columns[key] for key in keys))
+            for group, value in zip(groups, values):
+                result[group] = result.get(group, 0.0) + float(value)
+        return result
+
+    def sum_by_date(self, column='total'):
+        """Return the sums of a numeric column for each date."""
+        return self.sum_by('date', column=column)
@@ -0,0 +1,115 @@
+# coding=utf-8
+"""Hash index of the line items of a Koku report.
+
+Koku reports hold one line item per date and combination of group_by values.
+:class:`LineItemIndex` maps those keys to their line item, e.g.
+``('2018-07-01', '111', 'EC2')`` for a report grouped by account then service,
+so a line item is found without walking the report data. Each dimension is
+also indexed on its own to select the line items of one account, service or
+date.
+"""
+from hansei.exceptions import KokuException
+
+
+class LineItemIndex(object):
+    """Line items indexed by date and group_by values.
+
+    Example:
+        >>> index = LineItemIndex(report.iter_line_items(), ['account', 'service'])
+        >>> index.lookup('2018-07-01', '111', 'EC2')['total']
+        1.1
+        >>> index.lookup(date='2018-07-01', account='111', service='EC2')['total']
+        1.1
+        >>> [item['total'] for item in index.slice(account='111')]
+        [1.1, 1.35, 2.2, 2.45]
+    """
+
+    def __init__(self, line_items, group_keys=()):
+        """
+        Arguments:
+            line_items - Iterable of line item dictionaries, see
+                ``hansei.koku_models.KokuBaseReport.iter_line_items``
+            group_keys - Names of the group_by fields, in the order of the report group_by
+
+        :raises: KokuException if two line items have the same date and group_by values
+        """
+        self.dimensions = ('date',) + tuple(group_keys)
+        self._items = {}
+        # Dimension => value => line items, in report order
+        self._slices = {dimension: {} for dimension in self.dimensions}
+
+        for item in line_items:
+            key = tuple(item.get(dimension) for dimension in self.dimensions)
+            if key in self._items:
+                raise KokuException(
+                    'Several line items have the {} {}'.format(self.dimensions, key))
+            self._items[key] = item
+            for dimension, value in zip(self.dimensions, key):
+                self._slices[dimension].setdefault(value, []).append(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def _key(self, key, dimensions):
+        if key and dimensions:
+            raise TypeError('Pass the key either positionally or by dimension, not both')
+        if dimensions:
+            unknown = set(dimensions) - set(self.dimensions)
+            if unknown or len(dimensions) != len(self.dimensions):
+                raise TypeError('Expected the dimensions {}, got {}'.format(
+                    list(self.dimensions), sorted(dimensions)))
+            return tuple(dimensions[dimension] for dimension in self.dimensions)
+        if len(key) != len(self.dimensions):
+            raise TypeError('Expected a value for each of {}, got {}'.format(
+                list(self.dimensions), list(key)))
+        return tuple(key)
+
+    def lookup(self, *key, **dimensions):
+        """Return the line item of a date and group_by values.
+
+        The values are passed in the order of ``dimensions`` or by name.
+
+        :raises: KeyError if the report has no such line item
+        """
+        return self._items[self._key(key, dimensions)]
+
+    def get(self, *key, default=None, **dimensions):
+        """Return the line item of a date and group_by values, or ``default``."""
+        return self._items.get(self._key(key, dimensions), default)
+
+    def values(self, dimension):
+        """Return the distinct values of a dimension, in report order."""
+        return list(self._slices[dimension])
+
+    def slice(self, **criteria):
+        """Return the line items matching the values of some of the dimensions.
+
+        Example:
+            >>> index.slice(account='111')
+            >>> index.slice(date='2018-07-01', service='EC2')
+
+        Returns: List of line items in report order
+        """
+        if not criteria:
+            return list(self._items.values())
+
+        unknown = set(criteria) - set(self.dimensions)
+        if unknown:
+            raise KeyError('Unknown dimensions {}, expected some of {}'.format(
+                sorted(unknown), list(self.dimensions)))
+
+        # Start from the smallest slice and filter it on the other dimensions
+        candidates = [
+            self._slices[dimension].get(value, []) for dimension, value in criteria.items()]
+        smallest = min(candidates, key=len)
+        if len(criteria) == 1:
+            return list(smallest)
+        return [
+            item for item in smallest
+            if all(item.get(dimension) == value for dimension, value in criteria.items())]
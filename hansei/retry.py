@@ -0,0 +1,198 @@
+# coding=utf-8
+"""Retry and circuit breaker policies used by :class:`hansei.api.Client`.
+
+When the koku server is overloaded it answers with 429, 502, 503 or 504
+status codes. Instead of failing straight away, idempotent requests are sent
+again after an exponential, jittered delay. Once an endpoint keeps failing,
+its circuit is opened and requests to it fail fast until the server had some
+time to recover.
+
+Both policies can be configured in the hansei config file::
+
+    koku:
+        retry:
+            total: 3               # retries after the first attempt
+            backoff-factor: 0.5    # delays are 0.5s, 1s, 2s... with jitter
+            max-backoff: 30        # longest delay between two attempts
+            status-forcelist: [429, 502, 503, 504]
+            methods: [GET, HEAD, OPTIONS, PUT, DELETE]
+        circuit-breaker:
+            enabled: true          # the circuit breaker is off by default
+            failure-threshold: 5   # consecutive failures opening the circuit
+            reset-timeout: 30      # seconds before a request is tried again
+
+A failure is a connection error or a response with one of the statuses of
+the retry ``status-forcelist``.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from hansei import exceptions
+
+
+class RetryPolicy(object):
+    """Decide whether a request is retried and how long to wait before it."""
+
+    def __init__(
+            self, total=3, backoff_factor=0.5, max_backoff=30,
+            status_forcelist=(429, 502, 503, 504),
+            methods=('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')):
+        """
+        Arguments:
+            total - Number of retries after the first attempt. 0 disables retries
+            backoff_factor - Base of the exponential delay between attempts
+            max_backoff - Longest delay in seconds between two attempts,
+                including delays requested with a ``Retry-After`` header
+            status_forcelist - Response status codes that are retried
+            methods - Idempotent HTTP methods that are safe to send again
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = frozenset(status_forcelist)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Return a policy configured from the ``retry`` key of the ``koku`` config section."""
+        retry_cfg = cfg.get('retry', {})
+        policy = cls()
+        return cls(
+            total=int(retry_cfg.get('total', policy.total)),
+            backoff_factor=float(
+                retry_cfg.get('backoff-factor', policy.backoff_factor)),
+            max_backoff=float(retry_cfg.get('max-backoff', policy.max_backoff)),
+            status_forcelist=retry_cfg.get(
+                'status-forcelist', policy.status_forcelist),
+            methods=retry_cfg.get('methods', policy.methods),
+        )
+
+    def is_retryable(self, method, attempt, response=None):
+        """Return True if the request should be sent again.
+
+        Arguments:
+            method - HTTP method of the request
+            attempt - Number of retries already done for this request
+            response - Response received, or None if the connection failed
+        """
+        if attempt >= self.total or method.upper() not in self.methods:
+            return False
+        return response is None or response.status_code in self.status_forcelist
+
+    def backoff(self, attempt, response=None):
+        """Return the number of seconds to wait before the next attempt.
+
+        The ``Retry-After`` header of the response is honored when present.
+        Otherwise the delay is picked at random up to an exponentially
+        growing ceiling ("full jitter") so that clients do not retry in
+        lockstep.
+        """
+        retry_after = parse_retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+
+        ceiling = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(response):
+    """Return the delay in seconds requested by a ``Retry-After`` header, or None."""
+    if response is None:
+        return None
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0)
+
+
+class CircuitBreaker(object):
+    """Track failures per endpoint and fail fast while an endpoint is down.
+
+    An endpoint circuit opens after ``failure_threshold`` consecutive failed
+    requests. While it is open, :meth:`check` raises
+    ``hansei.exceptions.KokuCircuitOpen``. Once ``reset_timeout`` seconds
+    have passed a request is let through again: a success closes the circuit,
+    a failure opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Arguments:
+            failure_threshold - Consecutive failures opening the circuit. 0
+                disables the circuit breaker
+            reset_timeout - Seconds an open circuit waits before letting a
+                request through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Return a breaker configured from the ``circuit-breaker`` key of the ``koku`` config section.
+
+        The breaker never opens a circuit unless it is enabled.
+        """
+        breaker_cfg = cfg.get('circuit-breaker', {})
+        if not breaker_cfg.get('enabled', False):
+            return cls(failure_threshold=0)
+        breaker = cls()
+        return cls(
+            failure_threshold=int(breaker_cfg.get(
+                'failure-threshold', breaker.failure_threshold)),
+            reset_timeout=float(breaker_cfg.get(
+                'reset-timeout', breaker.reset_timeout)),
+        )
+
+    def check(self, endpoint):
+        """Raise if the circuit of ``endpoint`` is open.
+
+        :raises: ``hansei.exceptions.KokuCircuitOpen``
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(endpoint)
+            if opened_at is None:
+                return
+
+            remaining = opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise exceptions.KokuCircuitOpen(
+                    'The circuit for {} is open after {} consecutive failures. '
+                    'Requests are rejected for another {:.1f} seconds.'.format(
+                        endpoint, self._failures.get(endpoint, 0), remaining))
+
+            # Half open: let this request through and give the endpoint a
+            # new reset_timeout window if it fails again.
+            del self._opened_at[endpoint]
+
+    def record_success(self, endpoint):
+        """Close the circuit of ``endpoint``."""
+        with self._lock:
+            self._failures.pop(endpoint, None)
+            self._opened_at.pop(endpoint, None)
+
+    def record_failure(self, endpoint):
+        """Count a failure of ``endpoint``, opening its circuit at the threshold."""
+        if not self.failure_threshold:
+            return
+
+        with self._lock:
+            failures = self._failures.get(endpoint, 0) + 1
+            self._failures[endpoint] = failures
+            if failures >= self.failure_threshold:
+                self._opened_at[endpoint] = time.monotonic()
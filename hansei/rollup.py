@@ -0,0 +1,253 @@
+# coding=utf-8
+"""Local rollup of report line items into coarser reports.
+
+Many report queries are aggregations of each other: grouping by service then
+account holds the same sums as grouping by account then service, the last 10
+days are a slice of the last 30 days and a monthly report is the sum of the
+daily one. :func:`rollup` computes such a report locally from the line items of
+one fine grained report (daily, grouped by account and service), in the format
+returned by the Koku API, so that it can be checked against the server.
+
+Only the ``resolution``, ``time_scope_value`` and ``time_scope_units`` filters
+are supported. ``time_scope_value`` follows the Koku API: ``-10`` days are the
+last 10 days up to today, ``-1`` month is the current month and ``-2`` months
+the previous month.
+"""
+import datetime
+
+from hansei.aggregate import DEFAULT_SCALE_DIGITS, from_scaled, to_scaled
+from hansei.exceptions import KokuException
+
+
+ROLLUP_FILTERS = ('resolution', 'time_scope_value', 'time_scope_units')
+"""Report filters :func:`rollup` can compute."""
+
+
+def utc_today():
+    """Return the current UTC date, the date Koku computes the time windows from."""
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def last_date(report):
+    """Return the ``datetime.date`` of the newest day of a daily Koku report, or None.
+
+    Koku returns an entry for every day of the time window of a report, the
+    newest one is the date of the server when the report was computed.
+
+    Arguments:
+        report - Report dictionary, as returned by the Koku API
+    """
+    dates = [entry.get('date') or '' for entry in (report or {}).get('data') or []]
+    dates = [date[:10] for date in dates if len(date) >= 10]
+    if not dates:
+        return None
+    return datetime.datetime.strptime(max(dates), '%Y-%m-%d').date()
+
+
+def time_window(report_filter=None, today=None):
+    """Return the first and last dates, as ``YYYY-MM-DD`` strings, selected by a report filter.
+
+    Arguments:
+        report_filter - Dictionary of report filters, see ``KokuBaseReport.get``. Reports
+            without a time scope default to the last 10 days, as the Koku API does
+        today - ``datetime.date`` of the last day of the reports. Defaults to the current UTC
+            date
+
+    Returns: Tuple of the first and last dates
+    """
+    report_filter = report_filter or {}
+    today = today or utc_today()
+    units = report_filter.get('time_scope_units', 'day')
+    value = int(report_filter.get('time_scope_value', -10))
+    if value >= 0:
+        raise KokuException('time_scope_value must be negative, got {}'.format(value))
+
+    if units == 'day':
+        start = today - datetime.timedelta(days=-value - 1)
+        return start.isoformat(), today.isoformat()
+
+    if units == 'month':
+        month_start = today.replace(day=1)
+        for _ in range(-value - 1):
+            month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+        if value == -1:
+            end = today
+        else:
+            next_month = (month_start + datetime.timedelta(days=31)).replace(day=1)
+            end = next_month - datetime.timedelta(days=1)
+        return month_start.isoformat(), end.isoformat()
+
+    raise KokuException('Unsupported time_scope_units {!r}'.format(units))
+
+
+def check_source(source_filter, source_group_by, report_filter=None, group_by=None,
+                 today=None):
+    """Check that a report holds every line item of the report of another query.
+
+    The source report must be daily, not filtered beyond :data:`ROLLUP_FILTERS`, grouped by
+    every key of ``group_by`` with at least the groups it selects, and cover the time window of
+    ``report_filter``.
+
+    Arguments:
+        source_filter - Dictionary of the filters of the source report, as returned by Koku
+        source_group_by - Dictionary of the group_by of the source report, as returned by Koku
+        report_filter - Dictionary of report filters of the report to compute
+        group_by - List of ``[key, value]`` pairs of the report to compute, see :func:`rollup`
+        today - ``datetime.date`` of the last day of the reports. Defaults to the current UTC
+            date
+
+    :raises: KokuException if the source report can not be rolled up into the report
+    """
+    source_filter = source_filter or {}
+    source_group_by = source_group_by or {}
+
+    unsupported = set(source_filter) - set(ROLLUP_FILTERS)
+    if unsupported:
+        raise KokuException(
+            'Can not roll up a report filtered by {}'.format(sorted(unsupported)))
+    if source_filter.get('resolution', 'daily') != 'daily':
+        raise KokuException('Can only roll up daily reports, got resolution {!r}'.format(
+            source_filter['resolution']))
+
+    for key, value in group_by or []:
+        source_values = source_group_by.get(key)
+        if source_values is None:
+            raise KokuException('Can not group by {!r} a report grouped by {}'.format(
+                key, sorted(source_group_by)))
+        if not isinstance(source_values, (list, tuple)):
+            source_values = [source_values]
+        if '*' in source_values:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if '*' in values or not set(values) <= set(source_values):
+            raise KokuException('Can not select the {} groups {} from a report of the groups {}'
+                                .format(key, values, source_values))
+
+    start, end = time_window(report_filter, today=today)
+    source_start, source_end = time_window(source_filter, today=today)
+    if start < source_start or end > source_end:
+        raise KokuException(
+            'The report from {} to {} does not cover the time window from {} to {}'.format(
+                source_start, source_end, start, end))
+
+
+def rollup(line_items, report_filter=None, group_by=None, today=None,
+           scale_digits=DEFAULT_SCALE_DIGITS):
+    """Aggregate daily line items into a report of another group_by, time window or resolution.
+
+    Arguments:
+        line_items - Iterable of daily line item dictionaries holding a field for every key of
+            ``group_by``, see ``hansei.koku_models.KokuBaseReport.iter_line_items``
+        report_filter - Dictionary of report filters, see :data:`ROLLUP_FILTERS`
+        group_by - List of ``[key, value]`` pairs. The value is '*' for every group, or the
+            value, or list of values, of the groups to keep
+        today - ``datetime.date`` of the last day of the report. Defaults to the current UTC
+            date
+        scale_digits - Number of decimal digits kept when summing totals, see
+            ``hansei.aggregate``
+
+    Returns: Report dictionary with the 'filter', 'group_by', 'data' and 'total' keys of a Koku
+        report response. The data is nested by date, then by each group_by key in order.
+    """
+    report_filter = dict(report_filter or {})
+    group_by = [list(group) for group in group_by or []]
+    unsupported = set(report_filter) - set(ROLLUP_FILTERS)
+    if unsupported:
+        raise KokuException('Can not roll up the filters {}'.format(sorted(unsupported)))
+
+    resolution = report_filter.get('resolution', 'daily')
+    if resolution not in ('daily', 'monthly'):
+        raise KokuException('Unsupported resolution {!r}'.format(resolution))
+    start, end = time_window(report_filter, today=today)
+
+    keys = [key for key, _ in group_by]
+    selected = {}
+    for key, value in group_by:
+        if value != '*':
+            selected[key] = set(value) if isinstance(value, (list, tuple)) else {value}
+
+    # (date, group values..., units) => [scaled total, count, has count]
+    sums = {}
+    for item in line_items:
+        date = item.get('date') or ''
+        if not start <= date[:10] <= end:
+            continue
+        if any(item.get(key) not in values for key, values in selected.items()):
+            continue
+        if any(key not in item for key in keys):
+            raise KokuException(
+                'Can not group line items by {}, they only hold {}'.format(keys, sorted(item)))
+
+        period = date[:7] if resolution == 'monthly' else date[:10]
+        group = (period,) + tuple(item[key] for key in keys) + (item.get('units'),)
+        entry = sums.get(group)
+        if entry is None:
+            entry = sums[group] = [0, 0, False]
+        entry[0] += to_scaled(item.get('total'), scale_digits)
+        if 'count' in item:
+            entry[1] += item['count'] or 0
+            entry[2] = True
+
+    report = {
+        'filter': report_filter,
+        'group_by': {key: value if isinstance(value, list) else [value]
+                     for key, value in group_by},
+        'data': _nest(sums, keys, scale_digits),
+        'total': None,
+    }
+    report['total'] = _total(sums, scale_digits)
+    return report
+
+
+def _line_item(group, keys, entry, scale_digits):
+    period, units = group[0], group[-1]
+    item = {'date': period, 'units': units}
+    item.update(zip(keys, group[1:-1]))
+    item['total'] = float(from_scaled(entry[0], scale_digits))
+    if entry[2]:
+        item['count'] = entry[1]
+    return item
+
+
+def _nest(sums, keys, scale_digits):
+    """Nest the line items by date then by each group_by key, the way Koku does."""
+    data = []
+    # Path of the nodes of the last line item: the date node, then a node per key
+    path = []
+    last_group = None
+    for group in sorted(sums, key=lambda group: tuple(str(value) for value in group)):
+        # Number of leading levels shared with the previous line item
+        shared = 0
+        if last_group is not None:
+            while shared <= len(keys) and group[shared] == last_group[shared]:
+                shared += 1
+        del path[shared:]
+
+        for level in range(shared, len(keys) + 1):
+            if level == 0:
+                node = {'date': group[0]}
+                data.append(node)
+            else:
+                key = keys[level - 1]
+                node = {key: group[level]}
+                path[-1].setdefault(key + 's', []).append(node)
+            path.append(node)
+
+        path[-1].setdefault('values', []).append(
+            _line_item(group, keys, sums[group], scale_digits))
+        last_group = group
+    return data
+
+
+def _total(sums, scale_digits):
+    """Return the 'total' object of a report, None if it has no line items."""
+    if not sums:
+        return None
+    total = {'value': float(from_scaled(
+        sum(entry[0] for entry in sums.values()), scale_digits))}
+    units = {group[-1] for group in sums}
+    if len(units) == 1:
+        total['units'] = units.pop()
+    if any(entry[2] for entry in sums.values()):
+        total['count'] = sum(entry[1] for entry in sums.values())
+    return total
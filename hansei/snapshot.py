@@ -0,0 +1,216 @@
+# coding=utf-8
+"""Compact binary snapshots of Koku reports.
+
+A snapshot holds the line items of a report as columns, see
+:class:`hansei.report_columns.ReportColumns`, and a small JSON header with the
+filter, group_by, order_by and total of the report and the commit of the Koku
+server it was fetched from. Snapshots are memory mapped when loaded, so large
+historical reports are compared with later runs without parsing their JSON.
+
+The file layout, all integers little endian, is:
+
+* the magic ``b'HANSEISN'``, the format version (uint32) and the header length
+  in bytes (uint32),
+* the UTF-8 JSON header, padded with spaces to a multiple of 8 bytes,
+* the columns, each starting at an offset multiple of 8 bytes. Numeric columns
+  are float64 arrays. Text columns are uint32 arrays of codes into the list of
+  distinct values stored in the header.
+"""
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from hansei.exceptions import KokuException
+from hansei.report_columns import NUMERIC_COLUMNS, ReportColumns
+
+
+MAGIC = b'HANSEISN'
+VERSION = 1
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGNMENT = 8
+
+
+def _padding(size):
+    return -size % _ALIGNMENT
+
+
+def _float64_bytes(values):
+    if numpy is not None:
+        return numpy.asarray(values, dtype='<f8').tobytes()
+    data = array.array('d', values)
+    if sys.byteorder != 'little':  # pragma: no cover
+        data.byteswap()
+    return data.tobytes()
+
+
+def _uint32_bytes(values):
+    if numpy is not None:
+        return numpy.asarray(values, dtype='<u4').tobytes()
+    data = array.array('I', values)
+    if data.itemsize != 4:  # pragma: no cover
+        data = array.array('L', values)
+    if sys.byteorder != 'little':  # pragma: no cover
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_snapshot(path, columns, header):
+    """Write ``columns`` and ``header`` to a snapshot file.
+
+    The file is written to a temporary file first and renamed, so a snapshot is
+    never left half written.
+
+    Arguments:
+        path - Path of the snapshot file
+        columns - ``hansei.report_columns.ReportColumns`` of the line items
+        header - JSON serializable dictionary of report metadata
+    """
+    blobs = []
+    specs = []
+    for name in columns.names:
+        values = columns[name]
+        if name in NUMERIC_COLUMNS:
+            specs.append({'name': name, 'type': 'float64'})
+            blobs.append(_float64_bytes(values))
+        else:
+            values = [str(value) for value in values]
+            dictionary = sorted(set(values))
+            codes = {value: code for code, value in enumerate(dictionary)}
+            specs.append({'name': name, 'type': 'text', 'values': dictionary})
+            blobs.append(_uint32_bytes([codes[value] for value in values]))
+
+    header = dict(header, rows=len(columns), columns=specs)
+    # The offsets depend on the header length, which depends on the offsets. Reserve room for
+    # them with placeholders of the largest possible width first
+    for spec in specs:
+        spec['offset'] = 2 ** 63
+    header_size = len(json.dumps(header).encode('utf-8'))
+    header_size += _padding(_PREAMBLE.size + header_size)
+
+    offset = _PREAMBLE.size + header_size
+    for spec, blob in zip(specs, blobs):
+        spec['offset'] = offset
+        offset += len(blob) + _padding(len(blob))
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (header_size - len(header_bytes))
+
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'wb') as snapshot_file:
+        snapshot_file.write(_PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        snapshot_file.write(header_bytes)
+        for blob in blobs:
+            snapshot_file.write(blob)
+            snapshot_file.write(b'\0' * _padding(len(blob)))
+    os.replace(tmp_path, path)
+
+
+class Snapshot(object):
+    """A report snapshot loaded from a file, memory mapped.
+
+    The columns are read straight from the mapped file, so the snapshot must stay
+    open while they are used. Use it as a context manager or call :meth:`close`.
+    """
+
+    def __init__(self, path):
+        """
+        Arguments:
+            path - Path of the snapshot file
+
+        :raises: KokuException if the file is not a snapshot of a supported version
+        """
+        self.path = path
+        self._mmap = None
+        with open(path, 'rb') as snapshot_file:
+            # An empty file can not be mapped
+            if os.fstat(snapshot_file.fileno()).st_size < _PREAMBLE.size:
+                raise KokuException('{} is not a report snapshot'.format(path))
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_size = _PREAMBLE.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise KokuException('{} is not a report snapshot'.format(path))
+        if version != VERSION:
+            self.close()
+            raise KokuException('Unsupported report snapshot version {} in {}'.format(
+                version, path))
+
+        self.header = json.loads(
+            self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_size].decode('utf-8'))
+        self._columns = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.header['rows']
+
+    def close(self):
+        """Unmap the snapshot file"""
+        self._columns = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Arrays still point into the mapping, it is unmapped once they are collected
+                pass
+            self._mmap = None
+
+    @property
+    def filter(self):
+        return self.header.get('filter')
+
+    @property
+    def group_by(self):
+        return self.header.get('group_by')
+
+    @property
+    def order_by(self):
+        return self.header.get('order_by')
+
+    @property
+    def total(self):
+        return self.header.get('total')
+
+    @property
+    def commit(self):
+        """Git commit of the Koku server the report was fetched from"""
+        return self.header.get('commit')
+
+    def _read_column(self, spec):
+        rows = self.header['rows']
+        offset = spec['offset']
+        if spec['type'] == 'float64':
+            if numpy is not None:
+                return numpy.frombuffer(self._mmap, dtype='<f8', count=rows, offset=offset)
+            return memoryview(self._mmap)[offset:offset + rows * 8].cast('d')
+
+        if numpy is not None:
+            codes = numpy.frombuffer(self._mmap, dtype='<u4', count=rows, offset=offset)
+            return numpy.array(spec['values'], dtype=str)[codes]
+        codes = memoryview(self._mmap)[offset:offset + rows * 4].cast('I')
+        return [spec['values'][code] for code in codes]
+
+    def columns(self):
+        """Returns the ``hansei.report_columns.ReportColumns`` of the line items.
+
+        Numeric columns are read-only views of the mapped file.
+        """
+        if self._mmap is None:
+            raise KokuException('The snapshot {} is closed'.format(self.path))
+        if self._columns is None:
+            self._columns = ReportColumns({
+                spec['name']: self._read_column(spec) for spec in self.header['columns']})
+        return self._columns
@@ -45,7 +45,7 @@ class HanseiBaseTestAPI(object):
         uniq_string = fauxfactory.gen_string('alphanumeric', 8)
 
         if not new_customer.logged_in:
-            new_customer.login()
+            new_customer.login(lazy=True)
 
         return new_customer.create_user(
             username='user_{}'.format(uniq_string),
@@ -62,10 +62,8 @@ class HanseiBaseTestAPI(object):
             get('providers', {})if prov['type'] == 'AWS'][0]
 
         if not new_user.logged_in:
-            new_user.login()
+            new_user.login(lazy=True)
 
-        # TODO: Implement lazy authentication of the client for new
-        # KokuObject() fixtures
         provider = new_user.create_provider(
             name='Provider {} for user {}'.format(
                 uniq_string, new_user.username),
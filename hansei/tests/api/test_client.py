@@ -13,3 +13,22 @@ def test_api_client():
 
     response = client.server_status()
     assert len(response.json()) > 0, 'Server status is unavailable'
+
+
+def test_api_client_login_with_expired_token():
+    """The client logs in again without sending its expired token"""
+    koku_cfg = config.get_config().get('koku', {})
+
+    client = api.Client(username=koku_cfg.get('username'), password=koku_cfg.get('password'))
+    client.token = 'expired'
+
+    response = client.get_user()
+    assert response.json()['username'] == koku_cfg['username'], (
+        'The client did not log in again after its token expired')
+
+    # Send the login request even if the token cache holds a token
+    client.token_cache = None
+    client.token = 'expired'
+    response = client.login(koku_cfg.get('username'), koku_cfg.get('password'))
+    assert 'Authorization' not in response.request.headers, (
+        'The login request carried the expired token')
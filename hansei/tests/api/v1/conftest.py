@@ -0,0 +1,37 @@
+"""Pytest fixtures for the koku v1 api tests."""
+import pytest
+
+from hansei.koku_models import (
+    KokuCostReport,
+    KokuCustomer,
+    KokuInstanceReport,
+    KokuStorageReport,
+    ReportMatrix,
+)
+from hansei.tests.api.v1.report_params import (
+    REPORT_QUERY_PARAMS,
+    STORAGE_REPORT_QUERY_PARAMS,
+)
+
+
+@pytest.fixture(scope='session')
+def report_matrix():
+    """Reports of every query of the report tests, fetched concurrently as test_customer
+
+    The reports of a report class are only fetched when the first of them is used, so running
+    a single report module only downloads its own report type.
+    """
+    customer = KokuCustomer(
+        owner={'username': 'test_customer', 'password': 'str0ng!P@ss',
+               'email': 'foo@bar.com'})
+    customer.login()
+
+    matrix = ReportMatrix(
+        [KokuCostReport, KokuInstanceReport],
+        [param.values for param in REPORT_QUERY_PARAMS],
+        client=customer.client)
+    matrix.extend(
+        [KokuStorageReport], [param.values for param in STORAGE_REPORT_QUERY_PARAMS])
+    yield matrix
+
+    matrix.close()
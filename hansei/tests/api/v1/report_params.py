@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Query parameters shared by the report tests
+
+The report tests run against every query of these grids. The ``report_matrix`` fixture fetches
+the reports of all of them concurrently once per session.
+"""
+import pytest
+
+REPORT_QUERY_PARAMS = [
+    pytest.param(None, None, id='default'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+                 [['account', '*']], id='account_last_10_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+                 [['account', '*']], id='account_last_30_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+                 [['service', '*']], id='service_last_10_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+                 [['service', '*']], id='service_last_30_day'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_two_months_ago'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['service', '*']], id='service_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['service', '*']], id='service_two_months_ago'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_last_month-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_two_months_ago-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['service', '*']], id='service_last_month-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['service', '*']], id='service_two_months_ago-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_10_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_30_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+                 [['service', '*'], ['account', '*']], id='service_account_last_10_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+                 [['service', '*'], ['account', '*']], id='service_account_last_30_day'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_two_months_ago'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['service', '*'], ['account', '*']], id='service_account_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['service', '*'], ['account', '*']], id='service_account_two_months_ago'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_month-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_two_months_ago-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['service', '*'], ['account', '*']], id='service_account_last_month-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['service', '*'], ['account', '*']], id='service_account_two_months_ago-daily'),
+]
+
+# Storage reports can not be grouped by service only
+STORAGE_REPORT_QUERY_PARAMS = [
+    pytest.param(None, None, id='default'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+                 [['account', '*']], id='account_last_10_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+                 [['account', '*']], id='account_last_30_day'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_two_months_ago'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_last_month-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*']], id='account_two_months_ago-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_10_day'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_30_day'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_two_months_ago'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['service', '*'], ['account', '*']], id='service_account_last_month'),
+    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['service', '*'], ['account', '*']], id='service_account_two_months_ago'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_last_month-daily'),
+    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'},
+                 [['account', '*'], ['service', '*']], id='account_service_two_months_ago-daily'),
+]
@@ -5,54 +5,21 @@ The tests assume that the database is pre-populated with data including the
 Koku default 'test_customer' customer by running 'make oc-create-test-db-file'.
 """
 import pytest
-from hansei.koku_models import KokuCostReport, KokuCustomer
+from hansei.koku_models import KokuCostReport
+from hansei.tests.api.v1.report_params import REPORT_QUERY_PARAMS
 
 # Allowed deviation between the reported total cost and the summed up daily
 # costs.
 DEVIATION = 1
 
-pytest_param_all_query_param = [
-    pytest.param(None, None, id='default'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'}, [['account', '*']], id='account_last_10_day'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'}, [['account', '*']], id='account_last_30_day'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'}, [['service', '*']], id='service_last_10_day'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'}, [['service', '*']], id='service_last_30_day'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['account', '*']], id='account_last_month'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['account', '*']], id='account_two_months_ago'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['service', '*']], id='service_last_month'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['service', '*']], id='service_two_months_ago'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['account', '*']], id='account_last_month-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['account', '*']], id='account_two_months_ago-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['service', '*']], id='service_last_month-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['service', '*']], id='service_two_months_ago-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'}, [['account', '*'], ['service', '*']], id='account_service_last_10_day'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'}, [['account', '*'], ['service', '*']], id='account_service_last_30_day'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'}, [['service', '*'], ['account', '*']], id='service_account_last_10_day'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'}, [['service', '*'], ['account', '*']], id='service_account_last_30_day'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['account', '*'], ['service', '*']], id='account_service_last_month'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['account', '*'], ['service', '*']], id='account_service_two_months_ago'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['service', '*'], ['account', '*']], id='service_account_last_month'),
-    pytest.param({'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['service', '*'], ['account', '*']], id='service_account_two_months_ago'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['account', '*'], ['service', '*']], id='account_service_last_month-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['account', '*'], ['service', '*']], id='account_service_two_months_ago-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -1, 'time_scope_units': 'month'}, [['service', '*'], ['account', '*']], id='service_account_last_month-daily'),
-    pytest.param({'resolution': 'daily', 'time_scope_value': -2, 'time_scope_units': 'month'}, [['service', '*'], ['account', '*']], id='service_account_two_months_ago-daily'),
-]
-
-@pytest.mark.parametrize("report_filter,group_by", pytest_param_all_query_param)
-def test_validate_totalcost(report_filter, group_by):
+@pytest.mark.parametrize("report_filter,group_by", REPORT_QUERY_PARAMS)
+def test_validate_totalcost(report_matrix, report_filter, group_by):
     """
     Test to validate the total cost across daily and monthly query parameters.
     The total cost should be equal to the sum of all the daily costs
     """
 
-    # Login as test_customer
-    customer = KokuCustomer(
-        owner={'username': 'test_customer', 'password': 'str0ng!P@ss', 'email': 'foo@bar.com'})
-
-    customer.login()
-    report = KokuCostReport(customer.client)
-    report.get(report_filter=report_filter, group_by=group_by)
+    report = report_matrix.report(KokuCostReport, report_filter, group_by)
 
     # Calculate sum of daily costs
     cost_sum = report.calculate_total()
@@ -66,3 +33,34 @@ def test_validate_totalcost(report_filter, group_by):
             report.total['value'] + DEVIATION, (
             'Report total is not equal to the sum of daily costs')
 
+
+# Daily report every day window query of the grid can be rolled up from
+FINEST_QUERY = (
+    {'resolution': 'daily', 'time_scope_value': -30, 'time_scope_units': 'day'},
+    [['account', '*'], ['service', '*']])
+
+
+@pytest.mark.parametrize("report_filter,group_by", [
+    param for param in REPORT_QUERY_PARAMS
+    if param.values[0] and param.values[0]['time_scope_units'] == 'day'])
+def test_validate_rollup(report_matrix, report_filter, group_by):
+    """
+    Test that the reports of the last days match the ones computed locally from the
+    daily report of the last 30 days grouped by account and service
+    """
+    finest_report = report_matrix.report(KokuCostReport, *FINEST_QUERY)
+    report = report_matrix.report(KokuCostReport, report_filter, group_by)
+    rolled_up = finest_report.rollup(report_filter=report_filter, group_by=group_by)
+
+    if report.calculate_total() is None:
+        assert rolled_up.calculate_total() is None, (
+            'The rolled up report has costs but the report has none')
+        return
+
+    assert abs(report.calculate_total() - rolled_up.calculate_total()) <= DEVIATION, (
+        'Report total is not equal to the total rolled up from the daily report')
+
+    rolled_up_daily_costs = rolled_up.columns().sum_by_date()
+    for date, cost in report.columns().sum_by_date().items():
+        assert abs(cost - rolled_up_daily_costs.get(date, 0)) <= DEVIATION, (
+            'Cost of {} is not equal to the cost rolled up from the daily report'.format(date))
@@ -46,8 +46,10 @@ class TestCustomerCrud(HanseiBaseTestAPI):
         # TODO : In future, verify that the user and provider data has been
         # deleted from the DB
 
+        # The token of the deleted user may still be cached, check that the
+        # server itself refuses the login
         try:
-            new_user.login()
+            new_user.login(use_cache=False)
             assert 0, "User data was not deleted from Koku"
         except HTTPError:
             pass
@@ -26,9 +26,8 @@ class TestUserCrud(object):
             'email': 'owner_{0}@{0}.com'.format(uniq_string),
             'password': 'redhat', }
 
-        #TODO: Implement lazy authentication of the client for new KokuObject()
         customer = service_admin.create_customer(name=name, owner=owner)
-        customer.login()
+        customer.login(lazy=True)
         assert customer.uuid, 'No customer uuid created for customer'
 
         yield customer
@@ -40,7 +39,6 @@ class TestUserCrud(object):
         """Create a new Koku user without authenticating to the server"""
         uniq_string = fauxfactory.gen_string('alphanumeric', 8)
 
-        #TODO: Implement lazy authentication of the client for new KokuObject() fixtures
         user = customer.create_user(
             username='user_{}'.format(uniq_string),
             email='user_{0}@{0}.com'.format(uniq_string),
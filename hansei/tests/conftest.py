@@ -1,8 +1,147 @@
 """
 Global pytest plugins and hooks
 """
-from hansei import config as hansei_config, api as hansei_api
-from requests.exceptions import HTTPError
+import json
+import threading
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+from hansei import config as hansei_config, api as hansei_api, metrics as hansei_metrics
+from hansei import koku_models as hansei_models
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+
+
+OFFLINE_URL = 'http://koku.test/api/v1/'
+
+
+class FakeResponse(requests.Response):
+    """A ``requests.Response`` remembering whether it was closed"""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+class FakeSession(object):
+    """Stand-in for ``requests.Session`` answering requests from a queue
+
+    Queue the answers with :meth:`respond` or :meth:`fail`, in the order the
+    requests are sent. The prepared requests are kept in ``requests`` and the
+    responses in ``responses``.
+    """
+
+    def __init__(self):
+        self.answers = []
+        self.requests = []
+        self.responses = []
+
+    def respond(self, status_code=200, body=None, headers=None):
+        """Queue a response with ``body`` encoded as JSON"""
+        self.answers.append((status_code, body, headers or {}))
+
+    def fail(self, error=None):
+        """Queue an exception raised instead of answering"""
+        self.answers.append(error or requests.ConnectionError('connection refused'))
+
+    def request(self, method, url, **kwargs):
+        prepared = requests.Request(
+            method, url, headers=kwargs.get('headers'), params=kwargs.get('params'),
+            json=kwargs.get('json')).prepare()
+        self.requests.append(prepared)
+
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+
+        status_code, body, headers = answer
+        response = FakeResponse()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = b'' if body is None else json.dumps(body).encode('utf-8')
+        response._content_consumed = True
+        response.encoding = 'utf-8'
+        response.url = prepared.url
+        response.request = prepared
+        self.responses.append(response)
+        return response
+
+    def close(self):
+        pass
+
+
+class RoutedSession(FakeSession):
+    """A :class:`FakeSession` answering each path with its own answer
+
+    The answers are slow so that concurrent requests overlap, and the
+    largest number of requests in flight is kept in ``peak``.
+    """
+
+    def __init__(self, routes, delay=0.02):
+        super().__init__()
+        self.routes = routes
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def request(self, method, url, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            # time.sleep does not wait in the offline tests
+            threading.Event().wait(self.delay)
+            with self.lock:
+                self.answers.append(self.routes[urlsplit(url).path])
+                return super().request(method, url, **kwargs)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def offline_config(monkeypatch):
+    """Replace the hansei config file by a ``koku`` section of a fake server
+
+    Returns the ``koku`` section, update it before building any client. The
+    process wide caches, retry and circuit breaker objects are built again
+    from it, and the requests are recorded in a metrics registry of their own.
+    """
+    koku_cfg = {
+        'hostname': 'koku.test',
+        'username': 'admin',
+        'password': 'pass',
+        'retry': {'backoff-factor': 0},
+        'json-decoder': 'json',
+    }
+    monkeypatch.setattr(hansei_config, '_CONFIG', {'koku': koku_cfg})
+    monkeypatch.setattr(hansei_api, '_CIRCUIT_BREAKER', None)
+    monkeypatch.setattr(hansei_api, '_DECODER', None)
+    monkeypatch.setattr(hansei_api, '_HTTP_CACHE', hansei_api._NOT_BUILT)
+    monkeypatch.setattr(hansei_models, '_REPORT_CACHE', hansei_models._NOT_BUILT)
+    monkeypatch.setattr(hansei_models, '_IDENTITY_MAP', hansei_models._NOT_BUILT)
+    monkeypatch.setattr(hansei_metrics, '_REGISTRY', hansei_metrics.MetricsRegistry())
+    monkeypatch.setattr(hansei_api.time, 'sleep', lambda seconds: None)
+    return koku_cfg
+
+
+@pytest.fixture
+def fake_session(offline_config, monkeypatch):
+    """A :class:`FakeSession` shared by the clients built during the test"""
+    session = FakeSession()
+    monkeypatch.setattr(hansei_api, '_SESSION', session)
+    return session
+
+
+def _format_seconds(seconds):
+    return '{:.0f}ms'.format(seconds * 1000) if seconds is not None else '-'
+
 
 def pytest_report_header(config):
     """Display the api version and git commit the koku server is running under"""
@@ -24,7 +163,44 @@ def pytest_report_header(config):
             config._xml.add_global_property('Koku Git Commit', server_status['commit'])
             config._xml.add_global_property('Koku Python Version', server_status['python_version'])
 
-    except HTTPError:
+    except RequestException:
         report_header = " - Unable to retrieve the server status"
 
     return "Koku Server Info:\n{}".format(report_header)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Display the latency percentiles of each Koku endpoint used during the run"""
+    summary = hansei_metrics.get_registry().summary()
+    if not summary:
+        return
+
+    terminalreporter.write_sep('=', 'Koku API latency')
+    row_format = '{:<8} {:<45} {:>7} {:>7} {:>8} {:>8} {:>8} {:>8}'
+    terminalreporter.write_line(row_format.format(
+        'method', 'endpoint', 'count', 'errors', 'retries', 'p50', 'p95', 'p99'))
+    for row in summary:
+        terminalreporter.write_line(row_format.format(
+            row.method, row.endpoint, row.count, row.errors, row.retries,
+            _format_seconds(row.p50), _format_seconds(row.p95),
+            _format_seconds(row.p99)))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session, exitstatus):
+    """Add the endpoint latencies to the junitxml report and close the pooled
+    connections shared by all of the api clients
+
+    This runs before the junitxml plugin writes the report.
+    """
+    config = session.config
+    if config.pluginmanager.hasplugin("junitxml") and hasattr(config, '_xml'):
+        for row in hansei_metrics.get_registry().summary():
+            config._xml.add_global_property(
+                'Koku API {} {}'.format(row.method, row.endpoint),
+                'count={} errors={} retries={} p50={} p95={} p99={}'.format(
+                    row.count, row.errors, row.retries,
+                    _format_seconds(row.p50), _format_seconds(row.p95),
+                    _format_seconds(row.p99)))
+
+    hansei_api.close_session()
@@ -0,0 +1,98 @@
+"""
+Tests of the exact aggregation of the line item totals, they do not need a Koku server
+"""
+from decimal import Decimal
+
+import pytest
+
+from hansei.aggregate import aggregate, from_scaled, to_scaled
+from hansei.koku_models import KokuCostReport
+
+
+@pytest.mark.parametrize('value,scaled', [
+    (None, 0),
+    (0, 0),
+    (3, 3000000),
+    (-2, -2000000),
+    (1.5, 1500000),
+    (0.1, 100000),
+    (0.0000004, 0),
+    (0.0000006, 1),
+    ('12.345678', 12345678),
+    ('0.0000005', 0),
+    ('0.0000015', 2),
+    ('-0.0000025', -2),
+    ('1e-3', 1000),
+    (Decimal('2.0000035'), 2000004),
+])
+def test_to_scaled(value, scaled):
+    """Strings and decimals are rounded half to even, floats to the nearest unit"""
+    assert to_scaled(value) == scaled
+
+
+def test_scale_digits():
+    assert to_scaled('1.25', 2) == 125
+    assert to_scaled('1.255', 2) == 126
+    assert from_scaled(125, 2) == Decimal('1.25')
+
+
+@pytest.mark.parametrize('value', ['0', '12.345678', '-7.000001', '123456789.5'])
+def test_round_trip(value):
+    assert from_scaled(to_scaled(value)) == Decimal(value)
+
+
+def test_aggregate():
+    line_items = [
+        {'units': 'USD', 'total': 0.1, 'count': 2},
+        {'units': 'USD', 'total': 0.2},
+        {'units': 'USD', 'total': '0.3', 'count': None},
+        {'units': 'USD', 'total': None, 'count': 1},
+        {'units': 'GB-Mo', 'total': 5},
+        {'units': 'GB-Mo'},
+    ]
+
+    result = aggregate(line_items)
+
+    # Summing the floats would give 0.6000000000000001
+    assert result.total == Decimal('5.6')
+    assert result.items == 6
+    assert result.count == 3
+    assert result.subtotals == {'USD': Decimal('0.6'), 'GB-Mo': Decimal('5')}
+
+
+def test_aggregate_without_line_items():
+    assert aggregate([]) == (None, 0, 0, {})
+    assert aggregate(iter([])).total is None
+
+
+def test_calculate_total_of_nested_report():
+    report = KokuCostReport(client=object())
+    report.last_report = {'data': [
+        {'date': '2018-07-01', 'accounts': [
+            {'account': '111', 'services': [
+                {'service': 'EC2', 'values': [{'units': 'USD', 'total': 0.1}]},
+                {'service': 'S3', 'values': [{'units': 'USD', 'total': '0.2'}]},
+            ]},
+            {'account': '222', 'services': []},
+        ]},
+        {'date': '2018-07-02', 'accounts': [
+            {'account': '111', 'services': [
+                {'service': 'EC2', 'values': [{'units': 'USD', 'total': None}]},
+                {'service': 'S3', 'values': [{'units': 'USD', 'total': 1e-7}]},
+            ]},
+        ]},
+    ]}
+
+    expected = sum(
+        Decimal(str(item['total'] or 0)).quantize(Decimal('0.000001'))
+        for item in report.iter_line_items())
+    assert report.calculate_total() == expected == Decimal('0.3')
+    assert report.aggregate().total == report.calculate_total()
+    assert report.aggregate().items == 4
+
+
+def test_calculate_total_without_data():
+    report = KokuCostReport(client=object())
+    assert report.calculate_total() is None
+    report.last_report = {'data': []}
+    assert report.calculate_total() is None
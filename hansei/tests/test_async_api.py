@@ -0,0 +1,39 @@
+"""
+Tests of the translation of Requests' arguments for aiohttp, they do not need a Koku server
+"""
+import ssl
+
+import pytest
+import requests.certs
+
+from hansei import async_api
+
+
+@pytest.mark.parametrize('timeout,connect,read', [
+    (None, None, None),
+    (5, 5, 5),
+    ((3.05, 27), 3.05, 27),
+    ([1, None], 1, None),
+])
+def test_client_timeout(timeout, connect, read):
+    client_timeout = async_api.client_timeout(timeout)
+
+    assert client_timeout.total is None
+    assert client_timeout.sock_connect == connect
+    assert client_timeout.sock_read == read
+
+
+def test_ssl_option():
+    assert async_api.ssl_option() is None
+    assert async_api.ssl_option(False) is False
+
+    context = async_api.ssl_option(True)
+    assert context.verify_mode == ssl.CERT_REQUIRED
+
+
+def test_ssl_option_ca_bundle():
+    """A CA bundle path is loaded in the context"""
+    context = async_api.ssl_option(requests.certs.where())
+
+    assert context.verify_mode == ssl.CERT_REQUIRED
+    assert context.cert_store_stats()['x509_ca'] > 0
@@ -0,0 +1,78 @@
+"""
+Tests of the batches of concurrent requests, they do not need a Koku server
+"""
+from urllib.parse import urlsplit
+
+import pytest
+
+from hansei import api
+from hansei.tests.conftest import OFFLINE_URL, RoutedSession
+
+
+@pytest.fixture
+def routes(offline_config, monkeypatch):
+    """Paths answered by the session shared by the clients"""
+    routes = {}
+    monkeypatch.setattr(api, '_SESSION', RoutedSession(routes))
+    return routes
+
+
+def path(endpoint):
+    return urlsplit(OFFLINE_URL + endpoint).path
+
+
+def test_results_in_call_order(routes):
+    for number in range(8):
+        routes[path('providers/{}/'.format(number))] = (200, {'id': number}, {})
+    client = api.Client(authenticate=False, response_handler=api.json_handler)
+
+    results = client.batch(
+        [('GET', 'providers/{}/'.format(number)) for number in reversed(range(8))])
+
+    assert all(result.ok for result in results)
+    assert [result.result['id'] for result in results] == list(reversed(range(8)))
+
+
+def test_errors_captured_per_call(routes):
+    routes[path('customers/')] = (201, {'uuid': 'new'}, {})
+    routes[path('users/gone/')] = (404, {'detail': 'Not found.'}, {})
+    routes[path('status/')] = api.requests.ConnectionError('connection refused')
+    client = api.Client(authenticate=False)
+
+    results = client.batch([
+        ('POST', 'customers/', {'json': {'name': 'new'}}),
+        ('DELETE', 'users/gone/'),
+        ('GET', 'status/'),
+    ])
+
+    assert [result.ok for result in results] == [True, False, False]
+    assert results[0].result.status_code == 201
+    assert results[0].error is None
+    assert isinstance(results[1].error, api.HTTPError)
+    assert results[1].result is None
+    assert isinstance(results[2].error, api.requests.ConnectionError)
+
+
+def test_max_workers_caps_requests_in_flight(routes):
+    for number in range(12):
+        routes[path('providers/{}/'.format(number))] = (200, {}, {})
+    client = api.Client(authenticate=False)
+    calls = [('GET', 'providers/{}/'.format(number)) for number in range(12)]
+
+    client.batch(calls, max_workers=3)
+    assert client.session.peak == 3
+
+    client.session.peak = 0
+    client.batch(calls, max_workers=1)
+    assert client.session.peak == 1
+
+
+def test_max_workers_defaults_to_pool_size(offline_config, routes):
+    offline_config['pool-maxsize'] = 2
+    for number in range(6):
+        routes[path('providers/{}/'.format(number))] = (200, {}, {})
+    client = api.Client(authenticate=False)
+
+    client.batch([('GET', 'providers/{}/'.format(number)) for number in range(6)])
+
+    assert client.session.peak == 2
@@ -0,0 +1,66 @@
+"""
+Tests of the conditional GET cache of the api client, they do not need a Koku server
+"""
+import pytest
+
+from hansei import api
+
+
+@pytest.fixture
+def client(offline_config, fake_session):
+    offline_config['http-cache'] = {'enabled': True, 'ttl': 60}
+    client = api.Client(response_handler=api.json_handler, authenticate=False)
+    client.token = 'token'
+    return client
+
+
+def test_get_served_from_cache(client, fake_session):
+    """A response without validators is served without a request until its ttl"""
+    fake_session.respond(200, {'x': 1})
+
+    assert client.get('customers/') == {'x': 1}
+    assert client.get('customers/') == {'x': 1}
+    assert len(fake_session.requests) == 1
+
+
+def test_get_revalidated_with_etag(client, fake_session):
+    """A response with an ETag is revalidated and reused on a 304"""
+    fake_session.respond(200, {'x': 1}, headers={'ETag': '"v1"'})
+    fake_session.respond(304)
+
+    assert client.get('reports/costs/') == {'x': 1}
+    assert client.get('reports/costs/') == {'x': 1}
+    assert fake_session.requests[1].headers['If-None-Match'] == '"v1"'
+
+
+@pytest.mark.parametrize('method', ['DELETE', 'PUT', 'PATCH', 'POST'])
+def test_unsafe_method_invalidates_url_and_collection(client, fake_session, method):
+    """A GET after a successful change of the url is sent to the server"""
+    url = 'customers/0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1/'
+    fake_session.respond(200, {'x': 1})
+    fake_session.respond(200, [{'x': 1}])
+    client.get(url)
+    client.get('customers/', params={'limit': 10})
+
+    fake_session.respond(200, {})
+    client.request(method, client.url + url, json={'x': 2})
+
+    fake_session.respond(404, {'detail': 'Not found.'})
+    fake_session.respond(200, [])
+    with pytest.raises(api.HTTPError):
+        client.get(url)
+    assert client.get('customers/', params={'limit': 10}) == []
+    assert len(fake_session.requests) == 5
+
+
+def test_failed_unsafe_method_keeps_cache(client, fake_session):
+    """A change rejected by the server leaves the cached responses"""
+    url = 'customers/0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1/'
+    fake_session.respond(200, {'x': 1})
+    fake_session.respond(403, {'detail': 'Forbidden'})
+    client.get(url)
+    with pytest.raises(api.HTTPError):
+        client.delete(url)
+
+    assert client.get(url) == {'x': 1}
+    assert len(fake_session.requests) == 2
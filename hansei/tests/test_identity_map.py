@@ -0,0 +1,98 @@
+"""
+Tests of the identity map of the Koku models, they do not need a Koku server
+"""
+import pytest
+
+from hansei import api
+from hansei.koku_models import KokuCustomer, KokuServiceAdmin, get_identity_map
+
+
+UUID = '0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1'
+CUSTOMER = {'uuid': UUID, 'name': 'Customer',
+            'owner': {'username': 'owner', 'email': 'owner@example.com'}}
+
+
+def new_admin(username):
+    client = api.Client(authenticate=False)
+    client.token = 'token {}'.format(username)
+    client.username = username
+    return KokuServiceAdmin(client=client)
+
+
+@pytest.fixture
+def admin(offline_config, fake_session):
+    offline_config['identity-map'] = {'enabled': True, 'ttl': 60}
+    return new_admin('admin')
+
+
+def test_same_object_for_same_uuid(admin, fake_session):
+    fake_session.respond(200, CUSTOMER)
+
+    customer = admin.read_customer(UUID)
+
+    assert admin.read_customer(UUID) is customer
+    assert len(fake_session.requests) == 1
+    assert get_identity_map().hits == 1
+
+
+def test_objects_are_kept_per_identity(admin, fake_session):
+    """An object read by another user is not shared"""
+    other = new_admin('other')
+    fake_session.respond(200, CUSTOMER)
+    fake_session.respond(200, CUSTOMER)
+
+    customer = admin.read_customer(UUID)
+    other_customer = other.read_customer(UUID)
+
+    assert other_customer is not customer
+    assert len(fake_session.requests) == 2
+
+
+def test_update_forgets_object(admin, fake_session):
+    fake_session.respond(200, CUSTOMER)
+    customer = admin.read_customer(UUID)
+
+    customer.name = 'Renamed'
+    fake_session.respond(200, dict(CUSTOMER, name='Renamed'))
+    customer._update()
+
+    fake_session.respond(200, dict(CUSTOMER, name='Renamed'))
+    assert admin.read_customer(UUID) is not customer
+    assert [request.method for request in fake_session.requests] == ['GET', 'PATCH', 'GET']
+
+
+def test_delete_forgets_object(admin, fake_session):
+    fake_session.respond(200, CUSTOMER)
+    customer = admin.read_customer(UUID)
+
+    fake_session.respond(204)
+    admin.delete_customer(UUID)
+
+    fake_session.respond(404, {'detail': 'Not found.'})
+    with pytest.raises(api.HTTPError):
+        admin.read_customer(UUID)
+    assert customer.uuid == UUID
+
+
+def test_list_row_upgraded_to_model(admin, fake_session):
+    """A row of a list call is read without a request and replaced by the model"""
+    fake_session.respond(
+        200, {'count': 1, 'next': None, 'previous': None, 'results': [CUSTOMER]})
+    records = admin.list_customers()
+
+    customer = admin.read_customer(UUID)
+
+    assert isinstance(customer, KokuCustomer)
+    assert customer.fields() == records[0].payload()
+    assert customer.changed_fields() == {}
+    assert admin.read_customer(UUID) is customer
+    assert len(fake_session.requests) == 1
+
+
+def test_map_disabled(offline_config, fake_session):
+    admin = new_admin('admin')
+    fake_session.respond(200, CUSTOMER)
+    fake_session.respond(200, CUSTOMER)
+
+    assert get_identity_map() is None
+    assert admin.read_customer(UUID) is not admin.read_customer(UUID)
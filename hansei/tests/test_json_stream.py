@@ -0,0 +1,111 @@
+"""
+Tests of the incremental JSON parser, they do not need a Koku server
+"""
+import json
+
+import pytest
+
+from hansei import json_stream
+
+
+DOCUMENT = json.dumps({
+    'strings': ['', 'plain', 'quote " and backslash \\', 'escapes \n\té', 'café',
+                '€', '\U0001d11e', 'mixed é€\U0001d11e'],
+    'numbers': [0, -1, 7, 1234567890, 12.5, -0.25, 1e-07, -3.25e+10, 6.02E23],
+    'literals': [True, False, None],
+    'nested': {'empty_map': {}, 'empty_array': [], 'deep': [[{'é': [1, {'k': None}]}]]},
+}, ensure_ascii=False, indent=1).encode('utf-8')
+
+REPORT = json.dumps({
+    'group_by': {'account': ['*']},
+    'filter': {'resolution': 'daily'},
+    'data': [
+        {'date': '2018-07-01', 'accounts': [
+            {'account': '111', 'values': [
+                {'date': '2018-07-01', 'account': '111', 'units': 'USD', 'total': 1.5}]},
+            {'account': 'é€', 'values': [
+                {'date': '2018-07-01', 'account': 'é€', 'units': 'USD', 'total': 2}]},
+        ]},
+        {'date': '2018-07-02', 'values': []},
+    ],
+    'total': {'value': 3.5, 'units': 'USD'},
+}, ensure_ascii=False).encode('utf-8')
+
+PARSERS = [pytest.param(json_stream._basic_parse, id='python')]
+if json_stream.ijson is not None:
+    PARSERS.append(pytest.param(json_stream.basic_parse, id='ijson'))
+
+
+def split(document, size):
+    """Split ``document`` in chunks of ``size`` bytes"""
+    return [document[start:start + size] for start in range(0, len(document), size)]
+
+
+def parse(parser, chunks):
+    """Return the value built from the events of ``parser``"""
+    events = iter(parser(chunks))
+    value = json_stream.build_value(*next(events), events)
+    assert next(events, None) is None, 'Events were emitted after the document'
+    return value
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_parse_chunk_boundaries(parser):
+    """The document is parsed the same whichever byte the chunks are split at"""
+    expected = json.loads(DOCUMENT.decode('utf-8'))
+    whole = list(parser([DOCUMENT]))
+
+    # Chunks of 1 to 7 bytes split every string, number, literal and multibyte character
+    for size in range(1, 8):
+        assert list(parser(split(DOCUMENT, size))) == whole, (
+            'The events differ for chunks of {} bytes'.format(size))
+        assert parse(parser, split(DOCUMENT, size)) == expected, (
+            'The document differs for chunks of {} bytes'.format(size))
+
+    # A single boundary at each byte, with an empty chunk in between
+    for position in range(len(DOCUMENT)):
+        chunks = [DOCUMENT[:position], b'', DOCUMENT[position:]]
+        assert list(parser(chunks)) == whole, (
+            'The events differ for a chunk boundary at byte {}'.format(position))
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_parse_number_types(parser):
+    """Integers are returned as int and other numbers as float"""
+    values = parse(parser, split(b'[10, -3, 1.0, 2e3, -0.5E-2]', 2))
+
+    assert values == [10, -3, 1.0, 2000.0, -0.005]
+    assert [type(value) for value in values] == [int, int, float, float, float]
+
+
+@pytest.mark.parametrize('document', [
+    '[1 2]', '{"a" 1}', '{"a": 1 "b": 2}', '{"a", 1}', '[1: 2]', '[1,]', '{"a": 1,}', '[,1]',
+    '[1,,2]', '{1: 2}', '{"a"}', '{"a":}', '[1]]', '[1}', '1 2', '"a" "b"', '[] []', '[',
+    '{"a": [1, 2]', '"unterminated', '', '01', '1.', '-', 'tru', 'nul', '[truex]',
+])
+def test_parse_invalid_document(document):
+    """Invalid JSON raises a ValueError whichever byte the chunks are split at"""
+    for size in (1, 2, len(document) or 1):
+        with pytest.raises(ValueError):
+            list(json_stream._basic_parse(split(document.encode('utf-8'), size)))
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_iter_report_line_items(parser):
+    """The line items are yielded and the other top level fields are stored in the report"""
+    expected = json.loads(REPORT.decode('utf-8'))
+
+    for size in (1, 3, len(REPORT)):
+        report = {}
+        line_items = list(json_stream.iter_report_line_items(
+            parser(split(REPORT, size)), report))
+
+        assert line_items == [
+            expected['data'][0]['accounts'][0]['values'][0],
+            expected['data'][0]['accounts'][1]['values'][0],
+        ], 'The line items differ for chunks of {} bytes'.format(size)
+        assert report == {
+            'group_by': expected['group_by'],
+            'filter': expected['filter'],
+            'total': expected['total'],
+        }, 'The report fields differ for chunks of {} bytes'.format(size)
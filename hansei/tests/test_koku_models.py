@@ -0,0 +1,153 @@
+"""
+Tests of the Koku models, they do not need a Koku server
+"""
+import json
+
+import pytest
+
+from hansei import api
+from hansei.tests.conftest import RoutedSession
+from hansei.koku_models import (
+    KokuCostReport,
+    KokuInstanceReport,
+    KokuServiceAdmin,
+    KokuStorageReport,
+    KokuUser,
+    ReportMatrix,
+)
+
+
+UUIDS = [
+    '0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1',
+    '1f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a2',
+    '2f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a3',
+]
+
+
+@pytest.fixture
+def client(fake_session):
+    client = api.Client(authenticate=False)
+    client.token = 'token'
+    return client
+
+
+@pytest.fixture
+def user(client):
+    """A user loaded from the server"""
+    user = KokuUser(client=client)
+    user.load({'uuid': UUIDS[0], 'username': 'user', 'email': 'user@example.com'})
+    return user
+
+
+def test_delete_customers(client, fake_session, monkeypatch):
+    """The customers are deleted with the client of the service admin"""
+    admin = KokuServiceAdmin(client=client)
+    for _ in UUIDS:
+        fake_session.respond(204)
+
+    def new_client(*args, **kwargs):
+        raise AssertionError('A client was built for a deleted customer')
+    monkeypatch.setattr(api, 'Client', new_client)
+
+    results = admin.delete_customers(UUIDS, max_workers=2)
+
+    assert [result.ok for result in results] == [True] * len(UUIDS)
+    assert [result.result.status_code for result in results] == [204] * len(UUIDS)
+    assert sorted(request.path_url for request in fake_session.requests) == [
+        '/api/v1/customers/{}/'.format(uuid) for uuid in UUIDS]
+
+
+def test_update_unchanged(user, fake_session):
+    """No request is sent when no field changed"""
+    assert user.changed_fields() == {}
+    assert user._update() is None
+    assert not fake_session.requests
+
+
+def test_update_sends_changed_fields(user, fake_session):
+    """Only the changed fields are sent in a PATCH request"""
+    user.email = 'new@example.com'
+    fake_session.respond(200, {'uuid': UUIDS[0]})
+
+    assert user._update().status_code == 200
+    request, = fake_session.requests
+    assert request.method == 'PATCH'
+    assert request.path_url == '/api/v1/users/{}/'.format(UUIDS[0])
+    assert json.loads(request.body) == {'email': 'new@example.com'}
+
+    # The saved fields are clean again
+    assert user._update() is None
+    assert len(fake_session.requests) == 1
+
+
+def test_update_falls_back_to_put(user, fake_session):
+    """The whole payload is sent in a PUT request if PATCH is not allowed"""
+    user.email = 'new@example.com'
+    fake_session.respond(405, {'detail': 'Method "PATCH" not allowed.'})
+    fake_session.respond(200, {'uuid': UUIDS[0]})
+
+    assert user._update().status_code == 200
+    patch, put = fake_session.requests
+    assert patch.method == 'PATCH'
+    assert put.method == 'PUT'
+    assert json.loads(put.body) == {
+        'username': 'user', 'email': 'new@example.com', 'password': None}
+    assert user.changed_fields() == {}
+
+
+def test_update_failure_keeps_changes(user, fake_session):
+    """The fields stay changed when the server rejects the update"""
+    user.email = 'new@example.com'
+    fake_session.respond(400, {'email': ['Enter a valid email address.']})
+
+    with pytest.raises(api.HTTPError):
+        user._update()
+    assert user.changed_fields() == {'email': 'new@example.com'}
+
+
+def test_report_matrix_fetches_each_class_lazily(client, fake_session):
+    """Only the reports of the class looked up are fetched"""
+    grid = [(None, None), ({'resolution': 'daily'}, [['account', '*']])]
+    matrix = ReportMatrix([KokuCostReport, KokuStorageReport], grid, client=client)
+    assert not fake_session.requests
+
+    for _ in grid:
+        fake_session.respond(200, {'data': [], 'total': None})
+    report = matrix.report(KokuCostReport, {'resolution': 'daily'}, [['account', '*']])
+
+    assert isinstance(report, KokuCostReport)
+    matrix.fetch(KokuCostReport)
+    assert {request.path_url.split('?')[0] for request in fake_session.requests} == {
+        '/api/v1/reports/costs/'}
+    assert len(fake_session.requests) == len(grid)
+
+    matrix.report(KokuCostReport)
+    assert len(fake_session.requests) == len(grid)
+    matrix.close()
+
+
+def test_report_matrix_classes_share_workers(offline_config, monkeypatch):
+    """The report classes are fetched concurrently within one max_workers budget"""
+    session = RoutedSession({
+        '/api/v1/reports/costs/': (200, {'data': [], 'total': None}, {}),
+        '/api/v1/reports/inventory/storage/': (200, {'data': [], 'total': None}, {}),
+        '/api/v1/reports/inventory/instance-type/': (500, {'detail': 'error'}, {}),
+    })
+    monkeypatch.setattr(api, '_SESSION', session)
+    client = api.Client(authenticate=False)
+    client.token = 'token'
+    grid = [(None, None), ({'resolution': 'daily'}, None), ({'resolution': 'monthly'}, None)]
+    matrix = ReportMatrix(
+        [KokuCostReport, KokuStorageReport, KokuInstanceReport], grid, client=client,
+        max_workers=3)
+
+    matrix.fetch(wait=False)
+    report = matrix.report(KokuStorageReport, {'resolution': 'daily'})
+    matrix.fetch()
+
+    assert isinstance(report, KokuStorageReport)
+    assert session.peak == 3
+    assert len(session.requests) >= 3 * len(grid)
+    with pytest.raises(api.HTTPError):
+        matrix.report(KokuInstanceReport)
+    matrix.close()
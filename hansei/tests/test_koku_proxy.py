@@ -0,0 +1,114 @@
+"""
+Tests of the lazy model proxies, they do not need a Koku server
+"""
+import copy
+import threading
+
+import pytest
+
+from hansei import api
+from hansei.koku_models import KokuCustomer, KokuProxy, KokuServiceAdmin, resolve_all
+
+
+UUIDS = [
+    '0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1',
+    '1f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a2',
+    '2f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a3',
+]
+
+
+def customer_payload(uuid):
+    return {'uuid': uuid, 'name': 'Customer {}'.format(uuid[0]),
+            'owner': {'username': 'owner', 'email': 'owner@example.com'}}
+
+
+@pytest.fixture
+def admin(fake_session):
+    client = api.Client(authenticate=False)
+    client.token = 'token'
+    return KokuServiceAdmin(client=client)
+
+
+def test_no_request_before_first_access(admin, fake_session):
+    proxy = admin.read_customer(UUIDS[0], lazy=True)
+
+    assert proxy.uuid == UUIDS[0]
+    assert not proxy.resolved
+    assert repr(proxy) == '<KokuCustomer proxy uuid={!r}>'.format(UUIDS[0])
+    assert not fake_session.requests
+
+    fake_session.respond(200, customer_payload(UUIDS[0]))
+    assert proxy.name == 'Customer 0'
+    assert proxy.resolved
+    assert isinstance(proxy.resolve(), KokuCustomer)
+    assert [request.path_url for request in fake_session.requests] == [
+        '/api/v1/customers/{}/'.format(UUIDS[0])]
+
+
+def test_one_request_on_concurrent_access(admin, fake_session):
+    proxy = admin.read_customer(UUIDS[0], lazy=True)
+    fake_session.respond(200, customer_payload(UUIDS[0]))
+    barrier = threading.Barrier(8)
+    names = []
+
+    def access():
+        barrier.wait()
+        names.append(proxy.name)
+
+    threads = [threading.Thread(target=access) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert names == ['Customer 0'] * 8
+    assert len(fake_session.requests) == 1
+
+
+def test_resolve_all(admin, fake_session):
+    """The results are in the order of the proxies, failures are captured"""
+    proxies = [admin.read_customer(uuid, lazy=True) for uuid in UUIDS]
+    fake_session.respond(200, customer_payload(UUIDS[0]))
+    fake_session.respond(404, {'detail': 'Not found.'})
+    fake_session.respond(200, customer_payload(UUIDS[2]))
+
+    results = resolve_all(proxies, max_workers=1)
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert [results[0].result.uuid, results[2].result.uuid] == [UUIDS[0], UUIDS[2]]
+    assert isinstance(results[1].error, api.HTTPError)
+    assert not proxies[1].resolved
+
+    # Resolved proxies are not read again
+    assert resolve_all(proxies[:1])[0].result is results[0].result
+    assert len(fake_session.requests) == 3
+
+
+def test_setattr(admin, fake_session):
+    """Fields are set on the model, the slots of the proxy can not be set"""
+    proxy = admin.read_customer(UUIDS[0], lazy=True)
+    for name in KokuProxy.__slots__:
+        with pytest.raises(AttributeError):
+            setattr(proxy, name, None)
+    assert not fake_session.requests
+
+    fake_session.respond(200, customer_payload(UUIDS[0]))
+    proxy.name = 'Renamed'
+    assert proxy.resolve().name == 'Renamed'
+    assert proxy.resolve().changed_fields() == {'name': 'Renamed'}
+
+
+def test_special_names_do_not_resolve(admin, fake_session):
+    proxy = admin.read_customer(UUIDS[0], lazy=True)
+
+    assert not hasattr(proxy, '__custom__')
+    copied = copy.copy(proxy)
+    deep_copied = copy.deepcopy(proxy)
+    assert (copied.uuid, deep_copied.uuid) == (UUIDS[0], UUIDS[0])
+    assert copied._client is proxy._client
+    assert not fake_session.requests
+
+    # A proxy whose slots are not set yet, as built by pickle
+    empty = KokuProxy.__new__(KokuProxy)
+    with pytest.raises(AttributeError):
+        empty.name
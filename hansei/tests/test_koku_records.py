@@ -0,0 +1,183 @@
+"""
+Tests of the list records and of the paginated list iterators, they do not need a Koku server
+"""
+import threading
+
+import pytest
+
+from hansei import api
+from hansei.koku_models import (
+    KokuCustomer,
+    KokuCustomerRecord,
+    KokuProvider,
+    KokuProviderRecord,
+    KokuServiceAdmin,
+    KokuUser,
+    _iter_results,
+)
+
+
+CUSTOMERS = [
+    {'uuid': '0f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a{}'.format(index),
+     'name': 'Customer {}'.format(index),
+     'owner': {'username': 'owner{}'.format(index), 'email': 'owner@example.com'}}
+    for index in range(5)
+]
+
+PROVIDER = {
+    'uuid': '1f3e6a3c-8ad6-4c2a-9a1e-52b2b4f3c7a1',
+    'name': 'Provider',
+    'type': 'AWS',
+    'authentication': {'provider_resource_name': 'arn:aws:iam::1:role/CostData'},
+    'billing_source': {'bucket': 'cost_s3'},
+}
+
+
+def page(results, next_url=None):
+    return {'count': len(CUSTOMERS), 'next': next_url, 'previous': None, 'results': results}
+
+
+@pytest.fixture
+def client(fake_session):
+    client = api.Client(authenticate=False)
+    client.token = 'token'
+    return client
+
+
+@pytest.fixture
+def admin(client):
+    return KokuServiceAdmin(client=client)
+
+
+def test_customer_records(admin, client, fake_session):
+    """Each row is a record sharing the client of the service admin"""
+    fake_session.respond(200, page(CUSTOMERS[:2]))
+
+    records = admin.list_customers()
+
+    assert [type(record) for record in records] == [KokuCustomerRecord] * 2
+    assert [record.payload() for record in records] == CUSTOMERS[:2]
+    assert records[0].name == 'Customer 0'
+    assert all(record.client is client for record in records)
+    with pytest.raises(AttributeError):
+        records[0].extra = 'field'
+
+
+def test_provider_record_fields(client, fake_session):
+    """Fields are renamed as in the model"""
+    user = KokuUser(client=client)
+    fake_session.respond(200, page([PROVIDER]))
+
+    record, = user.list_providers()
+
+    assert isinstance(record, KokuProviderRecord)
+    assert record.provider_type == 'AWS'
+    assert record.payload() == PROVIDER
+
+
+def test_record_equality(admin, fake_session):
+    fake_session.respond(200, page(CUSTOMERS[:2]))
+    fake_session.respond(200, page(CUSTOMERS[:2]))
+    first, second = admin.list_customers()
+    again, _ = admin.list_customers()
+
+    assert first == again
+    assert first != second
+    assert first != KokuCustomer(uuid=first.uuid)
+    with pytest.raises(TypeError):
+        hash(first)
+
+
+def test_materialize(admin, client, fake_session):
+    """The model has a client of its own, logging it in leaves the listing client alone"""
+    fake_session.respond(200, page(CUSTOMERS[:1]))
+    record, = admin.list_customers()
+
+    customer = record.materialize()
+
+    assert isinstance(customer, KokuCustomer)
+    assert customer.fields() == dict(CUSTOMERS[0])
+    assert customer.changed_fields() == {}
+    assert customer.client is not client
+    assert customer.client.session is client.session
+    assert customer.client.url == client.url
+    assert not customer.logged_in
+
+    customer.owner['password'] = 'secret'
+    customer.login(lazy=True)
+    assert client.credentials is None
+    assert client.token == 'token'
+
+    provider = KokuProviderRecord(client, PROVIDER).materialize(client=client)
+    assert isinstance(provider, KokuProvider)
+    assert provider.client is client
+    assert provider.payload()['billing_source'] == PROVIDER['billing_source']
+
+
+def paginate(fake_session, results, page_size):
+    """Queue the pages of ``results``, linked by their ``next`` urls"""
+    for start in range(0, len(results), page_size):
+        end = start + page_size
+        next_url = None
+        if end < len(results):
+            next_url = 'http://koku.test/api/v1/customers/?limit={}&offset={}'.format(
+                page_size, end)
+        fake_session.respond(200, page(results[start:end], next_url))
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_iter_results_follows_next_links(client, fake_session, prefetch):
+    paginate(fake_session, CUSTOMERS, 2)
+
+    results = list(_iter_results(client, 'customers/', page_size=2, prefetch=prefetch))
+
+    assert results == CUSTOMERS
+    assert [request.path_url for request in fake_session.requests] == [
+        '/api/v1/customers/?limit=2',
+        '/api/v1/customers/?limit=2&offset=2',
+        '/api/v1/customers/?limit=2&offset=4',
+    ]
+
+
+def test_page_size(offline_config, admin, fake_session):
+    """The page size defaults to the page-size of the config"""
+    offline_config['page-size'] = 3
+    paginate(fake_session, CUSTOMERS, 3)
+    paginate(fake_session, CUSTOMERS, 4)
+
+    assert len(admin.list_customers()) == len(CUSTOMERS)
+    assert [record.uuid for record in admin.iter_customers(page_size=4)] == [
+        customer['uuid'] for customer in CUSTOMERS]
+    assert [request.path_url.split('&')[0] for request in fake_session.requests] == [
+        '/api/v1/customers/?limit=3'] * 2 + ['/api/v1/customers/?limit=4'] * 2
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_error_raised_at_its_page(client, fake_session, prefetch):
+    """The items of the pages before a failing page are yielded"""
+    fake_session.respond(200, page(
+        CUSTOMERS[:2], 'http://koku.test/api/v1/customers/?limit=2&offset=2'))
+    fake_session.respond(500, {'detail': 'Server error'})
+
+    results = _iter_results(client, 'customers/', page_size=2, prefetch=prefetch)
+
+    assert [next(results), next(results)] == CUSTOMERS[:2]
+    with pytest.raises(api.HTTPError):
+        next(results)
+
+
+def test_abandoned_iterator_stops_prefetch(client, fake_session):
+    """Closing the generator shuts its prefetch thread down"""
+    paginate(fake_session, CUSTOMERS, 2)
+    threads = set(threading.enumerate())
+
+    results = _iter_results(client, 'customers/', page_size=2)
+    assert next(results) == CUSTOMERS[0]
+    prefetch_threads = set(threading.enumerate()) - threads
+    results.close()
+
+    for thread in prefetch_threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    # Only the first page and the prefetched second page were requested
+    assert len(fake_session.requests) == 2
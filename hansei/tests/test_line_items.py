@@ -0,0 +1,93 @@
+"""
+Tests of the traversal of the report line items, they do not need a Koku server
+"""
+import json
+
+import pytest
+
+from hansei.koku_models import KokuCostReport
+
+
+def traverse_recursively(root_object):
+    """The recursive traversal iter_line_items replaced, as reference"""
+    line_item_list = []
+
+    root_object_type = type(root_object)
+    if not root_object or (root_object_type not in [list, dict]):
+        return line_item_list
+
+    if root_object_type is list:
+        for item in root_object:
+            if type(item) in [list, dict]:
+                line_item_list.extend(traverse_recursively(item))
+    else:
+        if 'values' in root_object:
+            return line_item_list + root_object['values']
+
+        for key, val in root_object.items():
+            if type(val) in [list, dict]:
+                line_item_list.extend(traverse_recursively(val))
+
+    return line_item_list
+
+
+def value(date, total, **groups):
+    return dict(date=date, units='USD', total=total, **groups)
+
+
+NESTED = [
+    {'date': '2018-07-01', 'accounts': [
+        {'account': '111', 'services': [
+            {'service': 'EC2', 'regions': [
+                {'region': 'us-east-1', 'values': [
+                    value('2018-07-01', 1.5, account='111', service='EC2', region='us-east-1')]},
+                {'region': 'us-west-2', 'values': []},
+            ]},
+            {'service': 'S3', 'regions': []},
+        ]},
+        {'account': '222', 'services': [
+            {'service': 'EC2', 'values': [
+                value('2018-07-01', 2, account='222', service='EC2'),
+                value('2018-07-01', None, account='222', service='EC2')]},
+        ]},
+    ]},
+    {'date': '2018-07-02', 'accounts': []},
+    {'date': '2018-07-03', 'values': [value('2018-07-03', 0.25)]},
+    {'date': '2018-07-04'},
+    {},
+    [],
+]
+
+
+def nest(depth):
+    """Report data nested ``depth`` group_by levels deep"""
+    node = {'values': [value('2018-07-01', depth)]}
+    for level in range(depth):
+        node = {'level': level, 'groups': [node, {'level': level, 'groups': []}]}
+    return [{'date': '2018-07-01', 'groups': [node]}]
+
+
+@pytest.fixture
+def report():
+    return KokuCostReport(client=object())
+
+
+@pytest.mark.parametrize('data', [
+    NESTED, NESTED[0], nest(50), [], {}, [{'values': []}],
+], ids=['nested', 'dict', 'deep', 'empty list', 'empty dict', 'empty values'])
+def test_same_line_items_as_recursion(report, data):
+    expected = traverse_recursively(data)
+
+    assert list(report.iter_line_items(data)) == expected
+    assert report.report_line_items(data) == expected
+
+
+def test_line_items_of_last_report(report):
+    report.last_report = json.loads(json.dumps({'data': NESTED}))
+
+    assert [item['total'] for item in report.iter_line_items()] == [1.5, 2, None, 0.25]
+    assert report.report_line_items() == traverse_recursively(report.data)
+
+
+def test_deeper_than_the_recursion_limit(report):
+    assert list(report.iter_line_items(nest(5000))) == [value('2018-07-01', 5000)]
@@ -0,0 +1,80 @@
+"""
+Tests of the logins of the api client, they do not need a Koku server
+"""
+import json
+
+import pytest
+
+from hansei import api
+from hansei.koku_models import KokuCustomer, KokuServiceAdmin
+
+
+def test_failed_login_drops_credentials(fake_session):
+    """A client whose login was rejected is not logged in"""
+    client = api.Client(authenticate=False)
+    fake_session.respond(400, {'non_field_errors': ['Unable to log in']})
+
+    with pytest.raises(api.HTTPError):
+        client.login('gone', 'pw')
+    assert not client.logged_in
+
+    fake_session.respond(200, {'api_version': 1})
+    client.server_status()
+    assert fake_session.requests[-1].path_url == '/api/v1/status/'
+    assert len(fake_session.requests) == 2
+
+
+def test_lazy_login(fake_session):
+    """The token is requested with the first request"""
+    client = api.Client(username='admin', password='pass', lazy=True)
+    assert client.logged_in
+    assert not fake_session.requests
+
+    fake_session.respond(200, {'token': 'token'})
+    fake_session.respond(200, {'api_version': 1})
+    client.server_status()
+    assert fake_session.requests[0].path_url == '/api/v1/token-auth/'
+    assert fake_session.requests[1].headers['Authorization'] == 'Token token'
+
+
+def test_expired_token_logs_in_again(fake_session):
+    """A 401 is closed and the request resent with a new token"""
+    fake_session.respond(200, {'token': 'expired'})
+    client = api.Client(username='admin', password='pass')
+
+    fake_session.respond(401, {'detail': 'Invalid token.'})
+    fake_session.respond(200, {'token': 'token'})
+    fake_session.respond(200, {'api_version': 1})
+    response = client.get('status/', stream=True)
+
+    assert response.status_code == 200
+    assert fake_session.responses[1].closed
+    assert fake_session.requests[3].headers['Authorization'] == 'Token token'
+
+
+def test_created_customer_not_logged_in(fake_session):
+    """The owner of a new customer only logs in when asked to"""
+    admin = KokuServiceAdmin(client=api.Client(authenticate=False))
+    owner = {'username': 'owner', 'email': 'owner@example.com', 'password': 'pass'}
+    fake_session.respond(201, {'uuid': 'customer', 'name': 'Customer', 'owner': owner})
+
+    customer = admin.create_customer(name='Customer', owner=owner)
+
+    assert not customer.logged_in
+    assert customer.client is not admin.client
+    assert len(fake_session.requests) == 1
+
+    fake_session.respond(200, {'token': 'owner-token'})
+    assert customer.login()
+    assert json.loads(fake_session.requests[1].body)['username'] == 'owner'
+
+
+def test_created_user_not_logged_in(fake_session):
+    """A new user only logs in when asked to"""
+    customer = KokuCustomer(client=api.Client(authenticate=False))
+    fake_session.respond(201, {'uuid': 'user', 'username': 'user', 'email': 'user@example.com'})
+
+    user = customer.create_user(username='user', email='user@example.com', password='pass')
+
+    assert not user.logged_in
+    assert len(fake_session.requests) == 1
@@ -0,0 +1,54 @@
+"""
+Tests of the request metrics, they do not need a Koku server
+"""
+import random
+
+import pytest
+
+from hansei import metrics
+
+
+def test_summary():
+    registry = metrics.MetricsRegistry()
+    for latency in (0.3, 0.1, 0.2):
+        registry.record('GET', 'reports/costs/', 200, latency,
+                        request_bytes=10, response_bytes=1000)
+    registry.record('GET', 'reports/costs/', 503, 0.4, retries=2)
+    registry.record('GET', 'status/', None, 0.05)
+
+    costs, status = registry.summary()
+
+    assert (costs.endpoint, costs.count, costs.errors, costs.retries) == (
+        'reports/costs/', 4, 1, 2)
+    assert costs.p50 == pytest.approx(0.2, rel=0.05)
+    assert (costs.p95, costs.p99) == (0.4, 0.4)
+    assert (costs.request_bytes, costs.response_bytes) == (30, 3000)
+    assert (status.endpoint, status.errors) == ('status/', 1)
+
+
+def test_histogram_percentiles():
+    """Percentiles are within the growth of the buckets of the exact ones"""
+    histogram = metrics.Histogram()
+    generator = random.Random(0)
+    samples = [generator.lognormvariate(-3, 1.5) for _ in range(10000)]
+    for sample in samples:
+        histogram.add(sample)
+
+    samples.sort()
+    for percent in (1, 50, 95, 99, 100):
+        exact = samples[max(int(percent / 100.0 * len(samples) + 0.999999), 1) - 1]
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.05)
+    assert histogram.count == len(samples)
+    assert histogram.total == pytest.approx(sum(samples))
+
+
+def test_histogram_memory_is_bounded():
+    histogram = metrics.Histogram()
+    assert histogram.percentile(50) is None
+
+    for index in range(100000):
+        histogram.add(0.001 + (index % 1000) / 1000.0)
+    # One bucket per 5% between 1ms and 1s
+    assert len(histogram._buckets) < 150
+    assert histogram.percentile(0) == pytest.approx(0.001, rel=0.05)
+    assert histogram.percentile(100) == histogram.max
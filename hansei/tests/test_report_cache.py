@@ -0,0 +1,92 @@
+"""
+Tests of the cache of the parsed reports, they do not need a Koku server
+"""
+import pytest
+
+from hansei import api
+from hansei.koku_models import KokuCostReport, KokuStorageReport, get_report_cache
+
+
+REPORT = {'filter': {'resolution': 'daily'}, 'group_by': {'account': ['*']}, 'data': [],
+          'total': None}
+
+
+def new_client(username, url=None):
+    client = api.Client(url=url, authenticate=False)
+    client.token = 'token {}'.format(username)
+    client.username = username
+    return client
+
+
+@pytest.fixture
+def client(offline_config, fake_session):
+    offline_config['report-cache'] = {'enabled': True}
+    return new_client('admin')
+
+
+def test_query_key_is_canonical(client):
+    report = KokuCostReport(client)
+    key = report.query_key(
+        report_filter={'resolution': 'daily', 'time_scope_value': -10},
+        group_by=[['account', ['222', '111']], ['service', '*']])
+
+    assert key == report.query_key(
+        report_filter={'time_scope_value': -10, 'resolution': 'daily'},
+        group_by=(('account', ('222', '111')), ('service', '*')))
+    # The group_by order drives the nesting of the report
+    assert key != report.query_key(
+        report_filter={'resolution': 'daily', 'time_scope_value': -10},
+        group_by=[['service', '*'], ['account', ['222', '111']]])
+    assert key != KokuStorageReport(client).query_key(
+        report_filter={'resolution': 'daily', 'time_scope_value': -10},
+        group_by=[['account', ['222', '111']], ['service', '*']])
+
+
+def test_cache_hit_sends_no_request(client, fake_session):
+    fake_session.respond(200, REPORT)
+
+    first = KokuCostReport(client).get(
+        report_filter={'resolution': 'daily'}, group_by=[['account', '*']])
+    second = KokuCostReport(client).get(
+        report_filter={'resolution': 'daily'}, group_by=[['account', '*']])
+
+    assert second is first
+    assert len(fake_session.requests) == 1
+    assert get_report_cache().hits == 1
+
+
+def test_cache_is_kept_per_identity(client, fake_session):
+    fake_session.respond(200, REPORT)
+    fake_session.respond(200, REPORT)
+
+    KokuCostReport(client).get(report_filter={'resolution': 'daily'})
+    KokuCostReport(new_client('other')).get(report_filter={'resolution': 'daily'})
+
+    assert len(fake_session.requests) == 2
+
+
+def test_cache_is_kept_per_server(client, fake_session):
+    """Unauthenticated clients of different servers do not share reports"""
+    first = api.Client(authenticate=False)
+    second = api.Client(url='http://other.test/api/v1/', authenticate=False)
+    assert first.identity is second.identity is None
+    fake_session.respond(200, REPORT)
+    fake_session.respond(200, REPORT)
+
+    KokuCostReport(first).get()
+    KokuCostReport(second).get()
+
+    assert [request.url for request in fake_session.requests] == [
+        'http://koku.test/api/v1/reports/costs/', 'http://other.test/api/v1/reports/costs/']
+
+
+def test_cache_disabled(offline_config, fake_session):
+    fake_session.respond(200, REPORT)
+    fake_session.respond(200, REPORT)
+    client = new_client('admin')
+
+    KokuCostReport(client).get()
+    KokuCostReport(client).get()
+
+    assert get_report_cache() is None
+    assert len(fake_session.requests) == 2
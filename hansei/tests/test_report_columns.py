@@ -0,0 +1,57 @@
+"""
+Tests of the columnar view of the report line items, they do not need a Koku server
+"""
+import pytest
+
+from hansei import report_columns
+from hansei.report_columns import ReportColumns
+
+
+LINE_ITEMS = [
+    {'date': '2018-07-01', 'account': '111', 'service': 'EC2', 'units': 'USD', 'total': 1.5},
+    {'date': '2018-07-01', 'account': '222', 'service': 'EC2', 'units': 'USD', 'total': '2.25'},
+    {'date': '2018-07-02', 'account': '111', 'service': 'S3', 'units': 'USD', 'total': 3},
+    {'date': '2018-07-02', 'account': '111', 'service': 'S3', 'units': 'USD', 'total': None},
+    {'date': '2018-07-02', 'account': '111', 'service': 'EC2', 'units': 'USD', 'total': '0.25'},
+]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def columns(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(report_columns, 'numpy', None)
+    elif report_columns.numpy is None:
+        pytest.skip('NumPy is not installed')
+    return ReportColumns.from_line_items(LINE_ITEMS)
+
+
+def test_total(columns):
+    assert columns.total() == 7.0
+
+
+def test_sum_by_one_key(columns):
+    assert columns.sum_by('account') == {'111': 4.75, '222': 2.25}
+    assert columns.sum_by_date() == {'2018-07-01': 3.75, '2018-07-02': 3.25}
+
+
+def test_sum_by_keys(columns):
+    assert columns.sum_by('date', 'account', 'service') == {
+        ('2018-07-01', '111', 'EC2'): 1.5,
+        ('2018-07-01', '222', 'EC2'): 2.25,
+        ('2018-07-02', '111', 'S3'): 3.0,
+        ('2018-07-02', '111', 'EC2'): 0.25,
+    }
+
+
+def test_sum_by_many_distinct_values(columns):
+    """Only the combinations present are counted"""
+    size = 20000
+    columns = ReportColumns({
+        'a': [str(i) for i in range(size)],
+        'b': [str(i) for i in range(size)],
+        'c': [str(i) for i in range(size)],
+        'total': [1.0] * size,
+    })
+    sums = columns.sum_by('a', 'b', 'c')
+    assert len(sums) == size
+    assert sums[('7', '7', '7')] == 1.0
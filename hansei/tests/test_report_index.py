@@ -0,0 +1,120 @@
+"""
+Tests of the line item indexes of the reports, they do not need a Koku server
+"""
+import copy
+import itertools
+
+import pytest
+
+from hansei.exceptions import KokuException
+from hansei.koku_models import KokuCostReport
+from hansei.report_index import LineItemIndex
+
+
+def line_item(date, account, service, total):
+    return {'date': date, 'account': account, 'service': service, 'units': 'USD',
+            'total': total}
+
+
+REPORT = {
+    'group_by': {'account': ['*'], 'service': ['*']},
+    'data': [
+        {'date': date, 'accounts': [
+            {'account': account, 'services': [
+                {'service': service, 'values': [line_item(date, account, service, total)]}
+                for service, total in services
+            ]}
+            for account, services in accounts
+        ]}
+        for date, accounts in [
+            ('2018-07-01', [('111', [('EC2', 1.1), ('S3', 1.35)]), ('222', [('EC2', 3)])]),
+            ('2018-07-02', [('111', [('EC2', 2.2), ('S3', 2.45)])]),
+            ('2018-07-03', []),
+        ]
+    ],
+}
+
+
+@pytest.fixture
+def report():
+    report = KokuCostReport(client=object())
+    report.last_report = copy.deepcopy(REPORT)
+    return report
+
+
+def linear(report, **criteria):
+    return [
+        item for item in report.iter_line_items()
+        if all(item.get(key) == value for key, value in criteria.items())]
+
+
+def test_lookup_matches_linear_filter(report):
+    index = report.index()
+    assert index.dimensions == ('date', 'account', 'service')
+    assert len(index) == 5
+
+    for item in report.iter_line_items():
+        assert index.lookup(item['date'], item['account'], item['service']) is item
+        assert index.lookup(
+            date=item['date'], account=item['account'], service=item['service']) is item
+
+
+def test_slice_matches_linear_filter(report):
+    index = report.index()
+    values = {dimension: index.values(dimension) + ['missing']
+              for dimension in index.dimensions}
+
+    for dimensions in itertools.chain.from_iterable(
+            itertools.combinations(index.dimensions, size) for size in (0, 1, 2, 3)):
+        for criteria_values in itertools.product(*(values[key] for key in dimensions)):
+            criteria = dict(zip(dimensions, criteria_values))
+            assert index.slice(**criteria) == linear(report, **criteria)
+
+
+def test_group_index_matches_linear_filter(report):
+    by_account = report.group_index('account')
+    assert by_account == {account: linear(report, account=account)
+                          for account in ('111', '222')}
+    assert report.date_index() == {date: linear(report, date=date)
+                                   for date in ('2018-07-01', '2018-07-02')}
+    assert report.group_index('account', 'service')[('111', 'S3')] == linear(
+        report, account='111', service='S3')
+
+
+def test_missing_keys(report):
+    index = report.index()
+
+    with pytest.raises(KeyError):
+        index.lookup('2018-07-03', '111', 'EC2')
+    assert index.get('2018-07-03', '111', 'EC2') is None
+    assert index.get('2018-07-03', '111', 'EC2', default={}) == {}
+    assert ('2018-07-01', '222', 'EC2') in index
+    assert ('2018-07-01', '222', 'S3') not in index
+    assert report.group_index('account').get('333') is None
+    with pytest.raises(KeyError):
+        index.slice(region='us-east-1')
+    with pytest.raises(TypeError):
+        index.lookup('2018-07-01', '111')
+    with pytest.raises(TypeError):
+        index.lookup(date='2018-07-01', account='111')
+    with pytest.raises(ValueError):
+        report.group_index()
+
+
+def test_duplicate_line_items():
+    item = line_item('2018-07-01', '111', 'EC2', 1)
+    with pytest.raises(KokuException):
+        LineItemIndex([item, dict(item)], ['account', 'service'])
+
+
+def test_index_rebuilt_when_data_changes(report):
+    index = report.index()
+    by_account = report.group_index('account')
+
+    report.last_report['data'] = copy.deepcopy(REPORT['data'][1:])
+
+    assert report.index() is not index
+    assert len(report.index()) == 2
+    assert report.index().get('2018-07-01', '222', 'EC2') is None
+    assert report.group_index('account') is not by_account
+    assert list(report.group_index('account')) == ['111']
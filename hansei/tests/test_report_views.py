@@ -0,0 +1,81 @@
+"""
+Tests of the views derived from the report data, they do not need a Koku server
+"""
+import copy
+
+import pytest
+
+from hansei.koku_models import KokuCostReport
+
+
+REPORT = {
+    'group_by': {'account': ['*']},
+    'data': [
+        {'date': '2018-07-01', 'accounts': [
+            {'account': '111', 'values': [
+                {'date': '2018-07-01', 'account': '111', 'units': 'USD', 'total': 1.5}]},
+            {'account': '222', 'values': [
+                {'date': '2018-07-01', 'account': '222', 'units': 'USD', 'total': 2.25}]},
+        ]},
+    ],
+    'total': {'value': 3.75, 'units': 'USD'},
+}
+
+
+@pytest.fixture
+def report():
+    report = KokuCostReport(client=object())
+    report.last_report = copy.deepcopy(REPORT)
+    return report
+
+
+def test_views_are_cached(report):
+    assert report.report_line_items() is report.report_line_items()
+    assert report.columns() is report.columns()
+    assert report.aggregate() is report.aggregate()
+    assert report.group_index('account') is report.group_index('account')
+    assert report.index() is report.index()
+    assert report.group_index('account') is not report.group_index('date')
+
+
+def test_new_data_invalidates_views(report):
+    line_items = report.report_line_items()
+    columns = report.columns()
+
+    report.last_report['data'] = copy.deepcopy(REPORT['data'])
+    report.last_report['data'][0]['accounts'].pop()
+
+    assert report.report_line_items() is not line_items
+    assert len(report.report_line_items()) == 1
+    assert report.columns() is not columns
+    assert report.columns().total() == 1.5
+
+
+def test_new_report_invalidates_views(report):
+    line_items = report.report_line_items()
+
+    report.last_report = copy.deepcopy(REPORT)
+
+    assert report.report_line_items() is not line_items
+    assert report.report_line_items() == line_items
+
+
+def test_reused_id_is_not_a_hit(report):
+    """A view cached for data whose id was reused by a new list is rebuilt"""
+    new_data = copy.deepcopy(REPORT['data'])
+    new_data[0]['accounts'].pop()
+    # The entry of a data object collected since then, whose id is the one of the new list
+    report._views[('line_items', id(new_data))] = (REPORT['data'], ['stale'])
+
+    report.last_report['data'] = new_data
+
+    assert report.report_line_items() == [
+        {'date': '2018-07-01', 'account': '111', 'units': 'USD', 'total': 1.5}]
+
+
+def test_explicit_data_has_its_own_views(report):
+    other_data = copy.deepcopy(REPORT['data'])[0]['accounts'][1:]
+
+    assert len(report.report_line_items(other_data)) == 1
+    assert len(report.report_line_items()) == 2
+    assert report.report_line_items(other_data) is report.report_line_items(other_data)
@@ -0,0 +1,158 @@
+"""
+Tests of the retry and circuit breaker policies, they do not need a Koku server
+"""
+import pytest
+import requests
+
+from hansei import api, exceptions, retry
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """The delays the api client slept for"""
+    slept = []
+    monkeypatch.setattr(api.time, 'sleep', slept.append)
+    return slept
+
+
+@pytest.fixture
+def client(fake_session):
+    client = api.Client(response_handler=api.echo_handler, authenticate=False)
+    client.token = 'token'
+    return client
+
+
+def response_with(status_code=503, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.mark.parametrize('method,attempts', [
+    ('GET', 4), ('HEAD', 4), ('OPTIONS', 4), ('PUT', 4), ('DELETE', 4),
+    ('POST', 1), ('PATCH', 1),
+])
+def test_retries_per_method(client, fake_session, delays, method, attempts):
+    """Only the idempotent methods are sent again, up to total retries"""
+    for _ in range(attempts):
+        fake_session.respond(503)
+
+    response = client.request(method, client.url + 'status/')
+
+    assert response.status_code == 503
+    assert len(fake_session.requests) == attempts
+    assert len(delays) == attempts - 1
+    assert all(previous.closed for previous in fake_session.responses[:-1])
+
+
+def test_retry_until_success(client, fake_session):
+    """A request is not sent again once it succeeded"""
+    fake_session.respond(502)
+    fake_session.fail()
+    fake_session.respond(200, {})
+
+    assert client.get('status/').status_code == 200
+    assert len(fake_session.requests) == 3
+
+
+def test_connection_error_raised_after_retries(client, fake_session):
+    """The connection error of the last attempt is raised"""
+    for _ in range(4):
+        fake_session.fail()
+
+    with pytest.raises(requests.ConnectionError):
+        client.get('status/')
+    assert len(fake_session.requests) == 4
+
+
+def test_retry_after_header(client, fake_session, delays):
+    """The delay requested by the server is honored"""
+    fake_session.respond(429, headers={'Retry-After': '7'})
+    fake_session.respond(200, {})
+
+    client.get('status/')
+    assert delays == [7]
+
+
+@pytest.mark.parametrize('value,delay', [
+    ('2', 2), ('0', 0), ('-5', 0), ('120', 30), ('not a delay', None), (None, None),
+])
+def test_parse_retry_after(value, delay):
+    policy = retry.RetryPolicy(max_backoff=30)
+    response = response_with(headers={'Retry-After': value} if value else {})
+
+    if delay is None:
+        assert retry.parse_retry_after(response) is None
+        assert 0 <= policy.backoff(2, response) <= policy.backoff_factor * 4
+    else:
+        assert policy.backoff(0, response) == delay
+
+
+def test_parse_retry_after_date(monkeypatch):
+    monkeypatch.setattr(retry.time, 'time', lambda: 784111777.0)
+    response = response_with(headers={'Retry-After': 'Sun, 06 Nov 1994 08:49:47 GMT'})
+
+    assert retry.parse_retry_after(response) == 10
+
+
+def test_circuit_transitions(monkeypatch):
+    """The circuit opens at the threshold, half opens after the timeout and
+    closes on a success"""
+    now = [0.0]
+    monkeypatch.setattr(retry.time, 'monotonic', lambda: now[0])
+    breaker = retry.CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure('status/')
+    breaker.check('status/')
+    breaker.record_failure('status/')
+    with pytest.raises(exceptions.KokuCircuitOpen):
+        breaker.check('status/')
+    # Other endpoints are not affected
+    breaker.check('reports/costs/')
+
+    # Half open: one request goes through, its failure opens the circuit again
+    now[0] = 10.5
+    breaker.check('status/')
+    breaker.record_failure('status/')
+    with pytest.raises(requests.RequestException):
+        breaker.check('status/')
+
+    now[0] = 21
+    breaker.check('status/')
+    breaker.record_success('status/')
+    breaker.record_failure('status/')
+    breaker.check('status/')
+
+
+def test_circuit_breaker_is_opt_in():
+    breaker = retry.CircuitBreaker.from_config({})
+    for _ in range(10):
+        breaker.record_failure('status/')
+    breaker.check('status/')
+
+    breaker = retry.CircuitBreaker.from_config(
+        {'circuit-breaker': {'enabled': True, 'failure-threshold': 1}})
+    breaker.record_failure('status/')
+    with pytest.raises(exceptions.KokuCircuitOpen):
+        breaker.check('status/')
+
+
+def test_circuit_counts_overload_only(offline_config, fake_session):
+    """Server errors outside of the forcelist do not open the circuit"""
+    offline_config['retry'] = {'total': 0}
+    offline_config['circuit-breaker'] = {'enabled': True, 'failure-threshold': 2}
+    client = api.Client(response_handler=api.echo_handler, authenticate=False)
+
+    for _ in range(3):
+        fake_session.respond(500)
+        client.get('status/')
+
+    fake_session.fail()
+    with pytest.raises(requests.ConnectionError):
+        client.get('status/')
+    fake_session.respond(503)
+    client.get('status/')
+    with pytest.raises(exceptions.KokuCircuitOpen):
+        client.get('status/')
+    assert len(fake_session.requests) == 5
@@ -0,0 +1,174 @@
+"""
+Tests of the local report rollup, they do not need a Koku server
+"""
+import datetime
+
+import pytest
+
+from hansei import rollup
+from hansei.exceptions import KokuException
+
+
+TODAY = datetime.date(2018, 3, 2)
+
+# Daily line items grouped by account and service, the first one is older than the last 10 days
+LINE_ITEMS = [
+    {'date': '2018-02-10', 'account': 'a1', 'service': 'ec2', 'total': 5.0, 'units': 'USD',
+     'count': 1},
+    {'date': '2018-02-27', 'account': 'a1', 'service': 'ec2', 'total': 1.1, 'units': 'USD',
+     'count': 1},
+    {'date': '2018-02-28', 'account': 'a1', 'service': 's3', 'total': 2.2, 'units': 'USD',
+     'count': 2},
+    {'date': '2018-02-28', 'account': 'a2', 'service': 'ec2', 'total': 0.1, 'units': 'USD',
+     'count': 0},
+    {'date': '2018-03-01', 'account': 'a1', 'service': 'ec2', 'total': 0.2, 'units': 'USD',
+     'count': 3},
+    {'date': '2018-03-02', 'account': 'a2', 'service': 'ec2', 'total': 0.7, 'units': 'USD',
+     'count': 1},
+]
+
+SOURCE_FILTER = {'resolution': 'daily', 'time_scope_value': -30}
+SOURCE_GROUP_BY = {'account': ['*'], 'service': ['*']}
+
+
+def values(nodes):
+    """Return the line items of nested report data"""
+    items = []
+    for node in nodes:
+        items.extend(node.get('values', []))
+        for key, children in node.items():
+            if key != 'values' and isinstance(children, list):
+                items.extend(values(children))
+    return items
+
+
+def test_last_date():
+    report = {'data': [
+        {'date': '2018-07-01', 'values': []},
+        {'date': '2018-07-03', 'values': []},
+        {'date': '2018-07-02', 'values': []},
+    ]}
+    assert rollup.last_date(report) == datetime.date(2018, 7, 3)
+
+
+def test_last_date_of_empty_report():
+    assert rollup.last_date({'data': []}) is None
+    assert rollup.last_date({'data': [{'date': '2018-07'}]}) is None
+    assert rollup.last_date(None) is None
+
+
+def test_time_window_defaults_to_utc_date(monkeypatch):
+    monkeypatch.setattr(rollup, 'utc_today', lambda: datetime.date(2018, 3, 1))
+
+    assert rollup.time_window({'time_scope_value': -2}) == ('2018-02-28', '2018-03-01')
+    assert rollup.time_window({'time_scope_value': -2, 'time_scope_units': 'month'}) == (
+        '2018-02-01', '2018-02-28')
+
+
+def test_rollup_regroups_line_items():
+    report = rollup.rollup(LINE_ITEMS, group_by=[['service', '*']], today=TODAY)
+
+    assert report['group_by'] == {'service': ['*']}
+    assert [node['date'] for node in report['data']] == [
+        '2018-02-27', '2018-02-28', '2018-03-01', '2018-03-02']
+    assert [service['service'] for service in report['data'][1]['services']] == ['ec2', 's3']
+    assert [(item['date'], item['service'], item['total'], item['count'])
+            for item in values(report['data'])] == [
+        ('2018-02-27', 'ec2', 1.1, 1),
+        ('2018-02-28', 'ec2', 0.1, 0),
+        ('2018-02-28', 's3', 2.2, 2),
+        ('2018-03-01', 'ec2', 0.2, 3),
+        ('2018-03-02', 'ec2', 0.7, 1),
+    ]
+    assert report['total'] == {'value': 4.3, 'units': 'USD', 'count': 7}
+
+
+def test_rollup_group_order_keeps_totals():
+    by_account = rollup.rollup(
+        LINE_ITEMS, group_by=[['account', '*'], ['service', '*']], today=TODAY)
+    by_service = rollup.rollup(
+        LINE_ITEMS, group_by=[['service', '*'], ['account', '*']], today=TODAY)
+
+    assert 'services' in by_account['data'][0]['accounts'][0]
+    assert 'accounts' in by_service['data'][0]['services'][0]
+
+    def totals(report):
+        return sorted((item['date'], item['account'], item['service'], item['total'])
+                      for item in values(report['data']))
+    assert totals(by_account) == totals(by_service)
+    assert by_account['total'] == by_service['total']
+
+
+def test_rollup_selects_groups():
+    report = rollup.rollup(LINE_ITEMS, group_by=[['account', 'a2']], today=TODAY)
+
+    assert report['group_by'] == {'account': ['a2']}
+    assert [(item['date'], item['total']) for item in values(report['data'])] == [
+        ('2018-02-28', 0.1), ('2018-03-02', 0.7)]
+    assert report['total']['value'] == 0.8
+
+
+def test_rollup_monthly_resolution():
+    report = rollup.rollup(
+        LINE_ITEMS,
+        {'resolution': 'monthly', 'time_scope_value': -2, 'time_scope_units': 'month'},
+        [['account', '*']], today=TODAY)
+
+    assert [node['date'] for node in report['data']] == ['2018-02']
+    assert [(item['account'], item['total'], item['count'])
+            for item in values(report['data'])] == [('a1', 8.3, 4), ('a2', 0.1, 0)]
+    assert report['total'] == {'value': 8.4, 'units': 'USD', 'count': 4}
+
+    current = rollup.rollup(
+        LINE_ITEMS,
+        {'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+        today=TODAY)
+    assert [(item['date'], item['total']) for item in values(current['data'])] == [
+        ('2018-03', 0.9)]
+
+
+def test_rollup_without_line_items():
+    report = rollup.rollup([], group_by=[['service', '*']], today=TODAY)
+
+    assert report['data'] == []
+    assert report['total'] is None
+
+
+@pytest.mark.parametrize('report_filter, group_by', [
+    ({'service': 'ec2'}, None),
+    ({'resolution': 'hourly'}, None),
+    (None, [['region', '*']]),
+])
+def test_rollup_rejects(report_filter, group_by):
+    with pytest.raises(KokuException):
+        rollup.rollup(LINE_ITEMS, report_filter, group_by, today=TODAY)
+
+
+def test_check_source_accepts_coarser_report():
+    rollup.check_source(
+        SOURCE_FILTER, SOURCE_GROUP_BY,
+        {'resolution': 'monthly', 'time_scope_value': -1, 'time_scope_units': 'month'},
+        [['service', 'ec2'], ['account', '*']], today=TODAY)
+    rollup.check_source(
+        SOURCE_FILTER, {'account': ['a1', 'a2']}, None, [['account', ['a2']]], today=TODAY)
+
+
+@pytest.mark.parametrize('source_filter, source_group_by, report_filter, group_by', [
+    # Filtered beyond the rollup filters
+    (dict(SOURCE_FILTER, service='ec2'), SOURCE_GROUP_BY, None, None),
+    # Not a daily report
+    (dict(SOURCE_FILTER, resolution='monthly'), SOURCE_GROUP_BY, None, None),
+    # Not grouped by a key of the report
+    (SOURCE_FILTER, SOURCE_GROUP_BY, None, [['region', '*']]),
+    # Groups missing from the source report
+    (SOURCE_FILTER, {'account': ['a1']}, None, [['account', 'a2']]),
+    (SOURCE_FILTER, {'account': ['a1']}, None, [['account', '*']]),
+    # Shorter time window
+    ({'resolution': 'daily'}, SOURCE_GROUP_BY, {'time_scope_value': -30}, None),
+    ({'resolution': 'daily'}, SOURCE_GROUP_BY,
+     {'time_scope_value': -2, 'time_scope_units': 'month'}, None),
+])
+def test_check_source_rejects(source_filter, source_group_by, report_filter, group_by):
+    with pytest.raises(KokuException):
+        rollup.check_source(
+            source_filter, source_group_by, report_filter, group_by, today=TODAY)
@@ -0,0 +1,69 @@
+"""
+Tests of the pooled session shared by the api clients, they do not need a Koku server
+"""
+import pytest
+
+from hansei import api
+
+
+@pytest.fixture
+def shared_session(offline_config, monkeypatch):
+    """Start without a shared session and close the one built by the test"""
+    monkeypatch.setattr(api, '_SESSION', None)
+    yield
+    api.close_session()
+
+
+def test_session_shared_by_clients(shared_session):
+    first = api.Client(authenticate=False)
+    second = api.Client(authenticate=False)
+
+    assert first.session is second.session is api.get_session()
+
+
+def test_client_with_own_session(shared_session):
+    session = api.build_session({})
+    client = api.Client(authenticate=False, session=session)
+
+    assert client.session is session
+    assert client.session is not api.get_session()
+
+
+def test_pool_sized_from_config(offline_config, shared_session):
+    offline_config.update({'pool-connections': 3, 'pool-maxsize': 25, 'pool-block': True})
+
+    session = api.get_session()
+
+    for scheme in ('http://', 'https://'):
+        adapter = session.get_adapter(scheme + 'koku.test')
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 25
+        assert adapter._pool_block is True
+    assert session.headers['Connection'] == 'keep-alive'
+
+
+def test_default_pool_and_keep_alive():
+    session = api.build_session({'keep-alive': False})
+
+    adapter = session.get_adapter('http://koku.test')
+    assert adapter._pool_maxsize == api.KOKU_DEFAULT_POOL_MAXSIZE
+    assert adapter._pool_block is False
+    assert session.headers['Connection'] == 'close'
+
+
+def test_no_cookies_accepted():
+    session = api.build_session({})
+
+    assert session.cookies.get_policy().is_not_allowed('koku.test')
+
+
+def test_close_session_resets_session(shared_session):
+    session = api.get_session()
+
+    api.close_session()
+    api.close_session()
+
+    assert api._SESSION is None
+    new_session = api.get_session()
+    assert new_session is not session
+    assert api.Client(authenticate=False).session is new_session
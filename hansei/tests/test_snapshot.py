@@ -0,0 +1,83 @@
+"""
+Tests of the report snapshots, they do not need a Koku server
+"""
+import struct
+
+import pytest
+
+from hansei import snapshot
+from hansei.exceptions import KokuException
+from hansei.koku_models import KokuBaseReport, KokuCostReport
+
+
+REPORT = {
+    'filter': {'resolution': 'daily', 'time_scope_value': -10, 'time_scope_units': 'day'},
+    'group_by': {'account': ['*']},
+    'data': [
+        {'date': '2018-07-01', 'accounts': [
+            {'account': '111', 'values': [
+                {'date': '2018-07-01', 'account': '111', 'units': 'USD', 'total': 1.5}]},
+            {'account': '222', 'values': [
+                {'date': '2018-07-01', 'account': '222', 'units': 'USD', 'total': 2.25}]},
+        ]},
+        {'date': '2018-07-02', 'accounts': [
+            {'account': '111', 'values': [
+                {'date': '2018-07-02', 'account': '111', 'units': 'USD', 'total': 0.25}]},
+        ]},
+    ],
+    'total': {'value': 4.0, 'units': 'USD'},
+}
+
+
+@pytest.fixture
+def report(offline_config):
+    report = KokuCostReport(client=None)
+    report.last_report = REPORT
+    return report
+
+
+def test_round_trip(report, tmp_path):
+    path = str(tmp_path / 'cost.snapshot')
+    report.save_snapshot(path, commit='abc123')
+
+    with KokuBaseReport.load_snapshot(path) as loaded:
+        assert len(loaded) == 3
+        assert (loaded.filter, loaded.group_by, loaded.total, loaded.commit) == (
+            REPORT['filter'], REPORT['group_by'], REPORT['total'], 'abc123')
+        assert loaded.header['report'] == 'KokuCostReport'
+
+        columns = loaded.columns()
+        expected = report.columns()
+        assert sorted(columns.names) == sorted(expected.names)
+        for name in expected.names:
+            assert list(columns[name]) == list(expected[name])
+        assert columns.total() == expected.total() == 4.0
+        assert columns.sum_by('account') == expected.sum_by('account')
+
+    with pytest.raises(KokuException):
+        loaded.columns()
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / 'bad.snapshot'
+    path.write_bytes(b'NOTASNAP' + struct.pack('<II', 1, 2) + b'{}')
+
+    with pytest.raises(KokuException, match='not a report snapshot'):
+        snapshot.Snapshot(str(path))
+
+
+def test_bad_version(tmp_path):
+    path = tmp_path / 'future.snapshot'
+    path.write_bytes(struct.pack('<8sII', snapshot.MAGIC, snapshot.VERSION + 1, 2) + b'{}')
+
+    with pytest.raises(KokuException, match='Unsupported report snapshot version'):
+        snapshot.Snapshot(str(path))
+
+
+@pytest.mark.parametrize('content', [b'', b'HANSEI'])
+def test_empty_file(tmp_path, content):
+    path = tmp_path / 'empty.snapshot'
+    path.write_bytes(content)
+
+    with pytest.raises(KokuException, match='not a report snapshot'):
+        snapshot.Snapshot(str(path))
@@ -0,0 +1,166 @@
+"""
+Tests of the token cache shared by the api clients, they do not need a Koku server
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from hansei import api, token_cache
+from hansei.tests.conftest import OFFLINE_URL
+from hansei.token_cache import TokenCache
+
+URL = OFFLINE_URL
+
+
+class Login(object):
+    """A login callable counting the tokens it handed out"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.count = 0
+
+    def __call__(self):
+        time.sleep(self.delay)
+        self.count += 1
+        return 'token-{}'.format(self.count)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TokenCache(path=str(tmp_path / 'tokens.json'), ttl=60)
+
+
+def test_miss_then_hit(cache):
+    login = Login()
+
+    assert cache.get_or_login(URL, 'admin', 'pw', login) == 'token-1'
+    assert cache.get_or_login(URL, 'admin', 'pw', login) == 'token-1'
+    assert cache.get(URL, 'admin', 'pw') == 'token-1'
+    assert login.count == 1
+
+
+def test_credentials_in_key(cache):
+    login = Login()
+    cache.get_or_login(URL, 'admin', 'pw', login)
+
+    assert cache.get(URL, 'admin', 'other') is None
+    assert cache.get(URL, 'other', 'pw') is None
+    assert cache.get('http://other.test/api/v1/', 'admin', 'pw') is None
+    assert cache.get_or_login(URL, 'admin', 'other', login) == 'token-2'
+
+
+def test_password_not_stored(cache):
+    cache.get_or_login(URL, 'admin', 'secret-pw', Login())
+
+    with open(cache.path) as cache_file:
+        assert 'secret-pw' not in cache_file.read()
+    assert os.stat(cache.path).st_mode & 0o777 == 0o600
+
+
+def test_expired_token(cache, monkeypatch):
+    login = Login()
+    now = time.time()
+    cache.get_or_login(URL, 'admin', 'pw', login)
+
+    monkeypatch.setattr(token_cache.time, 'time', lambda: now + cache.ttl + 1)
+
+    assert cache.get(URL, 'admin', 'pw') is None
+    assert cache.get_or_login(URL, 'admin', 'pw', login) == 'token-2'
+    assert login.count == 2
+
+
+def test_unreadable_cache_file(cache):
+    with open(cache.path, 'w') as cache_file:
+        cache_file.write('{not json')
+
+    assert cache.get_or_login(URL, 'admin', 'pw', Login()) == 'token-1'
+    with open(cache.path) as cache_file:
+        assert len(json.load(cache_file)) == 1
+
+
+def test_invalidate(cache):
+    login = Login()
+    cache.get_or_login(URL, 'admin', 'pw', login)
+
+    cache.invalidate(URL, 'admin', 'pw', token='token-0')
+    assert cache.get(URL, 'admin', 'pw') == 'token-1'
+
+    cache.invalidate(URL, 'admin', 'pw', token='token-1')
+    assert cache.get(URL, 'admin', 'pw') is None
+
+    cache.get_or_login(URL, 'admin', 'pw', login)
+    cache.invalidate(URL, 'admin', 'pw')
+    assert cache.get(URL, 'admin', 'pw') is None
+
+
+def test_concurrent_logins_locked(cache):
+    """Racing callers wait for the first login instead of sending their own"""
+    login = Login(delay=0.05)
+    barrier = threading.Barrier(4)
+    tokens = []
+
+    def get_token():
+        # Each call opens the lock file again, so the callers only exclude
+        # each other through the file lock
+        barrier.wait()
+        tokens.append(cache.get_or_login(URL, 'admin', 'pw', login))
+
+    threads = [threading.Thread(target=get_token) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert login.count == 1
+    assert tokens == ['token-1'] * 4
+
+
+def test_from_config(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+
+    assert TokenCache.from_config({}) is None
+    cache = TokenCache.from_config(
+        {'token-cache': True, 'token-cache-path': path, 'token-ttl': 5})
+    assert cache.path == path
+    assert cache.ttl == 5
+
+
+def test_clients_share_cached_token(offline_config, fake_session, tmp_path):
+    offline_config.update(
+        {'token-cache': True, 'token-cache-path': str(tmp_path / 'tokens.json')})
+    fake_session.respond(200, {'token': 'cached'})
+
+    first = api.Client(authenticate=False)
+    first.login('admin', 'pw')
+    second = api.Client(authenticate=False)
+    second.login('admin', 'pw')
+
+    assert first.token == second.token == 'cached'
+    assert [request.url for request in fake_session.requests] == [
+        OFFLINE_URL + 'token-auth/']
+
+
+def test_login_bypassing_cache(offline_config, fake_session, tmp_path):
+    offline_config.update(
+        {'token-cache': True, 'token-cache-path': str(tmp_path / 'tokens.json')})
+    fake_session.respond(200, {'token': 'cached'})
+    api.Client(authenticate=False).login('admin', 'pw')
+
+    client = api.Client(authenticate=False)
+    fake_session.respond(200, {'token': 'fresh'})
+    client.login('admin', 'pw', use_cache=False)
+    assert client.token == 'fresh'
+
+    client.login('admin', 'pw', lazy=True, use_cache=False)
+    fake_session.respond(200, {'token': 'lazy'})
+    fake_session.respond(200, {'api_version': 1})
+    client.server_status()
+    assert client.token == 'lazy'
+
+    assert [request.path_url for request in fake_session.requests] == [
+        '/api/v1/token-auth/', '/api/v1/token-auth/', '/api/v1/token-auth/',
+        '/api/v1/status/']
+    assert client.token_cache.get(client.url, 'admin', 'pw') == 'cached'
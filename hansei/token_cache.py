@@ -0,0 +1,150 @@
+# coding=utf-8
+"""Cross-process cache of Koku authentication tokens.
+
+Logging in to Koku is a POST to the token endpoint for every new client. When
+many processes run the tests (pytest-xdist workers for instance) the same
+identities log in over and over. The :class:`TokenCache` stores the tokens in a
+file shared by all of the processes so that each identity logs in only once.
+
+The cache can be enabled in the hansei config file::
+
+    koku:
+        token-cache: true
+        token-cache-path: /tmp/hansei-tokens.json  # defaults to the XDG
+                                                   # cache directory
+        token-ttl: 3600  # seconds before a cached token is discarded
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from xdg import BaseDirectory
+
+from hansei.constants import KOKU_DEFAULT_TOKEN_TTL
+
+
+class TokenCache(object):
+    """A file backed cache of tokens keyed by base URL and credentials.
+
+    Every read and write of the cache file is done while holding a lock on a
+    sibling ``.lock`` file, so the cache can be shared by several processes.
+    """
+
+    def __init__(self, path=None, ttl=KOKU_DEFAULT_TOKEN_TTL):
+        """
+        Arguments:
+            path - Path of the cache file. Defaults to ``tokens.json`` in the
+                hansei XDG cache directory
+            ttl - Number of seconds a token is served from the cache
+        """
+        self.path = path or os.path.join(
+            BaseDirectory.save_cache_path('hansei'), 'tokens.json')
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Return a cache configured from the ``koku`` config section.
+
+        Returns None if the token cache is not enabled.
+        """
+        if not cfg.get('token-cache', False):
+            return None
+        return cls(
+            path=cfg.get('token-cache-path'),
+            ttl=int(cfg.get('token-ttl', KOKU_DEFAULT_TOKEN_TTL)))
+
+    @staticmethod
+    def key(url, username, password):
+        """Return the key of the token of ``username`` on the server ``url``.
+
+        The key holds a digest of the credentials, so a token is only served
+        to the password that obtained it.
+        """
+        digest = hashlib.sha256(
+            '\0'.join((url, username, password or '')).encode('utf-8')).hexdigest()
+        return '{} {} {}'.format(url, username, digest)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        """Hold an exclusive lock on the cache file for the duration of the block."""
+        with open('{}.lock'.format(self.path), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self):
+        """Return the cached entries which have not expired yet."""
+        try:
+            with open(self.path) as cache_file:
+                entries = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        now = time.time()
+        return {
+            key: entry for key, entry in entries.items()
+            if entry.get('expires', 0) > now
+        }
+
+    def _write(self, entries):
+        """Atomically replace the cache file with ``entries``."""
+        cache_dir = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tokens')
+        try:
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(entries, tmp_file)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, url, username, password):
+        """Return the cached token of ``username`` or None."""
+        with self._lock():
+            entry = self._read().get(self.key(url, username, password))
+        return entry['token'] if entry else None
+
+    def get_or_login(self, url, username, password, login):
+        """Return the cached token of ``username``, logging in on a miss.
+
+        The lock is held while ``login`` runs so that processes racing for the
+        same identity wait for the first login instead of sending their own.
+
+        Arguments:
+            url - Base url of the Koku server
+            username - Username of the identity
+            password - Password of the identity
+            login - Callable returning a new token for the identity
+        """
+        key = self.key(url, username, password)
+        with self._lock():
+            entries = self._read()
+            entry = entries.get(key)
+            if entry:
+                return entry['token']
+
+            token = login()
+            entries[key] = {'token': token, 'expires': time.time() + self.ttl}
+            self._write(entries)
+        return token
+
+    def invalidate(self, url, username, password, token=None):
+        """Remove the cached token of ``username``.
+
+        If ``token`` is given, the entry is only removed if it still holds that
+        token, so a token freshly stored by another process is kept.
+        """
+        key = self.key(url, username, password)
+        with self._lock():
+            entries = self._read()
+            entry = entries.get(key)
+            if entry and (token is None or entry['token'] == token):
+                del entries[key]
+                self._write(entries)